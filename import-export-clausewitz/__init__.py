@@ -1,8 +1,12 @@
+import concurrent.futures
+import functools
+import os
+
 import bpy
 from bpy_types import (Operator)
 from bpy_extras.io_utils import (ImportHelper, ExportHelper)
 from bpy.props import *
-from . import (importer, exporter)
+from . import (asset_index, importer, exporter, mesh_export, parse_cache, profiler, utils)
 
 bl_info = {
     "name": "Clausewitz Import/Export",
@@ -53,17 +57,17 @@ class ClausewitzMeshExporter(Operator, ExportHelper):
 
     apply_Location = BoolProperty(
         name="Apply Location",
-        description="Apply Location",
+        description="Bakes the Location of the selected Objects into the exported Vertices, like Apply Location but without changing the Scene",
         default=False,
     )
     apply_rotation = BoolProperty(
         name="Apply Rotation",
-        description="Apply Rotation",
+        description="Bakes the Rotation of the selected Objects into the exported Vertices, like Apply Rotation but without changing the Scene",
         default=True,
     )
     apply_size = BoolProperty(
         name="Apply Size",
-        description="Apply Size",
+        description="Bakes the Size of the selected Objects into the exported Vertices, like Apply Size but without changing the Scene",
         default=False,
     )
 
@@ -79,25 +83,260 @@ class ClausewitzMeshExporter(Operator, ExportHelper):
         description="If checked ,Tangents are calculated, wich are needed for some shaders. May cause Problems.",
         default=False,
     )
+    quantize_position_bits = IntProperty(
+        name="Position Bits",
+        description="Snaps the Vertices of every Object to a Grid with 2^Bits Steps per Axis between its Bounds. 0 disables it.",
+        default=0,
+        min=0, max=24,
+    )
+    quantize_normal_bits = IntProperty(
+        name="Normal Bits",
+        description="Snaps the Normals to the Directions of an octahedral Encoding with this many Bits per Component. 0 disables it.",
+        default=0,
+        min=0, max=24,
+    )
+    quantize_uv_texture_size = IntProperty(
+        name="UV Texture Size",
+        description="Snaps the UVs to the Texel Grid of a Texture with this Size. 0 disables it.",
+        default=0,
+        min=0, max=16384,
+    )
+    quantize_weight_bits = IntProperty(
+        name="Weight Bits",
+        description="Rounds the Skin Weights to Steps of 1/(2^Bits - 1), the Weights of a Vertex keep their Sum. 0 disables it.",
+        default=0,
+        min=0, max=16,
+    )
+    vertex_budget = IntProperty(
+        name="Vertex Budget",
+        description="Warns about Meshes with more Vertices, 65536 is the Limit of 16 Bit Indices. 0 disables the Check.",
+        default=65536,
+        min=0,
+    )
+
+    lod_ratios = StringProperty(
+        name="LOD Ratios",
+        description="Comma separated Face Ratios like \"0.5, 0.25\", every Ratio writes a simplified <File>_lod<N>.mesh with its own .gfx Entry. Empty disables it.",
+        default="",
+    )
+
+    collision_mode = EnumProperty(
+        name="Collision",
+        description="Adds a <Shape>_collision Shape with the Collision Shader and only Positions to every exported Shape",
+        items=(
+            ('NONE', "None", "No Collision Shapes"),
+            ('HULL', "Convex Hull", "Convex Hull of the Shape"),
+            ('DECIMATE', "Decimated", "Simplified Shape, the Convex Hull if it can't be reduced to the Face Budget"),
+        ),
+        default='NONE',
+    )
+    collision_faces = IntProperty(
+        name="Collision Faces",
+        description="Maximum Faces of every Collision Shape",
+        default=64,
+        min=4,
+    )
+
+    profile = BoolProperty(
+        name="Write Profile Report",
+        description="Records Time, Calls and the Change of live Memory Blocks of every Export Stage and writes them as JSON (also enabled by the " + profiler.ENVIRONMENT_VARIABLE + " Environment Variable).",
+        default=False,
+    )
+
+    batch_mode = EnumProperty(
+        name="Files",
+        description="Writes the selected Objects into one File, or one File per Object/Group with a combined .gfx File",
+        items=(
+            ('NONE', "Single File", "All selected Objects into the chosen File"),
+            ('OBJECT', "One per Object", "Every selected top-level Object into its own File"),
+            ('GROUP', "One per Group", "The selected Objects of every Group into their own File"),
+        ),
+        default='NONE',
+    )
+    batch_name_pattern = StringProperty(
+        name="File Names",
+        description="Names of the Files of a Batch Export, written next to the chosen File. {name} is the Object/Group Name, {file} the chosen File Name.",
+        default="{name}.mesh",
+    )
+
+    reuse_unchanged = BoolProperty(
+        name="Reuse unchanged Shapes",
+        description="Keeps the exported Shapes in Memory and writes them again without rebuilding, if their Mesh, Materials, Transform and the Export Options didn't change.",
+        default=True,
+    )
+
+    run_in_background = BoolProperty(
+        name="Export in Background",
+        description="Builds and writes the Meshes in a Worker Thread, so Blender stays responsive. Press Esc to cancel. Only used when exporting from the File Dialog, scripted Exports always finish before returning.",
+        default=True,
+    )
+    #Set by invoke, Exports called from Scripts run synchronously so the Files exist when the Operator returns
+    from_dialog = BoolProperty(
+        default=False,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
 
     def draw(self, context):
         layout = self.layout
 
         layout.prop(self, 'export_gfx')
 
+        layout.prop(self, 'batch_mode')
+        if self.batch_mode != 'NONE':
+            layout.prop(self, 'batch_name_pattern')
+
         compression_Box = layout.box()
         compression_Box.label(text="Compression")
         compression_Box.prop(self, 'rounding_position')
         compression_Box.prop(self, 'export_Tangent')
+        compression_Box.prop(self, 'vertex_budget')
+
+        quantization_Box = layout.box()
+        quantization_Box.label(text="Quantization")
+        quantization_Box.prop(self, 'quantize_position_bits')
+        quantization_Box.prop(self, 'quantize_normal_bits')
+        quantization_Box.prop(self, 'quantize_uv_texture_size')
+        quantization_Box.prop(self, 'quantize_weight_bits')
+
+        layout.prop(self, 'lod_ratios')
+
+        layout.prop(self, 'collision_mode')
+        if self.collision_mode != 'NONE':
+            layout.prop(self, 'collision_faces')
 
         layout.prop(self, 'apply_Location')
         layout.prop(self, 'apply_rotation')
         layout.prop(self, 'apply_size')
 
+        layout.prop(self, 'reuse_unchanged')
+        layout.prop(self, 'run_in_background')
+        layout.prop(self, 'profile')
+
+    def invoke(self, context, event):
+        self.from_dialog = True
+
+        return ExportHelper.invoke(self, context, event)
 
     def execute(self, context):
-        pdx = exporter.PdxFileExporter(self.filepath)
-        pdx.export_mesh(self)
+        profile = None
+        if profiler.is_enabled(self.profile):
+            profile = profiler.Profile(self.filepath, "export")
+
+        #Background Mode (blender -b) has no Window and no Event Loop to poll the Worker
+        background = self.run_in_background and self.from_dialog and context.window is not None
+
+        #The Worker must not touch bpy, the Progress is shown by modal instead
+        progress = utils.Progress(None if background else context.window_manager)
+
+        try:
+            with profiler.activate(profile):
+                task, jobs, profiles = self.prepare(exporter.PdxFileExporter(self.filepath, progress), progress, profile)
+        except ValueError as e:
+            self.report({'ERROR'}, str(e))
+            return {'CANCELLED'}
+
+        if background:
+            return self.execute_background(context, task, progress, jobs, profiles)
+
+        try:
+            task()
+        except utils.ProgressCancelled:
+            self.report({'WARNING'}, "Export cancelled")
+            return {'CANCELLED'}
+        finally:
+            progress.end()
+
+        self.report_results(jobs, profiles)
+
+        return {'FINISHED'}
+
+    def prepare(self, pdx, progress, profile):
+        """Takes the Snapshots of the Scene, returns the Function running the Rest of the Export, its Jobs and the Profiles to write"""
+        if self.batch_mode == 'NONE':
+            job = pdx.prepare_export(self)
+            return functools.partial(mesh_export.run_export_job, job, progress, profile), [job], [profile]
+
+        jobs = pdx.prepare_batch_export(self, self.batch_name_pattern, self.batch_mode)
+
+        if len(jobs) == 0:
+            raise ValueError("No Mesh or Armature selected")
+
+        job_profiles = {}
+        if profile is not None:
+            job_profiles = {job.filename: profiler.Profile(job.filename, "export") for job in jobs}
+
+        gfx_filename = self.filepath.replace(".mesh", ".gfx") if self.export_gfx else None
+
+        return functools.partial(mesh_export.run_export_jobs, jobs, gfx_filename, progress, job_profiles), jobs, [profile] + list(job_profiles.values())
+
+    def report_results(self, jobs, profiles):
+        """Reports the Warnings and the Quantization Savings of the Jobs and writes the Profiles"""
+        for job in jobs:
+            for warning in job.warnings:
+                self.report({'WARNING'}, warning)
+
+        quantization_report = [entry for job in jobs for entry in job.quantization]
+
+        if len(quantization_report) > 0:
+            self.report({'INFO'}, "Quantization: {} -> {} Vertices, {} -> {} Bytes".format(
+                sum(entry["vertices_before"] for entry in quantization_report),
+                sum(entry["vertices_after"] for entry in quantization_report),
+                sum(entry["bytes_before"] for entry in quantization_report),
+                sum(entry["bytes_after"] for entry in quantization_report)))
+
+        for profile in profiles:
+            if profile is not None:
+                self.report({'INFO'}, "Profile written to " + profile.write())
+
+    def execute_background(self, context, task, progress, jobs, profiles):
+        """Runs the Task in a Worker Thread, modal polls it"""
+        self._progress = progress
+        self._jobs = jobs
+        self._profiles = profiles
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._future = self._executor.submit(task)
+
+        wm = context.window_manager
+        wm.progress_begin(0, utils.Progress.STEPS)
+        self._timer = wm.event_timer_add(0.1, context.window)
+        wm.modal_handler_add(self)
+
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self._progress.cancel()
+            return {'RUNNING_MODAL'}
+
+        if event.type == 'TIMER':
+            context.window_manager.progress_update(int(self._progress.get_fraction() * utils.Progress.STEPS))
+
+            if self._future.done():
+                return self.finish(context)
+
+        return {'PASS_THROUGH'}
+
+    def finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self._timer)
+        wm.progress_end()
+        self._executor.shutdown(wait=False)
+
+        error = self._future.exception()
+
+        if isinstance(error, utils.ProgressCancelled):
+            self.report({'WARNING'}, "Export cancelled")
+            return {'CANCELLED'}
+        elif error is not None:
+            utils.Log.critical("Export failed: " + type(error).__name__ + ": " + str(error))
+            self.report({'ERROR'}, "Export failed: " + str(error))
+            return {'CANCELLED'}
+
+        self.report_results(self._jobs, self._profiles)
+
+        self.report({'INFO'}, "Exported " + self.filepath)
+
         return {'FINISHED'}
 
 class ClausewitzMeshImporter(Operator, ImportHelper):
@@ -113,9 +352,164 @@ class ClausewitzMeshImporter(Operator, ImportHelper):
         maxlen=255,  # Max internal buffer length, longer would be clamped.
     )
 
+    files = CollectionProperty(
+        name="File Path",
+        type=bpy.types.OperatorFileListElement,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+    directory = StringProperty(
+        subtype='DIR_PATH',
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
+    use_cache = BoolProperty(
+        name="Use Parse Cache",
+        description="Stores parsed Files on Disk, so importing the same unchanged File again skips parsing.",
+        default=True,
+    )
+    cache_size = IntProperty(
+        name="Cache Size (MB)",
+        description="Maximum Size of the Parse Cache, least recently used Entries are removed first.",
+        default=parse_cache.DEFAULT_MAX_SIZE // (1024 * 1024),
+        min=16, soft_min=16,
+        max=16384, soft_max=4096,
+    )
+
+    asset_root = StringProperty(
+        name="Asset Root",
+        description="Mod or Game Directory, Textures are resolved from an Index of it instead of probing next to every File. The Index is cached and only changed Files are scanned again. Empty disables it.",
+        subtype='DIR_PATH',
+        default="",
+    )
+
+    profile = BoolProperty(
+        name="Write Profile Report",
+        description="Records Time, Calls and the Change of live Memory Blocks of every Import Stage and writes one JSON Report per File (also enabled by the " + profiler.ENVIRONMENT_VARIABLE + " Environment Variable).",
+        default=False,
+    )
+    #Set by invoke, Imports called from Scripts run synchronously so the Objects exist when the Operator returns
+    from_dialog = BoolProperty(
+        default=False,
+        options={'HIDDEN', 'SKIP_SAVE'},
+    )
+
+    def invoke(self, context, event):
+        self.from_dialog = True
+
+        return ImportHelper.invoke(self, context, event)
+
     def execute(self, context):
-        pdx = importer.PdxFileImporter(self.filepath)
-        pdx.import_mesh()
+        filenames = [os.path.join(self.directory, f.name) for f in self.files if f.name]
+
+        if len(filenames) == 0:
+            filenames = [self.filepath]
+
+        cache = None
+        if self.use_cache:
+            try:
+                cache = parse_cache.PdxParseCache(max_size=self.cache_size * 1024 * 1024)
+            except OSError as e:
+                self.report({'WARNING'}, "Parse Cache disabled: " + str(e))
+
+        profiles = {}
+        if profiler.is_enabled(self.profile):
+            profiles = {filename: profiler.Profile(filename, "import") for filename in filenames}
+
+        index = None
+        if self.asset_root != "":
+            if not os.path.isdir(bpy.path.abspath(self.asset_root)):
+                self.report({'ERROR'}, "Asset Root \"" + self.asset_root + "\" is not a Directory")
+                return {'CANCELLED'}
+
+            #Worker Processes would start Blender again, Scanning stays in this Process
+            index = asset_index.load_index(bpy.path.abspath(self.asset_root), workers=1, max_age=asset_index.REFRESH_INTERVAL)
+
+        #Files are weighted by their Size, the Shapes of a File are its Steps
+        self._progress = utils.Progress(context.window_manager)
+        for filename in filenames:
+            self._progress.add_stage(filename, os.path.getsize(filename) if os.path.isfile(filename) else 0)
+
+        self._profiles = profiles
+        self._index = index
+        self._errors = []
+        self._imported = 0
+
+        #Files are parsed in the background, Blender Objects get created as soon as a File is ready
+        self._files = importer.read_files(filenames, cache=cache, profiles=profiles, errors=self._errors)
+
+        if self.from_dialog and context.window is not None:
+            return self.execute_modal(context)
+
+        try:
+            for filename, pdx_file in self._files:
+                self.import_file(filename, pdx_file)
+        finally:
+            self._progress.end()
+
+        return self.finish()
+
+    def import_file(self, filename, pdx_file):
+        """Creates the Objects of one parsed File, raises utils.ProgressCancelled if the Import got cancelled"""
+        with profiler.activate(self._profiles.get(filename)):
+            pdx = importer.PdxFileImporter(filename, pdx_file, self._progress, self._index)
+            pdx.import_mesh()
+
+        self._imported += 1
+
+        if filename in self._profiles:
+            self.report({'INFO'}, "Profile written to " + self._profiles[filename].write())
+
+    def execute_modal(self, context):
+        """Imports one File per Timer Event, so Esc can cancel the Import between Files (or between the Shapes of the next File)"""
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.01, context.window)
+        wm.modal_handler_add(self)
+
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self._progress.cancel()
+            return {'RUNNING_MODAL'}
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        try:
+            if self._progress.is_cancelled():
+                raise utils.ProgressCancelled()
+
+            filename, pdx_file = next(self._files)
+            self.import_file(filename, pdx_file)
+        except StopIteration:
+            self.end_modal(context)
+            return self.finish()
+        except utils.ProgressCancelled:
+            self.end_modal(context)
+            self.report({'WARNING'}, "Import cancelled after " + str(self._imported) + " Files")
+            return {'CANCELLED'}
+        except Exception as e:
+            self.end_modal(context)
+            utils.Log.critical("Import failed: " + type(e).__name__ + ": " + str(e))
+            self.report({'ERROR'}, "Import failed: " + str(e))
+            return {'CANCELLED'}
+
+        return {'RUNNING_MODAL'}
+
+    def end_modal(self, context):
+        context.window_manager.event_timer_remove(self._timer)
+        #Stops the Parsing of the remaining Files
+        self._files.close()
+        self._progress.end()
+
+    def finish(self):
+        """Reports the Files which failed to parse, the Import is cancelled if none could be imported"""
+        for filename, message in self._errors:
+            self.report({'WARNING'}, "Failed to parse \"" + filename + "\": " + message)
+
+        if self._imported == 0 and len(self._errors) > 0:
+            self.report({'ERROR'}, "None of the " + str(len(self._errors)) + " selected Files could be imported")
+            return {'CANCELLED'}
 
         return {'FINISHED'}
 
@@ -133,8 +527,16 @@ class ClausewitzAnimImporter(Operator, ImportHelper):
     )
 
     def execute(self, context):
-        pdx = importer.PdxFileImporter(self.filepath)
-        pdx.import_anim()
+        profile = None
+        if profiler.is_enabled():
+            profile = profiler.Profile(self.filepath, "import")
+
+        with profiler.activate(profile):
+            pdx = importer.PdxFileImporter(self.filepath)
+            pdx.import_anim()
+
+        if profile is not None:
+            self.report({'INFO'}, "Profile written to " + profile.write())
 
         return {'FINISHED'}
 
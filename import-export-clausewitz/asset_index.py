@@ -0,0 +1,375 @@
+import argparse
+import concurrent.futures
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+
+from . import (gfx, patcher, utils)
+
+#Increase whenever the Layout of a File Record changes
+INDEX_VERSION = 3
+
+#Below the Temp Directory, see utils.get_private_directory
+DEFAULT_DIRECTORY_NAME = "clausewitz_asset_index"
+
+#Seconds the Importer uses an Index without looking for changed Files again
+REFRESH_INTERVAL = 60
+
+#Indices loaded by load_index, by Root
+__indices__ = {}
+__indices_lock__ = threading.Lock()
+
+MESH_EXTENSIONS = (".mesh",)
+GFX_EXTENSIONS = (".gfx", ".asset")
+TEXTURE_EXTENSIONS = (".dds", ".tga", ".png")
+
+#String Properties of Materials naming a Texture
+TEXTURE_PROPERTIES = ("diff", "n", "spec")
+
+def scan_mesh(data):
+    """Returns the Texture Names referenced by the Materials of the raw .mesh Data, in Order of their first Use"""
+    textures = []
+
+    for span in patcher.iter_string_properties(data):
+        if span.object_name == "material" and span.name in TEXTURE_PROPERTIES and span.value != "" and span.value not in textures:
+            textures.append(span.value)
+
+    return textures
+
+def scan_file(path, kind):
+    """Returns the Record of a .mesh or .gfx File"""
+    if kind == "mesh":
+        with io.open(path, "rb") as f:
+            return {"textures": scan_mesh(f.read())}
+
+    with io.open(path, "r", encoding="UTF-8-sig", errors="replace") as f:
+        meshes, entities = gfx.get_index(gfx.parse(f.read()))
+
+    return {"meshes": meshes, "entities": entities}
+
+def __scan_worker__(arguments):
+    results = []
+
+    for path, kind in arguments:
+        try:
+            results.append((scan_file(path, kind), None))
+        except Exception as e:
+            results.append((None, type(e).__name__ + ": " + str(e)))
+
+    return results
+
+def is_relative_path(relative):
+    """Returns True if the "/" separated Path stays below the Root it is relative to"""
+    parts = relative.split("/")
+
+    return not os.path.isabs(relative) and ":" not in parts[0] and "\\" not in relative and all(part not in ("", ".", "..") for part in parts)
+
+def get_kind(filename):
+    name = filename.lower()
+
+    if name.endswith(MESH_EXTENSIONS):
+        return "mesh"
+    elif name.endswith(GFX_EXTENSIONS):
+        return "gfx"
+    elif name.endswith(TEXTURE_EXTENSIONS):
+        return "texture"
+
+    return None
+
+class AssetIndex():
+    """Textures, .mesh Texture References and .gfx Entries of a Mod or Game Directory.
+    Paths are relative to the Root with "/" Separators, the Index is cached on Disk and refresh only scans changed Files."""
+    def __init__(self, root, directory=None):
+        """directory defaults to the private Directory of the current User, see utils.get_private_directory"""
+        self.root = os.path.abspath(root)
+        self.directory = directory
+
+        #Relative Path -> Record with kind, size, mtime and the scanned References
+        self.files = {}
+        #time.monotonic() of the last refresh, None before the first
+        self.refreshed = None
+
+        self.__lock__ = threading.Lock()
+        self.__lookup__ = None
+
+    def get_cache_path(self):
+        """Returns the Path of the cached Index, raises OSError if the default Directory isn't private"""
+        if self.directory is None:
+            self.directory = utils.get_private_directory(DEFAULT_DIRECTORY_NAME)
+        else:
+            os.makedirs(self.directory, exist_ok=True)
+
+        key = hashlib.sha1(os.path.normcase(self.root).encode("UTF-8")).hexdigest()
+
+        return os.path.join(self.directory, key + ".json")
+
+    def load(self):
+        """Loads the cached Index, returns False if there is no valid one.
+        Indices with Paths outside the Root are invalid, get_texture_path joins them onto the Root."""
+        try:
+            with io.open(self.get_cache_path(), "r", encoding="UTF-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                utils.Log.warning("Ignoring cached Asset Index: " + str(e))
+            return False
+
+        if data.get("version") != INDEX_VERSION or data.get("root") != self.root:
+            return False
+
+        if not all(is_relative_path(relative) for relative in data["files"]):
+            utils.Log.warning("Ignoring cached Asset Index of \"" + self.root + "\", it has Paths outside the Root")
+            return False
+
+        self.files = data["files"]
+        self.__lookup__ = None
+
+        return True
+
+    def save(self):
+        try:
+            path = self.get_cache_path()
+        except OSError as e:
+            utils.Log.warning("Could not write Asset Index: " + str(e))
+            return
+
+        temp_path = path + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+
+        try:
+            with io.open(temp_path, "w", encoding="UTF-8") as f:
+                json.dump({"version": INDEX_VERSION, "root": self.root, "files": self.files}, f)
+
+            os.replace(temp_path, path)
+        except OSError as e:
+            utils.Log.warning("Could not write Asset Index \"" + path + "\": " + str(e))
+
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def list_files(self):
+        """Returns (Relative Path, Kind, Size, Modification Time) of all indexed File Types below the Root"""
+        result = []
+        directories = [self.root]
+
+        while len(directories) > 0:
+            try:
+                entries = list(os.scandir(directories.pop()))
+            except OSError:
+                continue
+
+            for entry in entries:
+                if entry.is_dir():
+                    directories.append(entry.path)
+                    continue
+
+                kind = get_kind(entry.name)
+
+                if kind is not None:
+                    stat = entry.stat()
+                    relative = os.path.relpath(entry.path, self.root).replace(os.sep, "/")
+                    result.append((relative, kind, stat.st_size, stat.st_mtime_ns))
+
+        return result
+
+    def refresh(self, workers=None, chunk_size=64):
+        """Updates the Index from the Files on Disk, only new and changed Files are scanned.
+        Returns the Number of scanned and removed Files."""
+        with self.__lock__:
+            listed = self.list_files()
+            files = {}
+            changed = []
+
+            for relative, kind, size, mtime in listed:
+                record = self.files.get(relative)
+
+                if record is not None and record["kind"] == kind and record["size"] == size and record["mtime"] == mtime:
+                    files[relative] = record
+                else:
+                    files[relative] = {"kind": kind, "size": size, "mtime": mtime}
+
+                    if kind != "texture":
+                        changed.append(relative)
+
+            removed = len(set(self.files) - set(files))
+
+            arguments = [(os.path.join(self.root, relative), files[relative]["kind"]) for relative in changed]
+            chunks = [arguments[i:i + chunk_size] for i in range(0, len(arguments), chunk_size)]
+
+            if workers == 1 or len(chunks) <= 1:
+                results = [__scan_worker__(chunk) for chunk in chunks]
+            else:
+                with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+                    results = list(executor.map(__scan_worker__, chunks))
+
+            for relative, (record, error) in zip(changed, (result for chunk in results for result in chunk)):
+                if error is not None:
+                    utils.Log.warning("Could not scan \"" + relative + "\": " + error)
+                    files[relative]["error"] = error
+                else:
+                    files[relative].update(record)
+
+            self.files = files
+            self.__lookup__ = None
+            self.refreshed = time.monotonic()
+
+        return len(changed), removed
+
+    def get_files(self, kind):
+        return [relative for relative, record in sorted(self.files.items()) if record["kind"] == kind]
+
+    def get_lookup(self):
+        """Returns the Textures by lowercase Path and by lowercase File Name, Paths in Mods are not case sensitive on Windows"""
+        lookup = self.__lookup__
+
+        if lookup is None:
+            by_path = {}
+            by_name = {}
+
+            for relative in self.get_files("texture"):
+                by_path.setdefault(relative.lower(), relative)
+                by_name.setdefault(relative.rsplit("/", 1)[-1].lower(), relative)
+
+            lookup = self.__lookup__ = (by_path, by_name)
+
+        return lookup
+
+    def resolve_texture(self, mesh, texture):
+        """Returns the relative Path of the Texture referenced by the relative .mesh Path.
+        Textures next to the Mesh win, otherwise any Texture with that File Name. None if there is none."""
+        by_path, by_name = self.get_lookup()
+
+        directory = mesh.rsplit("/", 1)[0] + "/" if "/" in mesh else ""
+        relative = (directory + texture.replace("\\", "/")).lower()
+
+        if relative in by_path:
+            return by_path[relative]
+
+        return by_name.get(texture.replace("\\", "/").rsplit("/", 1)[-1].lower())
+
+    def get_relative_path(self, path):
+        """Returns the relative Path of an absolute Path below the Root, None if it is outside"""
+        relative = os.path.relpath(os.path.abspath(path), self.root)
+
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            return None
+
+        return relative.replace(os.sep, "/")
+
+    def get_texture_path(self, mesh_path, texture):
+        """Returns the absolute Path of the Texture referenced by the .mesh File at mesh_path, None if it isn't indexed"""
+        mesh = self.get_relative_path(mesh_path)
+
+        if mesh is None:
+            return None
+
+        relative = self.resolve_texture(mesh, texture)
+
+        return os.path.join(self.root, relative) if relative is not None else None
+
+    def get_texture_references(self):
+        """Returns the (Source, Texture Name, resolved relative Path or None) of every Texture Reference.
+        Source is the .mesh File of a Material Texture or the .gfx File of a meshsettings Texture, which resolves like a Texture of its pdxmesh File."""
+        result = [(mesh, texture, self.resolve_texture(mesh, texture)) for mesh in self.get_files("mesh") for texture in self.files[mesh].get("textures", ())]
+
+        for gfx_file in self.get_files("gfx"):
+            for mesh in self.files[gfx_file].get("meshes", ()):
+                for texture in mesh.get("textures", ()):
+                    result.append((gfx_file, texture, self.resolve_texture(mesh["file"], texture)))
+
+        return result
+
+    def get_missing_textures(self):
+        """Returns (Source, Texture Name) of the References without an indexed Texture, see get_texture_references"""
+        return [(source, texture) for source, texture, resolved in self.get_texture_references() if resolved is None]
+
+    def get_unused_textures(self):
+        """Returns the Textures neither a .mesh nor a .gfx File references"""
+        used = set(resolved for source, texture, resolved in self.get_texture_references())
+
+        return [texture for texture in self.get_files("texture") if texture not in used]
+
+    def get_mesh_references(self):
+        """Returns (.gfx File, Entity Name, pdxmesh Name, Mesh File) of every pdxmesh Entry, Entity Name is None for Entries no entity uses"""
+        entities = {}
+        for gfx_file in self.get_files("gfx"):
+            for entity in self.files[gfx_file].get("entities", ()):
+                entities.setdefault(entity["pdxmesh"], []).append(entity["name"])
+
+        result = []
+        for gfx_file in self.get_files("gfx"):
+            for mesh in self.files[gfx_file].get("meshes", ()):
+                for entity in entities.get(mesh["name"], [None]):
+                    result.append((gfx_file, entity, mesh["name"], mesh["file"]))
+
+        return result
+
+def load_index(root, refresh=True, workers=None, max_age=None):
+    """Returns the AssetIndex of root, loaded from its Cache and refreshed if refresh is set.
+    Indices stay in Memory, with max_age (Seconds) an Index refreshed more recently isn't refreshed again.
+    Use workers=1 inside Blender, its Executable can't run the Worker Processes."""
+    with __indices_lock__:
+        index = __indices__.get(os.path.abspath(root))
+
+        if index is None:
+            index = __indices__[os.path.abspath(root)] = AssetIndex(root)
+
+            if not index.load():
+                utils.Log.info("Building Asset Index of \"" + index.root + "\"")
+
+    if max_age is not None and index.refreshed is not None and time.monotonic() - index.refreshed < max_age:
+        refresh = False
+
+    if refresh:
+        scanned, removed = index.refresh(workers)
+        utils.Log.info("Asset Index: " + str(scanned) + " Files scanned, " + str(removed) + " removed")
+
+        if scanned > 0 or removed > 0:
+            index.save()
+
+    return index
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="index", description="Indexes the Textures, .mesh Texture References and .gfx Entries of a Mod or Game Directory and reports missing and unused Textures.")
+    parser.add_argument("root", help="Mod or Game Directory")
+    parser.add_argument("--missing", action="store_true", help="Lists Texture References without a Texture")
+    parser.add_argument("--unused", action="store_true", help="Lists Textures no .mesh or .gfx File references")
+    parser.add_argument("--rebuild", action="store_true", help="Ignores the cached Index")
+    parser.add_argument("--workers", type=int, default=None, help="Number of Worker Processes (1 disables the Pool)")
+    parser.add_argument("--json", help="Writes the Reports as JSON to the given File")
+    args = parser.parse_args(argv)
+
+    utils.Log.MIN_LOG_LEVEL = utils.LogLevel.CRITICAL
+
+    start = time.perf_counter()
+
+    index = AssetIndex(args.root)
+    if not args.rebuild:
+        index.load()
+
+    scanned, removed = index.refresh(args.workers)
+    index.save()
+
+    seconds = time.perf_counter() - start
+
+    missing = index.get_missing_textures()
+    unused = index.get_unused_textures()
+
+    if args.missing:
+        for source, texture in missing:
+            print("MISSING " + source + ": " + texture)
+
+    if args.unused:
+        for texture in unused:
+            print("UNUSED " + texture)
+
+    print("{} Meshes, {} .gfx Files, {} Textures ({} scanned in {:.2f}s), {} missing, {} unused".format(
+        len(index.get_files("mesh")), len(index.get_files("gfx")), len(index.get_files("texture")), scanned, seconds, len(missing), len(unused)))
+
+    if args.json:
+        with io.open(args.json, "w") as f:
+            json.dump({"missing": missing, "unused": unused, "meshes": index.get_mesh_references()}, f, indent=4)
+
+    return 0 if len(missing) == 0 else 1
@@ -0,0 +1,268 @@
+import argparse
+import io
+import json
+import math
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from . import (pdx_data, roundtrip, utils)
+
+#Attributes holding nested Pdx Objects, used to walk a Node Tree
+CHILD_ATTRIBUTES = ("objects", "meshes", "skeleton", "joints", "meshBounds", "material", "skin", "locators", "animJoints")
+
+class BenchmarkConfig():
+    """Size of the generated synthetic Files"""
+    def __init__(self, shapes=2, materials=4, vertices=20000, joints=64, frames=100, locators=100, repeat=3, seed=0):
+        self.shapes = shapes
+        self.materials = materials
+        self.vertices = vertices
+        self.joints = joints
+        self.frames = frames
+        self.locators = locators
+        self.repeat = repeat
+        self.seed = seed
+
+def iter_objects(node):
+    """Yields the Node and all nested Pdx Objects"""
+    yield node
+
+    for name in CHILD_ATTRIBUTES:
+        value = getattr(node, name, None)
+
+        if isinstance(value, list):
+            for child in value:
+                if hasattr(child, "get_binary_data"):
+                    yield from iter_objects(child)
+        elif hasattr(value, "get_binary_data"):
+            yield from iter_objects(value)
+
+def count_objects(nodes):
+    return sum(1 for node in nodes for o in iter_objects(node))
+
+def generate_skeleton(config, rng):
+    skeleton = pdx_data.PdxSkeleton()
+
+    for i in range(config.joints):
+        joint = pdx_data.PdxJoint("joint_" + str(i), i, i - 1)
+        joint.transform = [1, 0, 0, 0, 1, 0, 0, 0, 1, rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(-1, 1)]
+        skeleton.joints.append(joint)
+
+    return skeleton
+
+def generate_skin(config, rng, vertices):
+    skin = pdx_data.PdxSkin()
+    skin.bonesPerVertice = 4
+
+    for i in range(vertices):
+        #One or two Bones per Vertex, unused Slots are -1
+        bones = rng.sample(range(config.joints), min(config.joints, rng.randint(1, 2)))
+        weight = 1.0 / len(bones)
+
+        skin.indices.extend(bones + [-1] * (skin.bonesPerVertice - len(bones)))
+        skin.weight.extend([weight] * len(bones) + [0.0] * (skin.bonesPerVertice - len(bones)))
+
+    return skin
+
+def generate_mesh(config, rng, index):
+    mesh = pdx_data.PdxMesh()
+
+    #Grid of Vertices, two Triangles per Quad
+    side = max(2, int(math.sqrt(config.vertices)))
+
+    for y in range(side):
+        for x in range(side):
+            mesh.verts.append((x / side, rng.uniform(-0.01, 0.01), y / side))
+            mesh.normals.append((0.0, 1.0, 0.0))
+            mesh.tangents.append((1.0, 0.0, 0.0, 1.0))
+            mesh.uv_coords.append((x / side, y / side))
+
+    for y in range(side - 1):
+        for x in range(side - 1):
+            i = y * side + x
+            mesh.faces.append((i, i + side, i + 1))
+            mesh.faces.append((i + 1, i + side, i + side + 1))
+
+    mesh.meshBounds = pdx_data.PdxBounds([0, -0.01, 0], [1, 0.01, 1])
+    mesh.material = pdx_data.PdxMaterial("PdxMeshShip", "material_" + str(index) + "_diffuse.dds", "nonormal.dds", "nospec.dds")
+
+    if config.joints > 0:
+        mesh.skin = generate_skin(config, rng, len(mesh.verts))
+
+    return mesh
+
+def generate_mesh_nodes(config):
+    """Generates the Nodes of a synthetic .mesh File"""
+    rng = random.Random(config.seed)
+
+    world = pdx_data.PdxWorld()
+
+    for i in range(config.shapes):
+        shape = pdx_data.PdxShape("shape_" + str(i))
+
+        for j in range(config.materials):
+            shape.meshes.append(generate_mesh(config, rng, j))
+
+        if config.joints > 0:
+            shape.skeleton = generate_skeleton(config, rng)
+
+        world.objects.append(shape)
+
+    nodes = [pdx_data.PdxAsset(), world]
+
+    if config.locators > 0:
+        locators = pdx_data.PdxLocators()
+
+        for i in range(config.locators):
+            locator = pdx_data.PdxLocator("locator_" + str(i), [rng.uniform(-10, 10) for j in range(3)])
+            locator.quaternion = (0.0, 0.0, 0.0, 1.0)
+            locators.locators.append(locator)
+
+        nodes.append(locators)
+
+    return nodes
+
+def generate_anim_nodes(config):
+    """Generates the Nodes of a synthetic .anim File"""
+    rng = random.Random(config.seed)
+
+    info = pdx_data.PdxAnimInfo()
+    info.fps = 15.0
+    info.samples = config.frames
+    info.jointCount = config.joints
+
+    for i in range(config.joints):
+        info.animJoints.append(pdx_data.PdxAnimJoint("joint_" + str(i), "tqs", [0.0, 0.0, 0.0], [0.0, 0.0, 0.0, 1.0], 1))
+
+    samples = pdx_data.PdxAnimSamples()
+    samples.t = [rng.uniform(-1, 1) for i in range(config.frames * config.joints * 3)]
+    samples.q = [rng.uniform(-1, 1) for i in range(config.frames * config.joints * 4)]
+    samples.s = [1.0] * (config.frames * config.joints)
+
+    return [pdx_data.PdxAsset(), info, samples]
+
+def measure(function, repeat):
+    """Returns the best Wall Time of the Runs and the Peak of traced Memory of one additional Run"""
+    best = math.inf
+
+    for i in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return best, peak
+
+def get_result(name, seconds, peak, size, objects):
+    return {
+        "name": name,
+        "seconds": seconds,
+        "bytes": size,
+        "objects": objects,
+        "mb_per_second": size / seconds / (1024 * 1024) if seconds > 0 else math.inf,
+        "objects_per_second": objects / seconds if seconds > 0 else math.inf,
+        "peak_memory": peak,
+    }
+
+def run_file_benchmark(kind, nodes, config, directory):
+    """Measures Reading, Serializing and the full Round Trip of one generated File"""
+    results = []
+
+    data = bytes(roundtrip.get_file_data(nodes))
+    filename = os.path.join(directory, "benchmark." + kind)
+
+    with io.open(filename, "wb") as f:
+        f.write(data)
+
+    def read():
+        pdx_file = pdx_data.PdxFile(filename)
+        pdx_file.read()
+        return pdx_file
+
+    parsed = read()
+    objects = count_objects(parsed.nodes)
+
+    seconds, peak = measure(read, config.repeat)
+    results.append(get_result(kind + " read", seconds, peak, len(data), objects))
+
+    #get_binary_data of every Class, each Instance is serialized on its own
+    instances = {}
+    for node in nodes:
+        for o in iter_objects(node):
+            instances.setdefault(type(o).__name__, []).append(o)
+
+    for class_name in sorted(instances):
+        def serialize():
+            return sum(len(o.get_binary_data()) for o in instances[class_name])
+
+        size = serialize()
+        seconds, peak = measure(serialize, config.repeat)
+        results.append(get_result(kind + " " + class_name + ".get_binary_data", seconds, peak, size, len(instances[class_name])))
+
+    def round_trip():
+        return roundtrip.get_file_data(read().nodes)
+
+    seconds, peak = measure(round_trip, config.repeat)
+    results.append(get_result(kind + " round trip", seconds, peak, len(data), objects))
+
+    return results
+
+def run(config):
+    """Runs all Benchmarks and returns the Results"""
+    results = []
+
+    with tempfile.TemporaryDirectory() as directory:
+        results.extend(run_file_benchmark("mesh", generate_mesh_nodes(config), config, directory))
+        results.extend(run_file_benchmark("anim", generate_anim_nodes(config), config, directory))
+
+    return results
+
+def format_results(results):
+    lines = ["{:<40} {:>10} {:>10} {:>14} {:>12}".format("Benchmark", "ms", "MB/s", "Objects/s", "Peak KB")]
+
+    for r in results:
+        lines.append("{:<40} {:>10.2f} {:>10.2f} {:>14.0f} {:>12.0f}".format(r["name"], r["seconds"] * 1000, r["mb_per_second"], r["objects_per_second"], r["peak_memory"] / 1024))
+
+    return "\n".join(lines)
+
+def main(argv=None):
+    defaults = BenchmarkConfig()
+
+    parser = argparse.ArgumentParser(prog="bench", description="Measures Parse, Serialize and Round Trip Throughput on synthetic .mesh/.anim Files.")
+    parser.add_argument("--shapes", type=int, default=defaults.shapes)
+    parser.add_argument("--materials", type=int, default=defaults.materials, help="Meshes per Shape")
+    parser.add_argument("--vertices", type=int, default=defaults.vertices, help="Vertices per Mesh")
+    parser.add_argument("--joints", type=int, default=defaults.joints)
+    parser.add_argument("--frames", type=int, default=defaults.frames)
+    parser.add_argument("--locators", type=int, default=defaults.locators)
+    parser.add_argument("--repeat", type=int, default=defaults.repeat)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--json", help="Writes the Results as JSON to the given File")
+    args = parser.parse_args(argv)
+
+    config = BenchmarkConfig(args.shapes, args.materials, args.vertices, args.joints, args.frames, args.locators, max(1, args.repeat), args.seed)
+
+    #Logging every Property would dominate the Measurements
+    log_level = utils.Log.MIN_LOG_LEVEL
+    utils.Log.MIN_LOG_LEVEL = utils.LogLevel.CRITICAL
+
+    try:
+        results = run(config)
+    finally:
+        utils.Log.MIN_LOG_LEVEL = log_level
+
+    print(format_results(results))
+
+    if args.json:
+        with io.open(args.json, "w") as f:
+            json.dump({"config": vars(config), "results": results}, f, indent=4)
+
+    return 0
@@ -0,0 +1,176 @@
+import math
+
+import numpy as np
+
+from . import (pdx_data, profiler, simplify)
+
+#Collision Modes of the Exporter
+MODES = ("NONE", "HULL", "DECIMATE")
+
+#Relative Distance a Point must have to a Face Plane to count as outside
+EPSILON = 1e-9
+
+def get_directions(count):
+    """Returns count (count, 3) unit Vectors evenly spread over the Sphere (Fibonacci Lattice)"""
+    indices = np.arange(count) + 0.5
+    z = 1 - 2 * indices / count
+    radius = np.sqrt(1 - z * z)
+    angle = math.pi * (1 + math.sqrt(5)) * indices
+
+    return np.stack((radius * np.cos(angle), radius * np.sin(angle), z), axis=1)
+
+def get_support_points(positions, count):
+    """Returns the sorted Indices of the Positions furthest in count evenly spread Directions.
+    Their convex Hull has at most 2 * count - 4 Faces."""
+    directions = get_directions(count)
+
+    return np.unique(np.argmax(positions.dot(directions.T), axis=0))
+
+def get_planes(points, faces):
+    """Returns the outward Normals and the Offsets of the Face Planes"""
+    corners = points[faces]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+
+    return normals, (normals * corners[:, 0]).sum(axis=1)
+
+def get_initial_tetrahedron(points, tolerance):
+    """Returns 4 Indices of Points spanning a Tetrahedron, None if all Points are (nearly) coplanar"""
+    a = int(np.argmin(points[:, 0]))
+    b = int(np.argmax(np.abs(points - points[a]).sum(axis=1)))
+    line = points[b] - points[a]
+
+    if np.abs(line).sum() <= tolerance:
+        return None
+
+    c = int(np.argmax((np.cross(points - points[a], line) ** 2).sum(axis=1)))
+    normal = np.cross(line, points[c] - points[a])
+
+    if np.abs(normal).sum() <= tolerance * tolerance:
+        return None
+
+    distances = (points - points[a]).dot(normal)
+    d = int(np.argmax(np.abs(distances)))
+
+    if abs(distances[d]) <= tolerance * np.abs(normal).sum():
+        return None
+
+    #Orientation so every Face Normal points away from the fourth Point
+    return (a, b, c, d) if distances[d] < 0 else (a, c, b, d)
+
+@profiler.profiled("convex hull")
+def get_convex_hull(points):
+    """Returns the (Faces, 3) outward oriented Triangles of the convex Hull of the (n, 3) Points (Incremental Hull).
+    Returns None for less than 4 Points or (nearly) coplanar Points."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+
+    if len(points) < 4:
+        return None
+
+    tolerance = max(float(np.abs(points).max()), 1.0) * EPSILON
+    tetrahedron = get_initial_tetrahedron(points, tolerance)
+
+    if tetrahedron is None:
+        return None
+
+    a, b, c, d = tetrahedron
+    faces = np.array([(a, b, c), (a, d, b), (b, d, c), (c, d, a)], dtype=np.int64)
+    normals, offsets = get_planes(points, faces)
+
+    count = len(points)
+
+    for point in range(count):
+        distances = normals.dot(points[point]) - offsets
+        visible = distances > tolerance * np.sqrt((normals * normals).sum(axis=1))
+
+        if not visible.any():
+            continue
+
+        #Horizon Edges are Edges of visible Faces whose opposite Edge belongs to a hidden Face
+        edges = faces[visible][:, [0, 1, 1, 2, 2, 0]].reshape(-1, 2)
+        keys = edges[:, 0] * count + edges[:, 1]
+        reversed_keys = edges[:, 1] * count + edges[:, 0]
+        keys.sort()
+        found = np.minimum(np.searchsorted(keys, reversed_keys), len(keys) - 1)
+        horizon = edges[keys[found] != reversed_keys]
+
+        new_faces = np.empty((len(horizon), 3), dtype=np.int64)
+        new_faces[:, 0:2] = horizon
+        new_faces[:, 2] = point
+        new_normals, new_offsets = get_planes(points, new_faces)
+
+        faces = np.concatenate((faces[~visible], new_faces))
+        normals = np.concatenate((normals[~visible], new_normals))
+        offsets = np.concatenate((offsets[~visible], new_offsets))
+
+    return faces
+
+def get_decimated_hull(positions, faces, max_faces):
+    """Returns the Faces of the Mesh simplified to max_faces, None if it can't be reduced that far"""
+    used, faces = simplify.simplify(positions, faces, max_faces)
+
+    if len(faces) == 0 or len(faces) > max_faces:
+        return None
+
+    return used[faces]
+
+@profiler.profiled("collision")
+def get_collision_mesh(meshes, mode, max_faces):
+    """Returns a PdxMesh with the Collision Shader and only Positions, built from all Faces of the Meshes.
+    DECIMATE simplifies the welded Geometry and falls back to the convex Hull (HULL) if that exceeds max_faces.
+    Returns None if no Hull can be built (less than 4 Points or flat Geometry)."""
+    positions = []
+    faces = []
+    offset = 0
+
+    for mesh in meshes:
+        if len(mesh.faces) > 0:
+            positions.append(np.array(mesh.verts, dtype=np.float64).reshape(-1, 3))
+            faces.append(np.array(mesh.faces, dtype=np.int64).reshape(-1, 3) + offset)
+            offset += len(mesh.verts)
+
+    if len(faces) == 0 or max_faces < 4:
+        return None
+
+    positions = np.concatenate(positions)
+    faces = np.concatenate(faces)
+
+    hull = None
+
+    if mode == "DECIMATE":
+        hull = get_decimated_hull(positions, faces, max_faces)
+
+    if hull is None:
+        #At most 2 * Points - 4 Faces, so the Hull fits the Budget
+        support = get_support_points(positions, max_faces // 2 + 2)
+        hull = get_convex_hull(positions[support])
+
+        if hull is None:
+            return None
+
+        hull = support[hull]
+
+    used = np.unique(hull)
+
+    result = pdx_data.PdxMesh()
+    result.verts = [tuple(v) for v in positions[used].tolist()]
+    result.faces = [tuple(f) for f in np.searchsorted(used, hull).tolist()]
+    result.meshBounds = pdx_data.PdxBounds(positions[used].min(axis=0).tolist(), positions[used].max(axis=0).tolist())
+    result.material = pdx_data.PdxMaterial()
+
+    return result
+
+def get_collision_shape(shape, mode, max_faces):
+    """Returns a Shape named <Shape>_collision with the Collision Mesh of the Shape.
+    Returns None if mode is NONE, the Shape already is a Collision Shape or no Hull can be built."""
+    if mode == "NONE" or all(mesh.material.shader == "Collision" for mesh in shape.meshes):
+        return None
+
+    mesh = get_collision_mesh([mesh for mesh in shape.meshes if mesh.material.shader != "Collision"], mode, max_faces)
+
+    if mesh is None:
+        return None
+
+    result = pdx_data.PdxShape(shape.name + "_collision")
+    result.meshes = [mesh]
+
+    return result
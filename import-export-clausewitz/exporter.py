@@ -1,74 +1,46 @@
 from pathlib import Path
 import os
-import io
 import math
 import mathutils
 import re
 
+import numpy as np
+
 import bpy
-import bmesh
 
-from . import (pdx_data, utils)
+from . import (locators, mesh_export, pdx_data, profiler, quantization, utils)
 
 class PdxFileExporter:
     """File Exporter Class"""
-    def __init__(self, filename):
+    def __init__(self, filename, progress=None):
         self.filename = filename
+        self.progress = progress if progress is not None else utils.Progress()
 
         m = re.search("[^/\\\\]+$", filename)
         self.filenameNoPath = m.group(0)
 
-    def get_skinning_data(self, obj, bone_ids):
+    @profiler.profiled("skinning")
+    def get_skinning_data(self, obj, mesh, bone_ids):
+        """Returns the Bone Indices and Weights of every Vertex of mesh as (Vertices, BONES_PER_VERTEX) Arrays, unused Slots are -1/0"""
         utils.Log.info("Getting Skin Data...")
-        #Skin Data Layout:  { VertexIndex: [ {BoneIndex: Weight}, ... ], ... }
-        blender_skin = {}
-
-        for index, vertex in enumerate(obj.data.vertices):
-            skinning_data_for_vertex = []
-
-            for group in vertex.groups:
-                if obj.vertex_groups[group.group].name in bone_ids:
-                    skinning_data_for_vertex.append({bone_ids[obj.vertex_groups[group.group].name]: group.weight})
-
-            blender_skin[index] = skinning_data_for_vertex
-            #utils.Log.debug(blender_skin)
-
-        bones_per_vertex = 4
-        #Bones Per Vertex for now constant 4
-        #for i in blender_skin:
-        #   bones_per_vertex = max(len(blender_skin[i]), bones_per_vertex)
-        #
-        #utils.Log.debug("BPV: " + str(bones_per_vertex))
-
-        return {'blender_skin': blender_skin, 'bones_per_vertex': bones_per_vertex}
-
-    def get_Skin(self, skin_data):
-        skin = None
+        bones_per_vertex = mesh_export.BONES_PER_VERTEX
 
-        if skin_data is not None:
-            skin = pdx_data.PdxSkin()
-            indices = []
-            weights = []
+        indices = np.full((len(mesh.vertices), bones_per_vertex), -1, dtype=np.int32)
+        weights = np.zeros((len(mesh.vertices), bones_per_vertex), dtype=np.float32)
 
-            for index, data in skin_data['blender_skin'].items():
-                temp_indices = [-1] * skin_data['bones_per_vertex']
-                temp_weights = [0] * skin_data['bones_per_vertex']
+        #Vertex Group Index -> Bone Index
+        group_bones = {group.index: bone_ids[group.name] for group in obj.vertex_groups if group.name in bone_ids}
 
-                for i in range(0, len(data)):
-                    temp_indices[i] = next(iter(data[i].keys()))
-                    temp_weights[i] = data[i][temp_indices[i]]
+        for index, vertex in enumerate(mesh.vertices):
+            slot = 0
 
-                indices.extend(temp_indices)
-                weights.extend(temp_weights)
-
-            skin.bonesPerVertice = skin_data['bones_per_vertex']
-            skin.indices = indices
-            skin.weight = weights
-
-            utils.Log.debug(len(skin.indices))
-            utils.Log.debug(len(skin.weight))
+            for group in vertex.groups:
+                if group.group in group_bones and slot < bones_per_vertex:
+                    indices[index, slot] = group_bones[group.group]
+                    weights[index, slot] = group.weight
+                    slot += 1
 
-        return skin
+        return indices, weights
 
     def get_material_list(self, obj):
         materials = {}
@@ -81,260 +53,257 @@ class PdxFileExporter:
         
         return materials
 
-    def get_Tangent(self, verts, uv_coords):
-        A = verts[0]
-        B = verts[1]
-        C = verts[2]
-
-        p1 = B - A;
-        p2 = C - A;
+    def get_diffuse_file(self, obj, material_index):
+        """Returns the Filename of the Texture Image of the Material"""
+        diff_file = "test_diff"
 
-        stA = uv_coords[0]
-        stB = uv_coords[1]
-        stC = uv_coords[2]
-        
-        st1 = stB - stA;
-        st2 = stC - stA;
-
-        rx = (st1.x * st2.y - st1.y * st2.x)
-        if rx == 0:
-            #For Point UV's
-            return mathutils.Vector((0, 1, 0, 1))
-
-        r = 1.0 / rx;
-        tangent = (p1 * st2.y - p2 * st1.y) * r;
-        #biTangent = (p1 * st2.x - p2 * st1.x) * r;
-
-        tangent.normalize()
-        #biTangent.normalize()
-
-        return tangent.to_4d()#, biTangent
-
-    #Exports one face into the global arrays
-    def handle_BMesh_Face(self, face):
-        #Indices of the Face
-        verts = []
-        normals = []
-        uv_coords = []
-
-        for v in face.verts:
-            #Calculate Vertex Position
-            vert = v.co * self.transform_mat
-
-            # TODO Auto Edge Split on sharp Edges (For now in workflow before Export)
-            #Caluculate Normal Vector (Depending on Face smoothness)
-            if face.smooth:
-                normal = v.normal * self.transform_mat_inverse
-            else:
-                normal = face.normal * self.transform_mat_inverse
-            normal = -(normal * self.mat_mirror) # Temporary Fix
-            normal.normalize()
-
-            #Getting all UV Layers
-            loops = face.loops
-
-            #Caluculate UV Vector
-            for loop in loops:
-                if loop.vert == v:
-                    try:
-                        uv = loop[self.uv_active].uv.copy()
-                    except AttributeError:
-                        uv = [0,0]
-                    uv[1] = 1 - uv[1]
-
-            #Round Values (because of the compare)
-            for i in range(2):
-                uv[i] = round(uv[i], self.exporter.rounding_position)
-            for i in range(3):
-                vert[i] = round(vert[i], self.exporter.rounding_position)
-                normal[i] = round(normal[i], self.exporter.rounding_position)
-
-            #Freezing the vectors so they can be hashed
-            vert.freeze()
-            utils.Log.debug("Vert: " + str(vert))
-            normal.freeze()
-            utils.Log.debug("Normal: " + str(normal))
-            uv.freeze()
-            utils.Log.debug("UV: " + str(uv))
-
-            verts.append(vert)
-            normals.append(normal)
-            uv_coords.append(uv)
-        
-        if len(verts) != 3 or len(normals) != 3 or len(uv_coords) != 3:
-            #TODO Auto-Triangulation (Recursive Algorithm or Just apply the Blender one)
-            utils.Log.critical("Face has " + str(len(indices)) + " vertices! (Not Triangulated)")
-            return
+        if len(obj.material_slots) > 0:
+            mat = obj.material_slots[material_index].material
 
-        if self.exporter.export_Tangent:
-            tangent = self.get_Tangent(verts, uv_coords)
+            for mtex_slot in mat.texture_slots:
+                if mtex_slot:
+                    if hasattr(mtex_slot.texture, 'image'):
+                        if mtex_slot.texture.image is None:
+                            utils.Log.warning("Texture Image File not loaded")
+                        else:
+                            diff_file = os.path.basename(mtex_slot.texture.image.filepath)
         else:
-            tangent = mathutils.Vector((0,1,0,1))
+            diff_file = os.path.basename(obj.data.uv_textures[0].data[0].image.filepath)
 
-        for i in range(4):
-            tangent[i] = round(tangent[i], self.exporter.rounding_position)
+        return diff_file
 
-        tangent.freeze()
-        utils.Log.debug("Tangent: " + str(tangent))
-
-        indices = []
+    def get_applied_transform(self, obj):
+        """Returns the Matrix transform_apply would bake into the Data of obj and the World Matrix obj would have afterwards.
+        Only selected Objects get applied, like with transform_apply."""
+        location, rotation, scale = obj.matrix_basis.decompose()
 
+        mat_location = mathutils.Matrix.Translation(location)
+        mat_rotation = rotation.to_matrix().to_4x4()
+        mat_scale = mathutils.Matrix.Identity(4)
         for i in range(3):
-            #Reading old Vertex-Index from indexMap
-            oldIndex = self.indexMap.get((verts[i],normals[i],uv_coords[i],tangent))
+            mat_scale[i][i] = scale[i]
 
-            #Checking if Vertex already exists
-            if oldIndex is not None:
-                #Vertex exists -> Old index is used
-                utils.Log.debug("Old Index: " + str(oldIndex))
+        identity = mathutils.Matrix.Identity(4)
+        apply = obj.select
 
-                indices.append(oldIndex)
-            else:
-                #Vertex does not yet exist
-                index = len(self.verts)
-                utils.Log.debug("New Index: " + str(index))
+        applied = (mat_rotation if apply and self.exporter.apply_rotation else identity) * (mat_scale if apply and self.exporter.apply_size else identity)
+        if apply and self.exporter.apply_Location:
+            applied.translation = location
 
-                indices.append(index)
+        #The Parts of the Basis Matrix which are not applied
+        basis = (identity if apply and self.exporter.apply_Location else mat_location) * (identity if apply and self.exporter.apply_rotation else mat_rotation) * (identity if apply and self.exporter.apply_size else mat_scale)
 
-                self.verts.append(verts[i])
-                self.normals.append(normals[i])
-                self.uv_coords.append(uv_coords[i])
-                self.tangents.append(tangent)
+        if obj.parent is not None:
+            parent = obj.parent.matrix_world
 
-                #Needed for Speed
-                self.indexMap[(verts[i],normals[i],uv_coords[i],tangent)] = index
+            #Bone Children are relative to the Tail of the Bone in its Rest Pose
+            if obj.parent_type == 'BONE' and obj.parent_bone in obj.parent.data.bones:
+                bone = obj.parent.data.bones[obj.parent_bone]
+                parent = parent * bone.matrix_local * mathutils.Matrix.Translation((0, bone.length, 0))
 
-        #Setting Face
-        self.faces.append((indices[2], indices[1], indices[0]))
+            basis = parent * obj.matrix_parent_inverse * basis
 
-    #Exports one BMesh into X PdxMeshes (Splitted on Material and Size)
-    def splitMeshes(self, obj, boneIDs=None):
-        utils.Log.info("Exporting \"" + obj.name + "\"!")
+        return applied, basis
 
-        #Array of splitted PdxMeshes
-        result_meshes = []
+    def get_evaluated_mesh(self, obj):
+        """Returns a temporary Mesh with the Modifiers applied, has to be removed with bpy.data.meshes.remove.
+        Armature Modifiers are skipped, so skinned Meshes are exported in their Rest Pose."""
+        armature_modifiers = [modifier for modifier in obj.modifiers if modifier.type == "ARMATURE" and modifier.show_viewport]
 
-        #Raw Blender Mesh
-        mesh = obj.data
+        try:
+            for modifier in armature_modifiers:
+                modifier.show_viewport = False
 
-        #Skinnning Data
-        if boneIDs != None:
-            skin_data = self.get_skinning_data(obj, boneIDs)
+            return obj.to_mesh(self.scene, True, 'PREVIEW')
+        finally:
+            for modifier in armature_modifiers:
+                modifier.show_viewport = True
 
-        #Material List (for splitting along them)
-        materials = self.get_material_list(obj)
+    def get_snapshot(self, obj, boneIDs=None):
+        """Copies the evaluated Mesh Data of the Object with foreach_get, must run on the Main Thread"""
+        mesh = self.get_evaluated_mesh(obj)
 
-        #Base Bmesh Generation
-        bMesh = bmesh.new()
-        bMesh.from_mesh(mesh)
+        try:
+            with profiler.stage("snapshot"):
+                return self.__get_snapshot__(obj, mesh, boneIDs)
+        finally:
+            bpy.data.meshes.remove(mesh)
 
-        bMesh.faces.ensure_lookup_table()
-        bMesh.verts.ensure_lookup_table()
-        bMesh.verts.index_update()
-        bMesh.faces.index_update()
+    def __get_snapshot__(self, obj, mesh, boneIDs):
+        snapshot = mesh_export.MeshSnapshot(obj.name)
 
-        bpy.context.window_manager.progress_begin(0, len(bMesh.faces))
-        #Handling all Materials Seperate for Export
-        for index,material in materials.items():
-            utils.Log.info("Compiling Mesh for Material \"" + material + "\"!")
+        snapshot.transform = np.array([list(row) for row in self.transform_mat], dtype=np.float64)
+        snapshot.transform_inverse = np.array([list(row) for row in self.transform_mat_inverse], dtype=np.float64)
+        snapshot.applied_transform = np.array([list(row) for row in self.get_applied_transform(obj)[0]], dtype=np.float64)
 
-            self.verts = []
-            self.faces = []
+        vertex_count = len(mesh.vertices)
+        polygon_count = len(mesh.polygons)
+        loop_count = len(mesh.loops)
 
-            self.normals = []
-            self.tangents = []
-            self.uv_coords = []
+        def get_array(collection, attribute, count, dtype, width=1):
+            values = np.empty(count * width, dtype=dtype)
+            collection.foreach_get(attribute, values)
+            return values.reshape(-1, width) if width > 1 else values
 
-            #Used for Speed
-            self.indexMap = {}
+        snapshot.vertex_positions = get_array(mesh.vertices, "co", vertex_count, np.float32, 3)
+        snapshot.vertex_normals = get_array(mesh.vertices, "normal", vertex_count, np.float32, 3)
 
-            #Copying all Data
-            bm = bMesh.copy()
+        snapshot.polygon_loop_starts = get_array(mesh.polygons, "loop_start", polygon_count, np.int32)
+        snapshot.polygon_loop_totals = get_array(mesh.polygons, "loop_total", polygon_count, np.int32)
+        snapshot.polygon_material_indices = get_array(mesh.polygons, "material_index", polygon_count, np.int32)
+        snapshot.polygon_normals = get_array(mesh.polygons, "normal", polygon_count, np.float32, 3)
 
-            bm.verts.index_update()
-            bm.faces.index_update()
-            bm.verts.ensure_lookup_table()
-            bm.faces.ensure_lookup_table()
+        #Booleans are read into a List, the raw Type of Boolean Properties differs between Blender Versions
+        smooth = [False] * polygon_count
+        mesh.polygons.foreach_get("use_smooth", smooth)
+        snapshot.polygon_smooth = np.array(smooth, dtype=np.bool_)
 
-            #Setting active UV-Layer
-            self.uv_active = bm.loops.layers.uv.active
+        snapshot.loop_vertex_indices = get_array(mesh.loops, "vertex_index", loop_count, np.int32)
 
-            #Compiling all Faces into the Arrays
-            for face in bm.faces:
-                #Check if face is part of selected Material
-                if face.material_index == index:
-                    self.handle_BMesh_Face(face)
-                    bpy.context.window_manager.progress_update(len(self.faces))
+        #Active UV-Layer is exported as u0, the other Layers as u1 - u3
+        uv_active = mesh.uv_layers.active
+        uv_layers = [layer for layer in mesh.uv_layers if uv_active is None or layer.name != uv_active.name]
+        if uv_active is not None:
+            uv_layers.insert(0, uv_active)
 
-            #Print Counts
-            utils.Log.info("Vertices: " + str(len(self.verts)))
-            utils.Log.info("Faces: " + str(len(self.faces)))
+        for layer in uv_layers[:len(pdx_data.UV_PROPERTIES)]:
+            snapshot.loop_uvs.append(get_array(layer.data, "uv", loop_count, np.float32, 2))
 
-            #Calculating Bounding Box
-            bb_min = [math.inf, math.inf, math.inf]
-            bb_max = [-math.inf, -math.inf, -math.inf]
+        for index, material in self.get_material_list(obj).items():
+            snapshot.materials[index] = (material, self.get_diffuse_file(obj, index))
 
-            for i in range(len(self.verts)):
-                for j in range(3):
-                    bb_min[j] = min([self.verts[i][j], bb_min[j]])
-                    bb_max[j] = max([self.verts[i][j], bb_max[j]])
+        if boneIDs is not None:
+            snapshot.skin_indices, snapshot.skin_weights = self.get_skinning_data(obj, mesh, boneIDs)
 
-            utils.Log.info("Generating PdxMeshes...")
+        return snapshot
 
-            result_mesh = pdx_data.PdxMesh()
+    #Exports one Mesh into X PdxMeshes (Splitted on Material)
+    def get_settings(self):
+        quantization_settings = quantization.QuantizationSettings(
+            getattr(self.exporter, "quantize_position_bits", 0),
+            getattr(self.exporter, "quantize_normal_bits", 0),
+            getattr(self.exporter, "quantize_uv_texture_size", 0),
+            getattr(self.exporter, "quantize_weight_bits", 0))
 
-            result_mesh.verts = self.verts
-            result_mesh.faces = self.faces
+        lod_ratios = mesh_export.parse_lod_ratios(getattr(self.exporter, "lod_ratios", ""))
 
-            result_mesh.normals = self.normals
-            result_mesh.tangents = self.tangents
-            result_mesh.uv_coords = self.uv_coords
+        return mesh_export.ExportSettings(self.exporter.rounding_position, self.exporter.export_Tangent, getattr(self.exporter, "vertex_budget", 0), quantization_settings, lod_ratios,
+            getattr(self.exporter, "collision_mode", "NONE"), getattr(self.exporter, "collision_faces", 64))
 
-            if boneIDs != None:
-                result_mesh.skin = self.get_Skin(self, skin_data)
-            result_mesh.meshBounds = pdx_data.PdxBounds(bb_min, bb_max)
-            result_mesh.material = pdx_data.PdxMaterial()
+    def export_mesh(self, exporter):
+        """Exports the selected Objects, raises utils.ProgressCancelled if the Progress got cancelled"""
+        try:
+            mesh_export.run_export_job(self.prepare_export(exporter), self.progress)
+        finally:
+            self.progress.end()
+
+    def setup_export(self, exporter):
+        """Shared Setup of all Files of the Export. The Scene is not modified, the Transforms are applied to the exported Data only."""
+        self.exporter = exporter
+        self.scene = bpy.context.scene
+        #Rotation Matrix to Transform from Y-Up Space to Z-Up Space
+        self.mat_mirror = mathutils.Matrix.Scale(-1, 4, (1,0,0))
+        self.mat_rot = mathutils.Matrix.Rotation(math.radians(90.0), 4, 'X')
 
-            #Generating Material
-            diff_file = "test_diff"
+        #Children and Locators by the Name of their Parent, collected in one Pass over the Scene
+        self.children = {}
+        self.locators = {}
 
-            if len(obj.material_slots) > 0:
-                mat = obj.material_slots[material].material
+        for obj in bpy.data.objects:
+            if obj.parent is not None:
+                self.children.setdefault(obj.parent.name, []).append(obj)
 
-                for mtex_slot in mat.texture_slots:
-                    if mtex_slot:
-                        if hasattr(mtex_slot.texture, 'image'):
-                            if mtex_slot.texture.image is None:
-                                utils.Log.warning("Texture Image File not loaded")
-                            else:
-                                diff_file = os.path.basename(mtex_slot.texture.image.filepath)
-            else:
-                diff_file = os.path.basename(mesh.uv_textures[0].data[0].image.filepath)
+            if obj.type == "EMPTY":
+                owner = self.get_locator_owner(obj)
 
-            #Setting Materials (Not very importing, because it's overridenn in .gfx file)
-            result_mesh.material.shader = "PdxMeshShip"
-            result_mesh.material.diff = diff_file
-            #result_mesh.material.normal = diff_file.replace(".dds", "_normal.dds")
-            #result_mesh.material.spec = diff_file.replace(".dds", "_spec.dds")
-            result_mesh.material.normal = "nonormal.dds"
-            result_mesh.material.spec = "nospec.dds"
+                if owner is not None:
+                    self.locators.setdefault(owner.name, []).append(obj)
 
-            #Adding Mesh to List
-            result_meshes.append(result_mesh)
+    def get_locator_parent(self, obj):
+        """Returns the Armature and the Name of the Bone the Locator obj follows by a Child Of Constraint or Bone Parenting, (None, "") otherwise"""
+        for constraint in obj.constraints:
+            if constraint.type == 'CHILD_OF' and constraint.target is not None and constraint.target.type == "ARMATURE" and constraint.subtarget != "":
+                return constraint.target, constraint.subtarget
 
-            utils.Log.info("Cleaning up BMesh...\n")
-            bm.free()
+        if obj.parent is not None and obj.parent_type == 'BONE' and obj.parent_bone != "":
+            return obj.parent, obj.parent_bone
 
-        bpy.context.window_manager.progress_end()
-        utils.Log.info("Return resulting Meshes...")
-        return result_meshes
+        return None, ""
 
-    def export_mesh(self, exporter):
-        self.exporter = exporter
-        bpy.ops.object.transform_apply(location=exporter.apply_Location, rotation=exporter.apply_rotation, scale=exporter.apply_size)
-        #Rotation Matrix to Transform from Y-Up Space to Z-Up Space
-        self.mat_mirror = mathutils.Matrix.Scale(-1, 4, (1,0,0))
-        self.mat_rot = mathutils.Matrix.Rotation(math.radians(90.0), 4, 'X')
+    def get_locator_owner(self, obj):
+        """Returns the Object the Locator obj belongs to, the Armature of its Bone or its Parent"""
+        armature, bone = self.get_locator_parent(obj)
+
+        return armature if armature is not None else obj.parent
+
+    def prepare_export(self, exporter):
+        """Collects everything needed from the Scene into a mesh_export.ExportJob.
+        Must run on the Main Thread, the returned Job can be run in a Worker Thread."""
+        self.setup_export(exporter)
+
+        return self.create_job(self.filename, bpy.data.objects, exporter.export_gfx)
+
+    def get_batch_roots(self, group_by):
+        """Returns (Name, Objects) per File of a Batch Export: every selected top-level Object, or the selected Objects of every Group.
+        With group_by "GROUP" Objects without a Group get their own File."""
+        roots = [obj for obj in bpy.data.objects if obj.select and obj.parent is None and obj.type in ("MESH", "ARMATURE")]
+
+        if group_by != "GROUP":
+            return [(obj.name, [obj]) for obj in roots]
+
+        result = []
+        grouped = set()
+
+        for group in bpy.data.groups:
+            members = [obj for obj in roots if obj.name in group.objects]
+
+            if len(members) > 0:
+                result.append((group.name, members))
+                grouped.update(obj.name for obj in members)
+
+        result.extend((obj.name, [obj]) for obj in roots if obj.name not in grouped)
+
+        return result
+
+    def prepare_batch_export(self, exporter, name_pattern, group_by="OBJECT"):
+        """Like prepare_export, but returns one Job per File of the Batch (see get_batch_roots).
+        The Files are written next to the chosen File, named by name_pattern (see mesh_export.get_batch_filename)."""
+        self.setup_export(exporter)
+
+        jobs = []
+        filenames = set()
+
+        for name, roots in self.get_batch_roots(group_by):
+            filename = mesh_export.get_batch_filename(name_pattern, name, self.filename)
+
+            if filename in filenames:
+                raise ValueError("\"" + name_pattern + "\" creates the File \"" + filename + "\" more than once, use {name} in the Pattern")
+            filenames.add(filename)
+
+            #Locators belong to the File of their Parent
+            objects = roots + [obj for root in roots for obj in self.locators.get(root.name, [])]
+
+            jobs.append(self.create_job(filename, objects, False))
+
+        return jobs
+
+    def add_snapshot(self, job, pdxShape, obj, boneIDs=None):
+        """Adds the Snapshot of obj for pdxShape to the Job, returns the Weight of its Progress Stage"""
+        snapshot = self.get_snapshot(obj, boneIDs)
+        job.shapes.append((pdxShape, snapshot))
+
+        #Stages are weighted by the Number of Faces visited in split_mesh
+        weight = len(snapshot.polygon_loop_totals) * len(snapshot.materials)
+        self.progress.add_stage(snapshot.name, weight)
+
+        return weight
+
+    def create_job(self, filename, objects, export_gfx):
+        """Creates the Job writing the selected ones of objects (and Children of selected Armatures) into filename"""
+        job = mesh_export.ExportJob(filename, self.get_settings(), export_gfx)
+
+        if getattr(self.exporter, "reuse_unchanged", False):
+            job.cache = mesh_export.SHAPE_CACHE
 
         pdxObjects = []
         pdxObjects.append(pdx_data.PdxAsset())
@@ -342,8 +311,11 @@ class PdxFileExporter:
         pdxLocators = pdx_data.PdxLocators()
         pdxWorld = pdx_data.PdxWorld()
 
-        for obj in bpy.data.objects:
-            self.transform_mat = obj.matrix_world * self.mat_mirror * self.mat_rot
+        total_weight = 0
+
+        for obj in objects:
+            applied, world = self.get_applied_transform(obj)
+            self.transform_mat = world * self.mat_mirror * self.mat_rot
 
             self.transform_mat_inverse = self.transform_mat.copy()
             self.transform_mat_inverse.invert()
@@ -355,7 +327,7 @@ class PdxFileExporter:
                 if obj.select and obj.parent is None:
                         pdxShape = pdx_data.PdxShape(obj.name)
 
-                        pdxShape.meshes = self.splitMeshes(obj)
+                        total_weight += self.add_snapshot(job, pdxShape, obj)
                         pdxWorld.objects.append(pdxShape)
             elif (obj.type == "ARMATURE"):
                 if obj.select and obj.parent is None:
@@ -387,7 +359,7 @@ class PdxFileExporter:
                             utils.Log.info("Parent ID: 0")
                             pdxJoint.parent = 0
 
-                        p = bone.tail_local * self.transform_mat
+                        p = (applied * bone.tail_local) * self.transform_mat
                         pdxJoint.transform = [
                             1, 0, 0,
                             0, 1, 0,
@@ -402,19 +374,20 @@ class PdxFileExporter:
                     pdxShape = pdx_data.PdxShape(obj.name)
                     pdxShape.skeleton = pdxSkeleton
 
-                    for child in bpy.data.objects:
-                        if child.parent == obj and child.type == "MESH":
-                            pdxShape.meshes = self.splitMeshes(child)
+                    for child in self.children.get(obj.name, []):
+                        if child.type == "MESH":
+                            total_weight += self.add_snapshot(job, pdxShape, child, boneIDs)
 
                     pdxWorld.objects.append(pdxShape)
             elif obj.type == "EMPTY":
-                if (obj.parent is not None and obj.parent.select) or obj.select:
-                    location = obj.matrix_world.decompose()[0] * self.mat_rot
+                owner = self.get_locator_owner(obj)
+
+                if (owner is not None and owner.select) or obj.select:
+                    location = world.decompose()[0] * self.mat_rot
                     locator = pdx_data.PdxLocator(obj.name, location)
-                    obj.rotation_mode = 'QUATERNION'
-                    locator.quaternion = obj.matrix_world.decompose()[1]
-                    obj.rotation_mode = 'XYZ'
-                    #TODO locator.parent
+                    locator.quaternion = world.decompose()[1]
+                    #Moved into the Space of the Parent Joint once all Skeletons are known
+                    locator.parent = self.get_locator_parent(obj)[1]
 
                     pdxLocators.locators.append(locator)
             else:
@@ -422,33 +395,15 @@ class PdxFileExporter:
 
         pdxObjects.append(pdxWorld)
 
+        for locator in locators.to_joint_space(pdxLocators.locators, locators.get_joint_index(pdxWorld.objects)):
+            utils.Log.warning("Bone \"" + locator.parent + "\" of Locator \"" + locator.name + "\" is not exported, the Locator is written without Parent")
+            locator.parent = ""
+
         if len(pdxLocators.locators) > 0:
             pdxObjects.append(pdxLocators)
 
-        #Exporting .mesh File
-        mesh_file = io.open(self.filename, 'w+b')
-
-        mesh_file.write(b'@@b@')
-
-        for i in range(len(pdxObjects)):
-            mesh_file.write(pdxObjects[i].get_binary_data())
-
-        mesh_file.close()
-
-        #Exporting .gfx File
-        if exporter.export_gfx:
-            gfx_file = io.open(self.filename.replace(".mesh", ".gfx"), 'w')
-
-            gfx_file.write("objectTypes = {\n");
-            gfx_file.write("    pdxmesh = {\n");
-            gfx_file.write("        name = \"" + self.filenameNoPath.replace(".", "_") + "\"\n")
-            gfx_file.write("        file = \"" + self.filenameNoPath + "\"\n")
-            gfx_file.write("        scale = 1\n")
-
-            for i in range(len(pdxObjects)):
-                gfx_file.write(pdxObjects[i].get_gfx_data())
+        job.nodes = pdxObjects
 
-            gfx_file.write("    }\n");
-            gfx_file.write("}\n");
+        self.progress.add_stage(mesh_export.get_write_stage(job), total_weight * 0.05 + 1)
 
-            gfx_file.close()
\ No newline at end of file
+        return job
@@ -0,0 +1,362 @@
+import codecs
+import io
+import os
+import re
+import threading
+
+#Tokens of the Clausewitz Text Format (.gfx, .asset) with the Whitespace and Comments before them: Strings, Operators and Words
+TOKEN = re.compile(r'(?:\s+|#[^\n]*)*(?:"((?:[^"\\]|\\.)*)"|([<>!]=|[{}=<>])|([^\s{}="#<>!]+))')
+#Whitespace and Comments after the last Token
+TRAILING = re.compile(r'(?:\s+|#[^\n]*)*\Z')
+#Only what changes the Brace Depth, used to skip Blocks without tokenizing them
+STRUCTURE = re.compile(r'"(?:[^"\\]|\\.)*"|#[^\n]*|([{}])')
+
+KINDS = (None, "string", "operator", "word")
+
+INDENT = "    "
+
+#Tried in Order when reading existing Files, older Files are often saved as Windows-1252
+ENCODINGS = ("UTF-8", "cp1252", "latin-1")
+
+#Key of the top-level Block containing the pdxmesh Entries
+OBJECT_TYPES = "objectTypes"
+
+#meshsettings Entries naming a Texture, they override the Textures of the .mesh Material
+TEXTURE_KEYS = ("texture_diffuse", "texture_normal", "texture_specular")
+
+class GfxToken():
+    """Token of a Text, start and end are Offsets into the Text. kind is "string", "operator" or "word"."""
+    __slots__ = ("kind", "value", "start", "end")
+
+    def __init__(self, kind: str, value: str, start: int, end: int):
+        self.kind = kind
+        self.value = value
+        self.start = start
+        self.end = end
+
+class GfxEntry():
+    """"key = value" or a bare Value (key None) of a Block. value is a String or a GfxBlock, start and end span the whole Entry."""
+    __slots__ = ("key", "operator", "value", "start", "end")
+
+    def __init__(self, key, operator, value, start: int, end: int):
+        self.key = key
+        self.operator = operator
+        self.value = value
+        self.start = start
+        self.end = end
+
+class GfxBlock():
+    """Entries between Braces, start is the Offset of "{" and end the Offset after "}". The Root spans the whole Text."""
+    __slots__ = ("entries", "start", "end")
+
+    def __init__(self, start: int = 0, end: int = 0):
+        self.entries = []
+        self.start = start
+        self.end = end
+
+    def get(self, key, default=None):
+        """Returns the Value of the first Entry with the Key"""
+        for entry in self.entries:
+            if entry.key == key:
+                return entry.value
+
+        return default
+
+    def get_blocks(self, key):
+        """Returns the Entries with the Key and a Block as Value"""
+        return [entry for entry in self.entries if entry.key == key and isinstance(entry.value, GfxBlock)]
+
+    def find(self, key, name):
+        """Returns the Entry with the Key whose Block has the given name, None if there is none"""
+        for entry in self.get_blocks(key):
+            if entry.value.get("name") == name:
+                return entry
+
+        return None
+
+    def iter_blocks(self, key):
+        """Yields the Blocks of all Entries with the Key at any Depth, in the Order of the Text"""
+        stack = [iter(self.entries)]
+
+        while len(stack) > 0:
+            for entry in stack[-1]:
+                if isinstance(entry.value, GfxBlock):
+                    if entry.key == key:
+                        yield entry.value
+
+                    stack.append(iter(entry.value.entries))
+                    break
+            else:
+                stack.pop()
+
+def get_line(text, offset):
+    return text.count("\n", 0, offset) + 1
+
+def __iter_tokens__(text, offset=0):
+    """Yields (Kind Index, Value, Start, End) of every Token from offset on, see KINDS"""
+    for match in TOKEN.finditer(text, offset):
+        if match.start() != offset:
+            break
+
+        kind = match.lastindex
+        offset = match.end()
+
+        yield kind, match.group(kind), match.start(kind) - (kind == 1), offset
+
+    if TRAILING.match(text, offset) is None:
+        raise ValueError("Unexpected Character at Line " + str(get_line(text, offset)))
+
+def skip_block(text, offset):
+    """Returns the Offset after the "}" closing the Block whose Content starts at offset"""
+    depth = 1
+
+    for match in STRUCTURE.finditer(text, offset):
+        brace = match.group(1)
+
+        if brace == "{":
+            depth += 1
+        elif brace == "}":
+            depth -= 1
+
+            if depth == 0:
+                return match.end()
+
+    raise ValueError("Unclosed \"{\" at Line " + str(get_line(text, offset - 1)))
+
+def tokenize(text):
+    """Yields the Tokens of the Text, raises ValueError for Characters no Token matches (like an unterminated String)"""
+    for kind, value, start, end in __iter_tokens__(text):
+        yield GfxToken(KINDS[kind], value, start, end)
+
+def parse(text, max_depth=None):
+    """Returns the Root GfxBlock of the Text, raises ValueError for unbalanced Braces and Assignments without Value.
+    Blocks at max_depth (the Root is 0) keep their Range but get no Entries, their Content is only scanned for Braces."""
+    root = GfxBlock(0, len(text))
+    #Open Blocks and the Entries they are the Values of
+    blocks = [root]
+    entries = [None]
+    current = root.entries
+
+    #Key Token and Operator of an unfinished "key = value", previous is a Token which may become a Key
+    key = None
+    operator = None
+    previous = None
+
+    tokens = __iter_tokens__(text)
+
+    while tokens is not None:
+        #Set when a skipped Block ends the Iteration
+        resumed = None
+
+        for kind, value, start, end in tokens:
+            if kind == 2 and (value == "{" or value == "}"):
+                if operator is None and previous is not None:
+                    #A bare Value before the Brace
+                    current.append(GfxEntry(None, None, previous[1], previous[2], previous[3]))
+                    previous = None
+
+                if value == "{":
+                    block = GfxBlock(start)
+
+                    if operator is not None:
+                        entry = GfxEntry(key[1], operator, block, key[2], end)
+                        key = None
+                        operator = None
+                    else:
+                        entry = GfxEntry(None, None, block, start, end)
+
+                    current.append(entry)
+
+                    if max_depth is not None and len(blocks) >= max_depth:
+                        block.end = entry.end = skip_block(text, end)
+                        resumed = __iter_tokens__(text, block.end)
+                        break
+
+                    blocks.append(block)
+                    entries.append(entry)
+                    current = block.entries
+                else:
+                    if len(blocks) == 1:
+                        raise ValueError("Unexpected \"}\" at Line " + str(get_line(text, start)))
+                    if operator is not None:
+                        raise ValueError("Missing Value of \"" + key[1] + "\" at Line " + str(get_line(text, key[2])))
+
+                    blocks.pop().end = end
+                    entries.pop().end = end
+                    current = blocks[-1].entries
+            elif kind == 2:
+                if previous is None or operator is not None:
+                    raise ValueError("Unexpected \"" + value + "\" at Line " + str(get_line(text, start)))
+
+                key = previous
+                operator = value
+                previous = None
+            elif operator is not None:
+                current.append(GfxEntry(key[1], operator, value, key[2], end))
+                key = None
+                operator = None
+            else:
+                if previous is not None:
+                    current.append(GfxEntry(None, None, previous[1], previous[2], previous[3]))
+
+                previous = (kind, value, start, end)
+
+        tokens = resumed
+
+    if operator is not None:
+        raise ValueError("Missing Value of \"" + key[1] + "\" at Line " + str(get_line(text, key[2])))
+    if len(blocks) > 1:
+        raise ValueError("Unclosed \"{\" at Line " + str(get_line(text, blocks[-1].start)))
+
+    if previous is not None:
+        current.append(GfxEntry(None, None, previous[1], previous[2], previous[3]))
+
+    return root
+
+def format_value(value, depth=0, newline="\n"):
+    """Returns the Text of a Value: Strings are quoted, Numbers bare and Lists of (Key, Value) Pairs become Blocks"""
+    if isinstance(value, str):
+        return "\"" + value + "\""
+    elif isinstance(value, bool):
+        return "yes" if value else "no"
+    elif isinstance(value, (int, float)):
+        return str(value)
+
+    return "{" + newline + format_entries(value, depth + 1, newline) + INDENT * depth + "}"
+
+def format_entries(pairs, depth=0, newline="\n"):
+    """Returns the Text of the (Key, Value) Pairs, one per Line. Blocks are separated by an empty Line like the Game Files."""
+    lines = []
+
+    for key, value in pairs:
+        if isinstance(value, (list, tuple)) and len(lines) > 0:
+            lines.append(newline)
+
+        lines.append(INDENT * depth + key + " = " + format_value(value, depth, newline) + newline)
+
+    return "".join(lines)
+
+def get_newline(text):
+    """Returns the Line Ending of the first Line, "\\n" for Texts without one"""
+    end = text.find("\n")
+
+    return "\r\n" if end > 0 and text[end - 1] == "\r" else "\n"
+
+def get_name(pairs):
+    """Returns the Value of the name Pair"""
+    for key, value in pairs:
+        if key == "name":
+            return value
+
+    return None
+
+def merge(text, entries, block_key=OBJECT_TYPES):
+    """Returns the Text with the (Key, Pairs) Entries merged into the top-level block_key Block and the Numbers of replaced and added Entries.
+    Entries replace the Entry with the same Key and name, others are added at the End of the Block.
+    Only the Ranges of replaced Entries are written again, the Rest of the Text is kept as it is.
+    Written Lines end like the first Line of the Text."""
+    newline = get_newline(text)
+
+    #Entries of the Block and their Names are enough, deeper Blocks are only skipped
+    root = parse(text, 3)
+    targets = root.get_blocks(block_key)
+
+    if len(targets) == 0:
+        separator = "" if text == "" or text.endswith("\n") else newline
+
+        return text + separator + format_entries([(block_key, entries)], 0, newline), 0, len(entries)
+
+    target = targets[0].value
+
+    #(Start, End, Replacement) in Order of the Text
+    splices = []
+    added = []
+
+    for key, pairs in entries:
+        existing = target.find(key, get_name(pairs))
+
+        if existing is not None:
+            splices.append((existing.start, existing.end, key + " = " + format_value(pairs, 1, newline)))
+        else:
+            added.append((key, pairs))
+
+    replaced = len(splices)
+
+    if len(added) > 0:
+        #Before the closing Brace, on a Line of its own
+        closing = target.end - 1
+        line_start = text.rfind("\n", target.start, closing) + 1
+        prefix = newline if text[line_start:closing].strip() != "" else ""
+        splices.append((closing, closing, prefix + newline + format_entries(added, 1, newline)))
+
+    splices.sort(key=lambda splice: splice[0])
+
+    chunks = []
+    position = 0
+
+    for start, end, replacement in splices:
+        chunks.append(text[position:start])
+        chunks.append(replacement)
+        position = end
+
+    chunks.append(text[position:])
+
+    return "".join(chunks), replaced, len(added)
+
+def merge_file(filename, entries, block_key=OBJECT_TYPES):
+    """Merges the Entries into the File (see merge), creating it if needed. The File is replaced atomically.
+    Existing Files keep their Encoding (see ENCODINGS), Byte Order Mark and Line Endings.
+    Returns the Numbers of replaced and added Entries."""
+    text = ""
+    encoding = "UTF-8"
+
+    if os.path.isfile(filename):
+        with io.open(filename, "rb") as f:
+            data = f.read()
+
+        if data.startswith(codecs.BOM_UTF8):
+            encoding = "UTF-8-sig"
+            text = data.decode(encoding)
+        else:
+            for encoding in ENCODINGS:
+                try:
+                    text = data.decode(encoding)
+                    break
+                except UnicodeDecodeError:
+                    pass
+
+    text, replaced, added = merge(text, entries, block_key)
+
+    temp_path = filename + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+
+    try:
+        with io.open(temp_path, "w", encoding=encoding, newline="") as f:
+            f.write(text)
+
+        os.replace(temp_path, filename)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    return replaced, added
+
+def get_textures(block):
+    """Returns the Texture Names of the meshsettings Blocks of a pdxmesh Block, in Order of their first Use"""
+    textures = []
+
+    for entry in block.get_blocks("meshsettings"):
+        for key in TEXTURE_KEYS:
+            texture = entry.value.get(key)
+
+            if isinstance(texture, str) and texture != "" and texture not in textures:
+                textures.append(texture)
+
+    return textures
+
+def get_index(root):
+    """Returns the pdxmesh Entries ({name, file, textures}) and entity Entries ({name, pdxmesh}) at any Depth of the parsed Root"""
+    meshes = [{"name": block.get("name", ""), "file": block.get("file"), "textures": get_textures(block)} for block in root.iter_blocks("pdxmesh") if isinstance(block.get("file"), str)]
+    entities = [{"name": block.get("name", ""), "pdxmesh": block.get("pdxmesh")} for block in root.iter_blocks("entity") if isinstance(block.get("pdxmesh"), str)]
+
+    return meshes, entities
@@ -1,21 +1,128 @@
 from pathlib import Path
+import concurrent.futures
 import os
 import io
 import math
 import mathutils
 import random
 
+import numpy as np
+
 import bpy
-import bmesh
 
-from . import (pdx_data, utils)
+from . import (locators, pdx_data, profiler, utils)
+
+def read_file(filename, cache=None, profile=None):
+    """Reads and Parses a single File, safe to be called from a worker Thread (no bpy access)"""
+    with profiler.activate(profile):
+        pdx_file = pdx_data.PdxFile(filename)
+        pdx_file.read(cache)
+
+    return pdx_file
+
+def read_files(filenames, max_workers=None, cache=None, profiles=None, errors=None):
+    """Parses all Files in a Thread Pool and yields (filename, PdxFile) in the Order the Parses complete.
+    profiles optionally maps Filenames to the Profile recording the Parse.
+    Files which fail to parse are skipped, their (filename, Message) get appended to errors if given.
+    Closing the Generator cancels the Parses which haven't started yet."""
+    if profiles is None:
+        profiles = {}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(read_file, filename, cache, profiles.get(filename)): filename for filename in filenames}
+
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                filename = futures[future]
+
+                try:
+                    pdx_file = future.result()
+                except Exception as e:
+                    utils.Log.error("Failed to parse \"" + filename + "\": " + str(e))
+
+                    if errors is not None:
+                        errors.append((filename, type(e).__name__ + ": " + str(e)))
+                    continue
+
+                yield filename, pdx_file
+        finally:
+            #Closing the Generator early (a cancelled Import) skips the Files which haven't started parsing yet
+            for future in futures:
+                future.cancel()
+
+#Joint Transform used for Joints without a valid tx Property
+IDENTITY_TRANSFORM = (1, 0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 0)
+
+#Session wide Caches, mapping the Key to the Name of the Datablock (References to Datablocks can become invalid)
+image_cache = {}
+material_cache = {}
+
+def get_image(image_path):
+    """Returns the Image for the File, reusing an already loaded Image (check_existing Semantics)"""
+    image_path = os.path.normcase(os.path.abspath(image_path))
+
+    image_name = image_cache.get(image_path)
+    if image_name is not None:
+        image = bpy.data.images.get(image_name)
+
+        if image is not None and os.path.normcase(os.path.abspath(bpy.path.abspath(image.filepath))) == image_path:
+            return image
+
+    image = bpy.data.images.load(image_path, check_existing=True)
+    image_cache[image_path] = image.name
+
+    return image
+
+def get_material(name, shader, image_path):
+    """Returns a Material for the Shader and Texture, reusing an already created Material if possible.
+    name only names new Materials, the Texture uses the active UV Layer of every Mesh, so any Shape can share the Material."""
+    key = (shader, image_path)
+
+    material_name = material_cache.get(key)
+    if material_name is not None:
+        mat = bpy.data.materials.get(material_name)
+
+        if mat is not None:
+            return mat
+
+    mat = bpy.data.materials.new(name=name + "_material")
+    mat.diffuse_color = (random.random(), random.random(), random.random())
+
+    tex = bpy.data.textures.new(name + "_tex", 'IMAGE')
+    tex.type = 'IMAGE'
+
+    if image_path is not None:
+        tex.image = get_image(image_path)
+    else:
+        utils.Log.info("No Texture File was found.")
+
+    slot = mat.texture_slots.add()
+    slot.texture = tex
+    slot.bump_method = 'BUMP_ORIGINAL'
+    slot.mapping = 'FLAT'
+    slot.mapping_x = 'X'
+    slot.mapping_y = 'Y'
+    slot.texture_coords = 'UV'
+    slot.use = True
+    #Empty is the active UV Layer of the Mesh, create_mesh makes u0 active
+    slot.uv_layer = ""
+
+    material_cache[key] = mat.name
+
+    return mat
 
 class PdxFileImporter:
-    def __init__(self, filename):
+    def __init__(self, filename, pdx_file=None, progress=None, asset_index=None):
         utils.Log.info("------------------------------------")
         utils.Log.info("Importing: " + filename + "\n\n\n\n\n")
-        self.file = pdx_data.PdxFile(filename)
-        self.file.read()
+
+        if pdx_file is None:
+            pdx_file = read_file(filename)
+
+        self.file = pdx_file
+        self.progress = progress if progress is not None else utils.Progress()
+        #Resolves Textures without probing the File System, see asset_index.AssetIndex
+        self.asset_index = asset_index
 
         self.mat_rot_simple = mathutils.Matrix.Rotation(math.radians(-90.0), 4, 'X')
 
@@ -25,8 +132,16 @@ class PdxFileImporter:
         self.mat_rot_inverse = self.mat_rot.copy()
         self.mat_rot_inverse.invert()
 
+        #Mesh Datablocks of already imported Shapes, keyed by their Geometry
+        self.instanceMeshes = {}
+
+        #Armature Objects by Joint Name, the Targets of parented Locators
+        self.armatures = {}
+
     def import_mesh(self):
-        #Rotation Matrix to Transform from Y-Up Space to Z-Up Space
+        """Creates the Objects of the File, raises utils.ProgressCancelled if the Progress got cancelled"""
+        shapeCount = sum(len(node.objects) for node in self.file.nodes if isinstance(node, pdx_data.PdxWorld))
+        self.progress.begin_stage(self.file.filename, shapeCount)
 
         for node in self.file.nodes:
             if isinstance(node, pdx_data.PdxAsset):
@@ -34,203 +149,336 @@ class PdxFileImporter:
                 utils.Log.info("PDXAsset Version " + str(node.version[0]) + "." + str(node.version[1]))
             elif isinstance(node, pdx_data.PdxWorld):
                 for shape in node.objects:
-                    bpy.ops.object.select_all(action='DESELECT')
+                    self.progress.advance()
+
+                    #Only touches the selected Objects, so the Cost doesn't grow with the Scene
+                    for selected in bpy.context.selected_objects:
+                        selected.select = False
+
                     if isinstance(shape, pdx_data.PdxShape):
                         name = shape.name
 
-                        obj = None
+                        instanceKey = self.get_instance_key(shape)
+
+                        if instanceKey in self.instanceMeshes:
+                            #Identical Geometry was already imported -> Linked Duplicate
+                            meshObj = self.create_object(name, self.instanceMeshes[instanceKey])
 
-                        collisionShape = False
-                        skeletonPresent = False
+                            if any(meshData.material.shader == "Collision" for meshData in shape.meshes):
+                                meshObj.draw_type = "WIRE"
 
+                            continue
+
+                        obj = None
                         boneNames = None
 
                         if isinstance(shape.skeleton, pdx_data.PdxSkeleton):
-                            skeletonPresent = True
-                            boneNames = [""] * len(shape.skeleton.joints)
+                            obj, boneNames = self.create_armature(name, shape.skeleton)
+
+                            for boneName in boneNames:
+                                self.armatures.setdefault(boneName, obj)
+
+                        mesh, collisionShape = self.create_mesh(name, shape)
+
+                        meshObj = self.create_object(name, mesh)
+
+                        if obj is not None:
+                            meshObj.parent = obj
+
+                        if collisionShape:
+                            meshObj.draw_type = "WIRE"
 
-                            amt = bpy.data.armatures.new(name)
-                            amt.draw_type = 'STICK'
-                            obj = bpy.data.objects.new(name, amt)
+                        if instanceKey is not None:
+                            self.instanceMeshes[instanceKey] = mesh
 
-                            scn = bpy.context.scene
-                            scn.objects.link(obj)
-                            scn.objects.active = obj
-                            obj.select = True
+                        if boneNames is not None:
+                            self.create_vertex_groups(meshObj, shape, boneNames)
 
-                            for joint in shape.skeleton.joints:
-                                boneNames[joint.index] = joint.name
+                            modifier = meshObj.modifiers.new("Armature", 'ARMATURE')
+                            modifier.object = obj
+                    else:
+                        utils.Log.info("ERROR ::: Invalid Object in World: " + str(shape))
+            elif isinstance(node, pdx_data.PdxLocators):
+                self.create_locators(node.locators)
+            else:
+                utils.Log.info("ERROR ::: Invalid node found: " + str(node))
 
-                            bpy.ops.object.mode_set(mode='EDIT')
+        self.progress.end_stage()
 
-                            for joint in shape.skeleton.joints:
-                                #Head of the Bone is the PdxJoint.
-                                #Tail only goes to next Bone
-                                bone = amt.edit_bones.new(joint.name)
+    @profiler.profiled("locators")
+    def create_locators(self, pdxLocators):
+        """Creates the Empties of all Locators in one Pass. Locators with a Parent Joint follow its Bone with a Child Of Constraint."""
+        shapes = [shape for node in self.file.nodes if isinstance(node, pdx_data.PdxWorld) for shape in node.objects]
+        joint_index = locators.get_joint_index(shapes)
 
-                                #Transformation Matrix
-                                transformationMatrix = mathutils.Matrix()
-                                transformationMatrix[0][0:4] = joint.transform[0], joint.transform[3], joint.transform[6], 0
-                                transformationMatrix[1][0:4] = joint.transform[1], joint.transform[4], joint.transform[7], 0
-                                transformationMatrix[2][0:4] = joint.transform[2], joint.transform[5], joint.transform[8], 0
-                                transformationMatrix[3][0:4] = 0, 0, 0, 1
+        #Transformed together, Locators with a Parent are stored relative to their Joint
+        positions, quaternions = locators.to_model_space(pdxLocators, joint_index)
+        positions = positions.dot(np.array(self.mat_rot.to_3x3(), dtype=np.float64))
 
-                                #Position with applied Rotation and Scaling
-                                joint_position = -mathutils.Vector((joint.transform[9], joint.transform[10], joint.transform[11], 1))
-                                joint_position = joint_position * transformationMatrix * self.mat_rot
+        scn = bpy.context.scene
 
-                                print(joint_position)
+        parent_locator = bpy.data.objects.new('Locators', None)
+        scn.objects.link(parent_locator)
 
-                                #Apply Postion to Bone
-                                bone.head = joint_position[0:3]
+        for locator, position, quaternion in zip(pdxLocators, positions.tolist(), quaternions.tolist()):
+            obj = bpy.data.objects.new(locator.name, None)
+            scn.objects.link(obj)
+            obj.parent = parent_locator
+            obj.empty_draw_size = 2
+            obj.empty_draw_type = 'SINGLE_ARROW'
+            obj.location = position
+            obj.rotation_mode = 'QUATERNION'
+            obj.rotation_quaternion = quaternion
+            obj.rotation_mode = 'XYZ'
 
-                                #Applying Default Position for tail
-                                p = joint_position + mathutils.Vector((0, 0.1, 0, 1)) * transformationMatrix * self.mat_rot
-                                bone.tail = p[0:3]
+            if locator.parent == "":
+                continue
 
-                                if joint.parent >= 0:
-                                    #Does have a Parent
+            armature = self.armatures.get(locator.parent)
 
-                                    #Setting Parent
-                                    parent = amt.edit_bones[boneNames[joint.parent]]
-                                    bone.parent = parent
+            if armature is None:
+                utils.Log.warning("Parent \"" + locator.parent + "\" of Locator \"" + locator.name + "\" not found")
+                continue
 
-                            bpy.ops.object.mode_set(mode='OBJECT')
+            #The Inverse of the Rest Pose keeps the Locator in Place until the Bone moves
+            constraint = obj.constraints.new('CHILD_OF')
+            constraint.target = armature
+            constraint.subtarget = locator.parent
+            constraint.inverse_matrix = (armature.matrix_world * armature.data.bones[locator.parent].matrix_local).inverted()
 
-                        mesh = bpy.data.meshes.new(name)
-                        meshObj = bpy.data.objects.new(name, mesh)
+    def create_object(self, name, data):
+        """Creates an Object, links it to the Scene and makes it the selected active Object"""
+        obj = bpy.data.objects.new(name, data)
 
-                        scn = bpy.context.scene
-                        scn.objects.link(meshObj)
-                        scn.objects.active = meshObj
-                        meshObj.select = True
-                        if not(obj is None):
-                            meshObj.parent = obj
+        scn = bpy.context.scene
+        scn.objects.link(obj)
+        scn.objects.active = obj
+        obj.select = True
 
-                        for meshData in shape.meshes:
-                            if isinstance(meshData, pdx_data.PdxMesh):
-                                sub_mesh = bpy.data.meshes.new(name)
-                                sub_object = bpy.data.objects.new(name, sub_mesh)
-
-                                scn = bpy.context.scene
-                                scn.objects.link(sub_object)
-                                scn.objects.active = sub_object
-                                sub_object.select = True
-
-                                sub_mesh.from_pydata(meshData.verts, [], meshData.faces)
-                                #sub_mesh.normals_split_custom_set_from_vertices(meshData.normals)
-
-                                if skeletonPresent:
-                                    for name in boneNames:
-                                        sub_object.vertex_groups.new(name)
-
-                                    if meshData.skin is not None:
-                                        utils.Log.info("BPV: " + str(meshData.skin.bonesPerVertice))
-                                        bpv = meshData.skin.bonesPerVertice
-                                        bpv = 4
-
-                                        for i in range(len(meshData.skin.indices) // bpv):
-                                            for j in range(bpv):
-                                                indice = meshData.skin.indices[i * bpv + j]
-                                                if indice >= 0:
-                                                    bName = boneNames[indice]
-                                                    weight = meshData.skin.weight[i * bpv + j]
-                                                    sub_object.vertex_groups[bName].add([i], weight, 'REPLACE')
-                                    else:
-                                        utils.Log.warning("No Skinning Data")
-
-                                bm = bmesh.new()
-                                bm.from_mesh(sub_mesh)
-
-                                for vert in bm.verts:
-                                    vert.co = vert.co * self.mat_rot
-                                    vert.normal = vert.normal * self.mat_rot_inverse
-
-                                bm.normal_update()
-                                bm.verts.ensure_lookup_table()
-                                bm.verts.index_update()
-                                bm.faces.index_update()
-
-                                if meshData.material.shader == "Collision":
-                                    collisionShape = True
-                                else:
-                                    uv_layer = bm.loops.layers.uv.new(name + "_uv")
-
-                                    for face in bm.faces:
-                                        face.smooth = True
-                                        for loop in face.loops:
-                                            loop[uv_layer].uv[0] = meshData.uv_coords[loop.vert.index][0]
-                                            loop[uv_layer].uv[1] = 1 - meshData.uv_coords[loop.vert.index][1]
-
-                                    mat = bpy.data.materials.new(name=name + "_material")
-                                    mat.diffuse_color = (random.random(), random.random(), random.random())
-                                    sub_object.data.materials.append(mat)
-
-                                    tex = bpy.data.textures.new(shape.name + "_tex", 'IMAGE')
-                                    tex.type = 'IMAGE'
-
-                                    img_file = Path(os.path.join(os.path.dirname(self.file.filename), meshData.material.diff))
-                                    altImageFile = Path(os.path.join(os.path.dirname(self.file.filename), os.path.basename(self.file.filename).replace(".mesh", "") + "_diffuse.dds"))
-
-                                    if img_file.is_file():
-                                        img_file.resolve()
-                                        image = bpy.data.images.load(str(img_file))
-                                        tex.image = image
-                                    elif altImageFile.is_file():
-                                        altImageFile.resolve()
-                                        image = bpy.data.images.load(str(altImageFile))
-                                        tex.image = image
-                                    else:
-                                        utils.Log.info("No Texture File was found.")
-
-                                    slot = mat.texture_slots.add()
-                                    slot.texture = tex
-                                    slot.bump_method = 'BUMP_ORIGINAL'
-                                    slot.mapping = 'FLAT'
-                                    slot.mapping_x = 'X'
-                                    slot.mapping_y = 'Y'
-                                    slot.texture_coords = 'UV'
-                                    slot.use = True
-                                    slot.uv_layer = uv_layer.name
-
-                                bm.to_mesh(sub_mesh)
-                            else:
-                                utils.Log.info("ERROR ::: Invalid Object in Shape: " + str(meshData))
-
-                        scn.objects.active = meshObj
-                        bpy.ops.object.join()
+        return obj
 
-                        if collisionShape:
-                            meshObj.draw_type = "WIRE"
+    @profiler.profiled("blender armature build")
+    def create_armature(self, name, skeleton):
+        """Creates the Armature Object for the Skeleton, returns the Object and the Bone Names by Joint Index"""
+        boneNames = [""] * len(skeleton.joints)
+
+        amt = bpy.data.armatures.new(name)
+        amt.draw_type = 'STICK'
+        obj = self.create_object(name, amt)
+
+        for joint in skeleton.joints:
+            boneNames[joint.index] = joint.name
+
+        #Edit Bones only exist in Edit Mode, the Override keeps the Mode Switch independent of the User Context
+        override = bpy.context.copy()
+        override['active_object'] = obj
+        override['object'] = obj
+        override['edit_object'] = obj
+        override['selected_objects'] = [obj]
+        override['selected_editable_objects'] = [obj]
+
+        bpy.ops.object.mode_set(override, mode='EDIT')
 
-                        if skeletonPresent:
-                            bpy.ops.object.modifier_add(type='ARMATURE')
-                            bpy.context.object.modifiers["Armature"].object = obj
+        #Head of the Bone is the PdxJoint, Tail only goes to next Bone
+        heads, tails = self.get_joint_positions(skeleton.joints)
 
+        #Bones by Joint Index, used to resolve the Parents without Name Lookups
+        bones = [None] * len(skeleton.joints)
+
+        for i, joint in enumerate(skeleton.joints):
+            bone = amt.edit_bones.new(joint.name)
+            bone.head = heads[i]
+            bone.tail = tails[i]
+
+            bones[joint.index] = bone
+
+        for joint in skeleton.joints:
+            if joint.parent >= 0:
+                bones[joint.index].parent = bones[joint.parent]
+
+        bpy.ops.object.mode_set(override, mode='OBJECT')
+
+        return obj, boneNames
+
+    def get_joint_positions(self, joints):
+        """Returns the Head and Tail Positions of all Joints, computed in one batched Transform"""
+        transforms = np.array([joint.transform if len(joint.transform) == 12 else IDENTITY_TRANSFORM for joint in joints], dtype=np.float64).reshape(-1, 12)
+
+        #Rows of the 3x3 Part are stored column wise, the Positions are negated
+        rotations = transforms[:, 0:9].reshape(-1, 3, 3)
+        positions = -transforms[:, 9:12]
+
+        mat_rot = np.array(self.mat_rot.to_3x3(), dtype=np.float64)
+
+        #Position with applied Rotation and Scaling
+        heads = np.einsum('jki,ji->jk', rotations, positions).dot(mat_rot)
+
+        #Default Tail is 0.1 along the rotated Y-Axis of the Joint
+        tails = heads + (rotations[:, :, 1] * 0.1).dot(mat_rot)
+
+        return heads.tolist(), tails.tolist()
+
+    @profiler.profiled("blender mesh build")
+    def create_mesh(self, name, shape):
+        """Builds one Mesh from all PdxMeshes of the Shape, every PdxMesh gets its own Material Index"""
+        positions = []
+        faces = []
+        material_indices = []
+        use_smooth = []
+
+        materials = []
+        uv_layer_name = name + "_uv"
+        collisionShape = False
+
+        meshes = []
+        for meshData in shape.meshes:
+            if isinstance(meshData, pdx_data.PdxMesh):
+                meshes.append(meshData)
+            else:
+                utils.Log.info("ERROR ::: Invalid Object in Shape: " + str(meshData))
+
+        #One Layer per UV Set (u0 - u3) used by any PdxMesh, Loops of Meshes without the Set get (0, 0)
+        uv_set_count = max([1 + len(meshData.extra_uv_coords) for meshData in meshes] + [1])
+        loop_uvs = [[] for i in range(uv_set_count)]
+
+        for meshData in meshes:
+            offset = len(positions)
+            positions.extend(meshData.verts)
+            faces.extend((a + offset, b + offset, c + offset) for a, b, c in meshData.faces)
+
+            isCollision = meshData.material.shader == "Collision"
+
+            if isCollision:
+                collisionShape = True
+
+                material_index = 0
+                smooth = False
+            else:
+                image_path = self.find_texture(meshData.material)
+                mat = get_material(name, meshData.material.shader, image_path)
+
+                if mat.name not in materials:
+                    materials.append(mat.name)
+
+                material_index = materials.index(mat.name)
+                smooth = True
+
+            with profiler.stage("uv assignment"):
+                uv_sets = [meshData.uv_coords] + meshData.extra_uv_coords
+                loop_indices = np.array(meshData.faces, dtype=np.int32).reshape(-1)
+
+                for i in range(uv_set_count):
+                    if i < len(uv_sets) and len(uv_sets[i]) > 0 and not isCollision:
+                        #V is flipped between Clausewitz and Blender
+                        uvs = np.array(uv_sets[i], dtype=np.float32).reshape(-1, 2)[loop_indices]
+                        uvs[:, 1] = 1 - uvs[:, 1]
                     else:
-                        utils.Log.info("ERROR ::: Invalid Object in World: " + str(shape))
-            elif isinstance(node, pdx_data.PdxLocators):
-                parent_locator = bpy.data.objects.new('Locators', None)
-                bpy.context.scene.objects.link(parent_locator)
-
-                for locator in node.locators:
-                    obj = bpy.data.objects.new(locator.name, None)
-                    bpy.context.scene.objects.link(obj)
-                    obj.parent = parent_locator
-                    obj.empty_draw_size = 2
-                    obj.empty_draw_type = 'SINGLE_ARROW'
-                    obj.location = mathutils.Vector((locator.pos[0], locator.pos[1], locator.pos[2])) * self.mat_rot
-                    obj.rotation_mode = 'QUATERNION'
-                    obj.rotation_quaternion = locator.quaternion
-                    obj.rotation_mode = 'XYZ'
-
-                    #TODO Locator Parenting
-                    #parentBoneName = locator.parent
-
-                    #constraint = obj.constraints.new('CHILD_OF')
-                    #constraint.target = parentBoneName
+                        uvs = np.zeros((len(loop_indices), 2), dtype=np.float32)
+
+                    loop_uvs[i].append(uvs.reshape(-1))
+
+            material_indices.extend([material_index] * len(meshData.faces))
+            use_smooth.extend([smooth] * len(meshData.faces))
+
+        mesh = bpy.data.meshes.new(name)
+
+        mesh.vertices.add(len(positions))
+        mesh.vertices.foreach_set("co", [c for position in positions for c in position])
+
+        mesh.loops.add(len(faces) * 3)
+        mesh.loops.foreach_set("vertex_index", [index for face in faces for index in face])
+
+        mesh.polygons.add(len(faces))
+        mesh.polygons.foreach_set("loop_start", list(range(0, len(faces) * 3, 3)))
+        mesh.polygons.foreach_set("loop_total", [3] * len(faces))
+        mesh.polygons.foreach_set("material_index", material_indices)
+        mesh.polygons.foreach_set("use_smooth", use_smooth)
+
+        for material_name in materials:
+            mesh.materials.append(bpy.data.materials[material_name])
+
+        if len(materials) > 0:
+            with profiler.stage("uv assignment"):
+                for i in range(uv_set_count):
+                    #The other Sets get their Number appended to the Name of u0
+                    layer_name = uv_layer_name if i == 0 else uv_layer_name + str(i)
+
+                    mesh.uv_textures.new(layer_name)
+                    mesh.uv_layers[layer_name].data.foreach_set("uv", np.concatenate(loop_uvs[i]))
+
+                #u0 is the Layer the shared Materials map their Texture with
+                mesh.uv_textures.active_index = 0
+                mesh.uv_textures[0].active_render = True
+
+        #Same as vert.co * self.mat_rot for every Vertex
+        mesh.transform(self.mat_rot.transposed())
+        mesh.update(calc_edges=True)
+
+        return mesh, collisionShape
+
+    @profiler.profiled("skinning")
+    def create_vertex_groups(self, meshObj, shape, boneNames):
+        """Creates one Vertex Group per Bone and assigns the Skinning Data of all PdxMeshes"""
+        for boneName in boneNames:
+            meshObj.vertex_groups.new(boneName)
+
+        offset = 0
+
+        for meshData in shape.meshes:
+            if not isinstance(meshData, pdx_data.PdxMesh):
+                continue
+
+            if meshData.skin is not None:
+                utils.Log.info("BPV: " + str(meshData.skin.bonesPerVertice))
+                bpv = meshData.skin.bonesPerVertice
+                bpv = 4
+
+                for i in range(len(meshData.skin.indices) // bpv):
+                    for j in range(bpv):
+                        indice = meshData.skin.indices[i * bpv + j]
+                        if indice >= 0:
+                            bName = boneNames[indice]
+                            weight = meshData.skin.weight[i * bpv + j]
+                            meshObj.vertex_groups[bName].add([offset + i], weight, 'REPLACE')
             else:
-                utils.Log.info("ERROR ::: Invalid node found: " + str(node))
+                utils.Log.warning("No Skinning Data")
+
+            offset += len(meshData.verts)
+
+    def get_instance_key(self, shape):
+        """Returns a Key identifying the Geometry and Materials of the Shape or None if it can't be instanced"""
+        #Skinned Shapes are bound to their own Armature
+        if shape.skeleton is not None or len(shape.meshes) == 0:
+            return None
+
+        key = []
+
+        for meshData in shape.meshes:
+            if not isinstance(meshData, pdx_data.PdxMesh) or meshData.geometryHash is None or meshData.material is None:
+                return None
+
+            key.append((meshData.geometryHash, meshData.material.shader, meshData.material.diff))
+
+        return tuple(key)
+
+    def find_texture(self, material):
+        """Returns the Path of the Diffuse Texture for the Material or None if no File was found"""
+        if self.asset_index is not None and self.asset_index.get_relative_path(self.file.filename) is not None:
+            name = os.path.basename(self.file.filename).replace(".mesh", "") + "_diffuse.dds"
+
+            return self.asset_index.get_texture_path(self.file.filename, material.diff) or self.asset_index.get_texture_path(self.file.filename, name)
+
+        directory = os.path.dirname(self.file.filename)
+
+        img_file = Path(os.path.join(directory, material.diff))
+        altImageFile = Path(os.path.join(directory, os.path.basename(self.file.filename).replace(".mesh", "") + "_diffuse.dds"))
+
+        if img_file.is_file():
+            return str(img_file)
+        elif altImageFile.is_file():
+            return str(altImageFile)
+
+        return None
 
     def getRecursiveBoneMatrix(self, bone):
         if bone.parent is None:
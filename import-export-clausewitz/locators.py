@@ -0,0 +1,96 @@
+import numpy as np
+
+from . import pdx_data
+
+IDENTITY_TRANSFORM = (1, 0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 0)
+
+def get_joint_index(shapes):
+    """Returns the Joints of the Skeletons of the Shapes by Name, the first Joint wins if Names repeat"""
+    result = {}
+
+    for shape in shapes:
+        if isinstance(shape, pdx_data.PdxShape) and shape.skeleton is not None:
+            for joint in shape.skeleton.joints:
+                result.setdefault(joint.name, joint)
+
+    return result
+
+def get_joint_transforms(joints):
+    """Returns the (n, 3, 3) Rotations from Joint to Model Space and the (n, 3) Translations of the Joint Transforms.
+    A Joint Transform maps Model to Joint Space: joint = rotation.T * (model) + translation"""
+    transforms = np.array([joint.transform if len(joint.transform) == 12 else IDENTITY_TRANSFORM for joint in joints], dtype=np.float64).reshape(-1, 12)
+
+    #Rows of the 3x3 Part are stored column wise, same as in importer.get_joint_positions
+    return transforms[:, 0:9].reshape(-1, 3, 3), transforms[:, 9:12]
+
+def matrix_to_quaternion(matrices):
+    """Returns the (n, 4) Quaternions (w, x, y, z) of the (n, 3, 3) Rotation Matrices"""
+    m = matrices
+
+    w = np.sqrt(np.maximum(0, 1 + m[:, 0, 0] + m[:, 1, 1] + m[:, 2, 2])) / 2
+    x = np.sqrt(np.maximum(0, 1 + m[:, 0, 0] - m[:, 1, 1] - m[:, 2, 2])) / 2
+    y = np.sqrt(np.maximum(0, 1 - m[:, 0, 0] + m[:, 1, 1] - m[:, 2, 2])) / 2
+    z = np.sqrt(np.maximum(0, 1 - m[:, 0, 0] - m[:, 1, 1] + m[:, 2, 2])) / 2
+
+    x = np.copysign(x, m[:, 2, 1] - m[:, 1, 2])
+    y = np.copysign(y, m[:, 0, 2] - m[:, 2, 0])
+    z = np.copysign(z, m[:, 1, 0] - m[:, 0, 1])
+
+    return np.stack((w, x, y, z), axis=1)
+
+def multiply_quaternions(a, b):
+    """Returns the (n, 4) Products a * b of the (w, x, y, z) Quaternions"""
+    aw, ax, ay, az = a[:, 0], a[:, 1], a[:, 2], a[:, 3]
+    bw, bx, by, bz = b[:, 0], b[:, 1], b[:, 2], b[:, 3]
+
+    return np.stack((
+        aw * bw - ax * bx - ay * by - az * bz,
+        aw * bx + ax * bw + ay * bz - az * by,
+        aw * by - ax * bz + ay * bw + az * bx,
+        aw * bz + ax * by - ay * bx + az * bw,
+    ), axis=1)
+
+def get_parent_joints(locators, joint_index):
+    """Returns the Indices of the Locators with a Parent in joint_index and their Parent Joints"""
+    indices = [i for i, locator in enumerate(locators) if locator.parent in joint_index]
+
+    return indices, [joint_index[locators[i].parent] for i in indices]
+
+def to_model_space(locators, joint_index):
+    """Returns the (n, 3) Positions and (n, 4) Quaternions of all Locators in Model Space.
+    Locators with a Parent Joint are stored relative to it, the others already are in Model Space."""
+    positions = np.array([locator.pos for locator in locators], dtype=np.float64).reshape(-1, 3)
+    quaternions = np.array([locator.quaternion for locator in locators], dtype=np.float64).reshape(-1, 4)
+
+    indices, joints = get_parent_joints(locators, joint_index)
+
+    if len(indices) > 0:
+        rotations, translations = get_joint_transforms(joints)
+
+        positions[indices] = np.einsum('jki,ji->jk', rotations, positions[indices] - translations)
+        quaternions[indices] = multiply_quaternions(matrix_to_quaternion(rotations), quaternions[indices])
+
+    return positions, quaternions
+
+def to_joint_space(locators, joint_index):
+    """Moves the Model Space Positions and Quaternions of the Locators with a Parent in joint_index into the Space of that Joint.
+    Returns the Locators whose Parent isn't in joint_index."""
+    indices, joints = get_parent_joints(locators, joint_index)
+
+    if len(indices) > 0:
+        positions = np.array([locators[i].pos for i in indices], dtype=np.float64).reshape(-1, 3)
+        quaternions = np.array([locators[i].quaternion for i in indices], dtype=np.float64).reshape(-1, 4)
+
+        rotations, translations = get_joint_transforms(joints)
+        inverse = rotations.transpose(0, 2, 1)
+
+        positions = np.einsum('jki,ji->jk', inverse, positions) + translations
+        quaternions = multiply_quaternions(matrix_to_quaternion(inverse), quaternions)
+
+        for i, position, quaternion in zip(indices, positions.tolist(), quaternions.tolist()):
+            locators[i].pos = position
+            locators[i].quaternion = quaternion
+
+    resolved = set(indices)
+
+    return [locator for i, locator in enumerate(locators) if locator.parent != "" and i not in resolved]
@@ -0,0 +1,688 @@
+import collections
+import concurrent.futures
+import copy
+import hashlib
+import io
+import math
+import os
+import re
+import struct
+import threading
+
+import numpy as np
+
+from . import (collision, gfx, mesh_statistics, pdx_data, profiler, quantization, simplify, utils)
+
+#Bones per Vertex written to the Skin, for now constant
+BONES_PER_VERTEX = 4
+
+#Part of every Fingerprint, has to be increased when the exported Data of a Shape changes
+FINGERPRINT_VERSION = 1
+
+class MeshSnapshot():
+    """Copy of the Data of one Blender Mesh Object needed for the Export, taken on the Main Thread with foreach_get.
+    Contains no Blender References, so the Export can continue in a Worker Thread."""
+    def __init__(self, name):
+        self.name = name
+
+        #Object Matrix (incl. Mirror and Rotation) and its Inverse as 4x4 Arrays, Vectors get multiplied from the Left
+        self.transform = np.identity(4)
+        self.transform_inverse = np.identity(4)
+        #Matrix applied to the Mesh Data first (like transform_apply), Column Vectors, incl. Translation
+        self.applied_transform = np.identity(4)
+
+        self.vertex_positions = np.zeros((0, 3), dtype=np.float32)
+        self.vertex_normals = np.zeros((0, 3), dtype=np.float32)
+
+        self.polygon_loop_starts = np.zeros(0, dtype=np.int32)
+        self.polygon_loop_totals = np.zeros(0, dtype=np.int32)
+        self.polygon_material_indices = np.zeros(0, dtype=np.int32)
+        self.polygon_smooth = np.zeros(0, dtype=np.bool_)
+        self.polygon_normals = np.zeros((0, 3), dtype=np.float32)
+
+        self.loop_vertex_indices = np.zeros(0, dtype=np.int32)
+        #One (Loops, 2) Array per UV Layer, the active Layer first
+        self.loop_uvs = []
+
+        #Material Index -> (Material Name, Diffuse Texture File)
+        self.materials = {}
+
+        #(Vertices, BONES_PER_VERTEX) Arrays, None without Skinning Data
+        self.skin_indices = None
+        self.skin_weights = None
+
+class ExportSettings():
+    def __init__(self, rounding_position=3, export_tangent=False, vertex_budget=0, quantization_settings=None, lod_ratios=(), collision_mode="NONE", collision_faces=64):
+        self.rounding_position = rounding_position
+        self.export_tangent = export_tangent
+        #Maximum Vertices per Mesh, 0 disables the Check
+        self.vertex_budget = vertex_budget
+        #Applied before the Rounding, see quantization.QuantizationSettings
+        self.quantization = quantization_settings if quantization_settings is not None else quantization.QuantizationSettings()
+        #Face Ratio of every LOD, LOD n is written to <File>_lod<n>.mesh
+        self.lod_ratios = tuple(lod_ratios)
+        #See collision.MODES, the Collision Shape of every Shape has at most collision_faces Faces
+        self.collision_mode = collision_mode
+        self.collision_faces = collision_faces
+
+    def get_unquantized(self):
+        """Returns the same Settings without Quantization"""
+        return ExportSettings(self.rounding_position, self.export_tangent, self.vertex_budget, None, self.lod_ratios, self.collision_mode, self.collision_faces)
+
+class ExportJob():
+    """Everything needed to write the Files of one Export, the Meshes of the Shapes are built from the Snapshots"""
+    def __init__(self, filename, settings, export_gfx=True):
+        self.filename = filename
+        self.settings = settings
+        self.export_gfx = export_gfx
+
+        #Nodes of the .mesh File
+        self.nodes = []
+        #(PdxShape, MeshSnapshot) Pairs, the Meshes built from the Snapshot are appended to the Shape
+        self.shapes = []
+
+        #ShapeCache reused for unchanged Shapes, None rebuilds every Shape
+        self.cache = None
+
+        #Filled by run_export_job: Statistics of every written Mesh and Warnings about exceeded Budgets
+        self.statistics = []
+        self.warnings = []
+        #Vertex Counts and Sizes of every Mesh with and without Quantization, if enabled
+        self.quantization = []
+        #(Filename, Nodes) of every LOD File, filled by run_export_job
+        self.lod_files = []
+
+class CachedShape():
+    """Serialized PdxShape, written in place of the Shape by the Node containing it"""
+    __slots__ = ("name", "data", "gfx_data", "statistics", "quantization", "lods", "collision")
+
+    def __init__(self, name, data, gfx_data, statistics=(), quantization=(), lods=(), collision=None):
+        self.name = name
+        self.data = data
+        self.gfx_data = gfx_data
+        self.statistics = statistics
+        self.quantization = quantization
+        #CachedShape of every LOD
+        self.lods = lods
+        #CachedShape of the generated Collision Shape, None if there is none
+        self.collision = collision
+
+    @staticmethod
+    def from_shape(shape, statistics=(), quantization=(), lods=(), collision=None):
+        with profiler.stage("get_binary_data"):
+            return CachedShape(shape.name, bytes(shape.get_binary_data()), shape.get_gfx_data(), statistics, quantization, lods, collision)
+
+    def get_binary_data(self):
+        return self.data
+
+    def get_gfx_data(self):
+        return self.gfx_data
+
+class ShapeCache():
+    """In-Memory LRU Cache of serialized Shapes keyed by their Fingerprint, shared by all Exports of a Session"""
+    def __init__(self, max_size=256 * 1024 * 1024):
+        self.max_size = max_size
+        self.size = 0
+        self.entries = collections.OrderedDict()
+        self.__lock__ = threading.Lock()
+
+    def get(self, fingerprint):
+        with self.__lock__:
+            entry = self.entries.get(fingerprint)
+
+            if entry is not None:
+                self.entries.move_to_end(fingerprint)
+
+            return entry
+
+    def store(self, fingerprint, entry):
+        with self.__lock__:
+            previous = self.entries.pop(fingerprint, None)
+            if previous is not None:
+                self.size -= len(previous.data)
+
+            self.entries[fingerprint] = entry
+            self.size += len(entry.data)
+
+            #Least recently used Entries first
+            while self.size > self.max_size and len(self.entries) > 1:
+                self.size -= len(self.entries.popitem(last=False)[1].data)
+
+    def clear(self):
+        with self.__lock__:
+            self.entries.clear()
+            self.size = 0
+
+#Cache of the Exporter, kept while Blender is running
+SHAPE_CACHE = ShapeCache()
+
+def round_values(values, rounding_position):
+    """Rounds like round() on the stored float32 Values, -0.0 becomes 0.0 so equal Keys compare equal bytewise"""
+    return np.round(values.astype(np.float32).astype(np.float64), rounding_position).astype(np.float32) + np.float32(0.0)
+
+def transform_rows(vectors, matrix):
+    """Same as vector * matrix in mathutils for every Row: Row Vectors, the Translation of the Matrix is not applied"""
+    return np.dot(vectors.astype(np.float64), matrix[:3, :3])
+
+def apply_transform(positions, vertex_normals, polygon_normals, matrix):
+    """Transforms the Mesh Data like transform_apply, Normals are recalculated the way Blender would after it"""
+    rotation = matrix[:3, :3]
+    positions = (np.dot(positions.astype(np.float64), rotation.T) + matrix[:3, 3]).astype(np.float32)
+
+    determinant = np.linalg.det(rotation)
+
+    if determinant != 0:
+        #Cofactor Matrix, flips the Normals with negative Scale like the recalculated Face Normals
+        cofactor = determinant * np.linalg.inv(rotation).T
+
+        def transform_normals(normals):
+            normals = np.dot(normals.astype(np.float64), cofactor.T)
+            length = np.sqrt((normals * normals).sum(axis=1))
+            return (normals / np.where(length > 0, length, 1.0)[:, np.newaxis]).astype(np.float32)
+
+        vertex_normals = transform_normals(vertex_normals)
+        polygon_normals = transform_normals(polygon_normals)
+
+    return positions, vertex_normals, polygon_normals
+
+def get_tangents(positions, uvs, rounding_position):
+    """Returns one rounded Tangent per Face, positions and uvs are (Faces, 3, 2/3) Arrays of the Corners"""
+    p1 = positions[:, 1] - positions[:, 0]
+    p2 = positions[:, 2] - positions[:, 0]
+
+    st1 = uvs[:, 1] - uvs[:, 0]
+    st2 = uvs[:, 2] - uvs[:, 0]
+
+    rx = st1[:, 0] * st2[:, 1] - st1[:, 1] * st2[:, 0]
+    degenerate = rx == 0
+
+    #Point UV's get a default Tangent
+    r = 1.0 / np.where(degenerate, 1.0, rx)
+    tangents = (p1 * st2[:, 1:2] - p2 * st1[:, 1:2]) * r[:, np.newaxis]
+
+    length = np.sqrt((tangents * tangents).sum(axis=1))
+    tangents = tangents / np.where(length > 0, length, 1.0)[:, np.newaxis]
+
+    result = np.ones((len(tangents), 4), dtype=np.float64)
+    result[:, 0:3] = tangents
+    result[degenerate] = (0, 1, 0, 1)
+
+    return round_values(result, rounding_position)
+
+def to_tuples(values):
+    return [tuple(row) for row in values.tolist()]
+
+@profiler.profiled("welding")
+def weld(keys):
+    """Returns the Index of the unique Key for every Row of keys and the Row of the first Occurrence of each unique Key.
+    Unique Keys are numbered in the Order of their first Occurrence, like a Dictionary filled Row by Row."""
+    keys = np.ascontiguousarray(keys)
+    rows = keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).reshape(-1)
+
+    unique, first, inverse = np.unique(rows, return_index=True, return_inverse=True)
+
+    order = np.argsort(first, kind="mergesort")
+    new_index = np.empty(len(order), dtype=np.int64)
+    new_index[order] = np.arange(len(order))
+
+    return new_index[inverse], first[order]
+
+def build_mesh(snapshot, settings, material_index, faces, positions, vertex_normals, polygon_normals, skin_weights):
+    """Builds the PdxMesh of one Material from the triangular Faces (Polygon Indices)"""
+    loops = snapshot.polygon_loop_starts[faces][:, np.newaxis] + np.arange(3)
+    corner_vertices = snapshot.loop_vertex_indices[loops]
+
+    corner_positions = positions[corner_vertices]
+
+    #Normals depending on Face Smoothness
+    corner_normals = np.where(snapshot.polygon_smooth[faces][:, np.newaxis, np.newaxis], vertex_normals[corner_vertices], polygon_normals[faces][:, np.newaxis, :])
+
+    corner_uvs = []
+    for uvs in snapshot.loop_uvs or [None]:
+        if uvs is None:
+            uvs = np.zeros((len(snapshot.loop_vertex_indices), 2), dtype=np.float32)
+
+        uvs = uvs[loops].astype(np.float32)
+        uvs[:, :, 1] = 1 - uvs[:, :, 1]
+
+        if settings.quantization.uv_texture_size > 0:
+            uvs = quantization.quantize_uvs(uvs, settings.quantization.uv_texture_size)
+
+        corner_uvs.append(round_values(uvs, settings.rounding_position))
+
+    if settings.export_tangent:
+        face_tangents = get_tangents(corner_positions.astype(np.float64), corner_uvs[0].astype(np.float64), settings.rounding_position)
+    else:
+        face_tangents = round_values(np.tile(np.array((0, 1, 0, 1), dtype=np.float64), (len(faces), 1)), settings.rounding_position)
+
+    corner_tangents = np.repeat(face_tangents[:, np.newaxis, :], 3, axis=1)
+
+    #One Row per Corner: Position, Normal, all UVs, Tangent
+    keys = np.concatenate([corner_positions, corner_normals] + corner_uvs + [corner_tangents], axis=2)
+    keys = keys.reshape(len(faces) * 3, keys.shape[2])
+    corner_indices, unique_rows = weld(keys)
+
+    vertices = keys[unique_rows]
+    corner_indices = corner_indices.reshape(-1, 3)
+
+    result = pdx_data.PdxMesh()
+
+    result.verts = to_tuples(vertices[:, 0:3])
+    result.normals = to_tuples(vertices[:, 3:6])
+    result.uv_coords = to_tuples(vertices[:, 6:8])
+    result.extra_uv_coords = [to_tuples(vertices[:, 8 + 2 * i:10 + 2 * i]) for i in range(len(corner_uvs) - 1)]
+    result.tangents = to_tuples(vertices[:, -4:])
+
+    #Winding Order is reversed
+    result.faces = to_tuples(corner_indices[:, ::-1])
+
+    utils.Log.info("Vertices: " + str(len(result.verts)))
+    utils.Log.info("Faces: " + str(len(result.faces)))
+
+    #Calculating Bounding Box
+    if len(vertices) > 0:
+        result.meshBounds = pdx_data.PdxBounds(vertices[:, 0:3].min(axis=0).tolist(), vertices[:, 0:3].max(axis=0).tolist())
+    else:
+        result.meshBounds = pdx_data.PdxBounds([math.inf] * 3, [-math.inf] * 3)
+
+    if snapshot.skin_indices is not None:
+        #Skinning Data of the Blender Vertex every exported Vertex was created from
+        source_vertices = corner_vertices.reshape(-1)[unique_rows]
+
+        with profiler.stage("skinning"):
+            result.skin = pdx_data.PdxSkin()
+            result.skin.bonesPerVertice = BONES_PER_VERTEX
+            result.skin.indices = snapshot.skin_indices[source_vertices].reshape(-1).tolist()
+            result.skin.weight = skin_weights[source_vertices].reshape(-1).tolist()
+
+    material_name, diff_file = snapshot.materials[material_index]
+
+    #Setting Materials (Not very importing, because it's overridenn in .gfx file)
+    result.material = pdx_data.PdxMaterial()
+    result.material.shader = "PdxMeshShip"
+    result.material.diff = diff_file
+    result.material.normal = "nonormal.dds"
+    result.material.spec = "nospec.dds"
+
+    return result
+
+@profiler.profiled("splitMeshes")
+def get_vertex_data(snapshot, settings):
+    """Returns the transformed, quantized and rounded Positions, Vertex Normals, Polygon Normals and the Skin Weights of the Snapshot"""
+    vertex_positions = snapshot.vertex_positions
+    vertex_normals = snapshot.vertex_normals
+    polygon_normals = snapshot.polygon_normals
+
+    if not np.array_equal(snapshot.applied_transform, np.identity(4)):
+        vertex_positions, vertex_normals, polygon_normals = apply_transform(vertex_positions, vertex_normals, polygon_normals, snapshot.applied_transform)
+
+    positions = transform_rows(vertex_positions, snapshot.transform)
+
+    if settings.quantization.position_bits > 0:
+        positions = quantization.quantize_positions(positions, settings.quantization.position_bits)
+
+    positions = round_values(positions, settings.rounding_position)
+
+    def transform_normals(normals):
+        normals = transform_rows(normals, snapshot.transform_inverse)
+        #Mirrored on X and negated (Temporary Fix)
+        normals *= (1, -1, -1)
+        length = np.sqrt((normals * normals).sum(axis=1))
+        normals = normals / np.where(length > 0, length, 1.0)[:, np.newaxis]
+
+        if settings.quantization.normal_bits > 0:
+            normals = quantization.quantize_normals(normals, settings.quantization.normal_bits)
+
+        return round_values(normals, settings.rounding_position)
+
+    skin_weights = snapshot.skin_weights
+
+    if skin_weights is not None and settings.quantization.weight_bits > 0:
+        skin_weights = quantization.quantize_weights(skin_weights, settings.quantization.weight_bits)
+
+    return positions, transform_normals(vertex_normals), transform_normals(polygon_normals), skin_weights
+
+def split_mesh(snapshot, settings, progress=None, report=None):
+    """Exports the Snapshot into one PdxMesh per Material, safe to be called from a Worker Thread.
+    With Quantization enabled and a report List, the Meshes are also built without Quantization and the
+    Vertex Counts and Sizes of both are appended to report."""
+    if progress is None:
+        progress = utils.Progress()
+
+    utils.Log.info("Exporting \"" + snapshot.name + "\"!")
+
+    result_meshes = []
+
+    #Vertex and Normal Transforms are the same for all Materials
+    vertex_data = get_vertex_data(snapshot, settings)
+
+    if report is not None and settings.quantization.is_enabled():
+        reference_settings = settings.get_unquantized()
+        reference_data = get_vertex_data(snapshot, reference_settings)
+    else:
+        reference_settings = None
+
+    triangles = snapshot.polygon_loop_totals == 3
+
+    if not triangles.all():
+        #TODO Auto-Triangulation (Recursive Algorithm or Just apply the Blender one)
+        utils.Log.critical(str(np.count_nonzero(~triangles)) + " Faces of \"" + snapshot.name + "\" are not Triangulated and get skipped!")
+
+    progress.begin_stage(snapshot.name, len(snapshot.polygon_loop_totals) * len(snapshot.materials))
+
+    #Handling all Materials Seperate for Export
+    for material_index in sorted(snapshot.materials):
+        utils.Log.info("Compiling Mesh for Material \"" + snapshot.materials[material_index][0] + "\"!")
+
+        faces = np.flatnonzero(triangles & (snapshot.polygon_material_indices == material_index))
+
+        result_meshes.append(build_mesh(snapshot, settings, material_index, faces, *vertex_data))
+
+        if reference_settings is not None:
+            with profiler.stage("quantization report"):
+                reference = build_mesh(snapshot, reference_settings, material_index, faces, *reference_data)
+
+                report.append({
+                    "name": snapshot.name,
+                    "material": snapshot.materials[material_index][0],
+                    "vertices_before": len(reference.verts),
+                    "vertices_after": len(result_meshes[-1].verts),
+                    "bytes_before": len(reference.get_binary_data()),
+                    "bytes_after": len(result_meshes[-1].get_binary_data()),
+                })
+
+        progress.advance(len(snapshot.polygon_loop_totals))
+
+    progress.end_stage()
+
+    return result_meshes
+
+@profiler.profiled("fingerprint")
+def get_fingerprint(shape, snapshots, settings):
+    """Returns a Hash of everything the serialized Shape depends on: Mesh Data, Materials, Transforms, Skeleton and Export Options"""
+    fingerprint = hashlib.sha1()
+    #The Vertex Budget only changes the Warnings, which are checked again for cached Shapes
+    fingerprint.update(struct.pack("<IIb4I", FINGERPRINT_VERSION, settings.rounding_position, settings.export_tangent, *settings.quantization.get_key()))
+    fingerprint.update(repr((settings.lod_ratios, settings.collision_mode, settings.collision_faces)).encode("UTF-8"))
+    fingerprint.update(shape.name.encode("UTF-8") + b"\x00")
+
+    if shape.skeleton is not None:
+        fingerprint.update(shape.skeleton.get_binary_data())
+
+    def update(values):
+        values = np.ascontiguousarray(values)
+        #Shape and Type are included, so different Layouts of the same Bytes differ
+        fingerprint.update((str(values.dtype) + str(values.shape)).encode("UTF-8"))
+        fingerprint.update(memoryview(values).cast("B"))
+
+    for snapshot in snapshots:
+        fingerprint.update(snapshot.name.encode("UTF-8") + b"\x00")
+        fingerprint.update(repr(sorted(snapshot.materials.items())).encode("UTF-8"))
+
+        for values in (snapshot.transform, snapshot.transform_inverse, snapshot.applied_transform,
+                snapshot.vertex_positions, snapshot.vertex_normals,
+                snapshot.polygon_loop_starts, snapshot.polygon_loop_totals, snapshot.polygon_material_indices, snapshot.polygon_smooth, snapshot.polygon_normals,
+                snapshot.loop_vertex_indices):
+            update(values)
+
+        fingerprint.update(struct.pack("<I", len(snapshot.loop_uvs)))
+        for uvs in snapshot.loop_uvs:
+            update(uvs)
+
+        if snapshot.skin_indices is not None:
+            update(snapshot.skin_indices)
+            update(snapshot.skin_weights)
+        else:
+            fingerprint.update(b"noskin")
+
+    return fingerprint.hexdigest()
+
+@profiler.profiled("lod")
+def get_lod_shape(shape, ratio, warnings=None):
+    """Returns a Shape with the simplified Meshes of shape.
+    Appends a Warning to warnings if open Borders or Seams keep the Shape well above the Ratio."""
+    result = pdx_data.PdxShape(shape.name)
+    result.skeleton = shape.skeleton
+    result.meshes = [simplify.simplify_mesh(mesh, ratio) for mesh in shape.meshes]
+
+    before = sum(len(mesh.faces) for mesh in shape.meshes)
+    after = sum(len(mesh.faces) for mesh in result.meshes)
+
+    if warnings is not None and after > before * ratio * 1.1 + 2:
+        warnings.append("LOD Ratio " + str(ratio) + " of \"" + shape.name + "\" not reached: " + str(before) + " -> " + str(after) + " Faces (open Borders, UV or Skin Seams can't be collapsed)")
+
+    return result
+
+def parse_lod_ratios(text):
+    """Returns the Ratios of a comma separated List like "0.5, 0.25", raises ValueError unless every Ratio is between 0 and 1"""
+    ratios = []
+
+    for value in text.split(","):
+        if value.strip() == "":
+            continue
+
+        try:
+            ratio = float(value)
+        except ValueError:
+            raise ValueError("Invalid LOD Ratio \"" + value.strip() + "\"")
+
+        if not 0 < ratio < 1:
+            raise ValueError("LOD Ratio " + value.strip() + " is not between 0 and 1")
+
+        ratios.append(ratio)
+
+    return tuple(ratios)
+
+def get_lod_filename(filename, level):
+    root, extension = os.path.splitext(filename)
+
+    return root + "_lod" + str(level) + extension
+
+def replace_objects(nodes, replacements, additions=None):
+    """Returns the Nodes with the Objects (Shapes) replaced by replacements[id(Object)], followed by additions[id(Object)] if present.
+    Nodes are copied if needed."""
+    result = []
+
+    for node in nodes:
+        if hasattr(node, "objects"):
+            node = copy.copy(node)
+            objects = []
+
+            for o in node.objects:
+                objects.append(replacements.get(id(o), o))
+
+                if additions is not None and id(o) in additions:
+                    objects.append(additions[id(o)])
+
+            node.objects = objects
+
+        result.append(node)
+
+    return result
+
+def write_mesh_file(filename, nodes):
+    with io.open(filename, 'w+b') as mesh_file:
+        mesh_file.write(b'@@b@')
+
+        for node in nodes:
+            with profiler.stage("get_binary_data"):
+                data = node.get_binary_data()
+
+            with profiler.stage("file write"):
+                mesh_file.write(data)
+
+def get_gfx_entry(filename, nodes):
+    """Returns the pdxmesh Entry of the .gfx File describing the .mesh File as (Key, Pairs), see gfx.merge"""
+    filename_no_path = filename.replace("\\", "/").split("/")[-1]
+
+    result = [
+        ("name", filename_no_path.replace(".", "_")),
+        ("file", filename_no_path),
+        ("scale", 1),
+    ]
+
+    for node in nodes:
+        result += node.get_gfx_data()
+
+    return ("pdxmesh", result)
+
+def write_gfx_file(filename, entries):
+    """Merges the pdxmesh Entries into the objectTypes of the .gfx File, Entries of other Meshes are kept"""
+    with profiler.stage("gfx write"):
+        replaced, added = gfx.merge_file(filename, entries)
+
+    utils.Log.info("\"" + filename + "\": " + str(replaced) + " pdxmesh Entries replaced, " + str(added) + " added")
+
+def get_job_gfx_entries(job):
+    """Returns the pdxmesh Entries of the File of the Job and its LOD Files"""
+    return [get_gfx_entry(job.filename, job.nodes)] + [get_gfx_entry(filename, nodes) for filename, nodes in job.lod_files]
+
+def get_batch_filename(pattern, name, filename):
+    """Returns the Filename of one File of a Batch Export.
+    pattern may contain {name} (Object or Group Name) and {file} (chosen Filename without Extension), other Fields raise ValueError."""
+    #Characters not allowed in Filenames on Windows
+    name = re.sub(r'[\\/:*?"<>|]', "_", name)
+    file = os.path.splitext(os.path.basename(filename))[0]
+
+    try:
+        result = pattern.format(name=name, file=file)
+    except (KeyError, IndexError, AttributeError, ValueError) as e:
+        raise ValueError("Invalid File Name Pattern \"" + pattern + "\" (" + type(e).__name__ + ": " + str(e) + "), only {name} and {file} can be used")
+
+    if not result.lower().endswith(".mesh"):
+        result += ".mesh"
+
+    return os.path.join(os.path.dirname(filename), result)
+
+def get_write_stage(job):
+    """Returns the Name of the Progress Stage writing the Files of the Job"""
+    return "write " + job.filename
+
+def run_export_job(job, progress=None, profile=None):
+    """Builds the Meshes of all Shapes and writes the .mesh (and .gfx) File. Needs no bpy, so it can run in a Worker Thread.
+    profile is activated for the running Thread, the Profile of the calling Thread isn't visible in a Worker Thread."""
+    if progress is None:
+        progress = utils.Progress()
+
+    with profiler.activate(profile):
+        __run_export_job__(job, progress)
+
+def __run_export_job__(job, progress):
+    #Snapshots per Shape, in the Order of job.shapes
+    shape_snapshots = collections.OrderedDict()
+    for shape, snapshot in job.shapes:
+        shape_snapshots.setdefault(id(shape), (shape, []))[1].append(snapshot)
+
+    replacements = {}
+    #Shape Replacements of every LOD
+    lod_replacements = [{} for ratio in job.settings.lod_ratios]
+    #Collision Shapes, written after their Shape
+    collisions = {}
+    reused = 0
+
+    for shape, snapshots in shape_snapshots.values():
+        fingerprint = None
+        cached = None
+        #Only for newly built LODs, reused Shapes were reported by the Export that built them
+        lod_warnings = []
+
+        if job.cache is not None:
+            fingerprint = get_fingerprint(shape, snapshots, job.settings)
+            cached = job.cache.get(fingerprint)
+
+        if cached is not None:
+            replacements[id(shape)] = cached
+            reused += 1
+
+            for level, lod in enumerate(cached.lods):
+                lod_replacements[level][id(shape)] = lod
+
+            if cached.collision is not None:
+                collisions[id(shape)] = cached.collision
+
+            statistics = cached.statistics
+            quantization_report = cached.quantization
+
+            for snapshot in snapshots:
+                progress.begin_stage(snapshot.name)
+                progress.end_stage()
+        else:
+            quantization_report = []
+
+            for snapshot in snapshots:
+                shape.meshes.extend(split_mesh(snapshot, job.settings, progress, quantization_report))
+
+            with profiler.stage("validation"):
+                statistics = mesh_statistics.get_shape_statistics(shape)
+
+            lods = [get_lod_shape(shape, ratio, lod_warnings) for ratio in job.settings.lod_ratios]
+            collision_shape = collision.get_collision_shape(shape, job.settings.collision_mode, job.settings.collision_faces)
+
+            if fingerprint is not None:
+                #Serialized once, the Node containing the Shape writes the cached Bytes
+                lods = [CachedShape.from_shape(lod) for lod in lods]
+                if collision_shape is not None:
+                    collision_shape = CachedShape.from_shape(collision_shape)
+                cached = CachedShape.from_shape(shape, statistics, quantization_report, lods, collision_shape)
+
+                job.cache.store(fingerprint, cached)
+                replacements[id(shape)] = cached
+
+            for level, lod in enumerate(lods):
+                lod_replacements[level][id(shape)] = lod
+
+            if collision_shape is not None:
+                collisions[id(shape)] = collision_shape
+
+        warnings = mesh_statistics.get_warnings(statistics, job.settings.vertex_budget)
+        warnings.extend(lod_warnings)
+
+        for warning in warnings:
+            utils.Log.warning(warning)
+
+        job.statistics.extend(statistics)
+        job.warnings.extend(warnings)
+        job.quantization.extend(quantization_report)
+
+    if job.cache is not None:
+        utils.Log.info("Reused " + str(reused) + " of " + str(len(shape_snapshots)) + " Shapes of \"" + job.filename + "\"")
+
+    lod_nodes = [replace_objects(job.nodes, lod_replacement) for lod_replacement in lod_replacements]
+    job.nodes = replace_objects(job.nodes, replacements, collisions)
+    job.lod_files = [(get_lod_filename(job.filename, level + 1), nodes) for level, nodes in enumerate(lod_nodes)]
+
+    progress.begin_stage(get_write_stage(job))
+
+    #Exporting .mesh Files
+    write_mesh_file(job.filename, job.nodes)
+
+    for filename, nodes in job.lod_files:
+        write_mesh_file(filename, nodes)
+
+    #Exporting .gfx File
+    if job.export_gfx:
+        write_gfx_file(job.filename.replace(".mesh", ".gfx"), get_job_gfx_entries(job))
+
+    progress.end_stage()
+
+def run_export_jobs(jobs, gfx_filename=None, progress=None, profiles=None, workers=None):
+    """Runs the Jobs of a Batch Export in parallel and writes one .gfx File for all of them, if gfx_filename is given.
+    profiles maps the Filename of a Job to its Profile, each Job is profiled separately."""
+    if progress is None:
+        progress = utils.Progress()
+    if profiles is None:
+        profiles = {}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_export_job, job, progress, profiles.get(job.filename)) for job in jobs]
+
+        try:
+            for future in futures:
+                future.result()
+        except BaseException:
+            #Stops the other Jobs at their next Progress Update
+            progress.cancel()
+            raise
+
+    if gfx_filename is not None:
+        write_gfx_file(gfx_filename, [entry for job in jobs for entry in get_job_gfx_entries(job)])
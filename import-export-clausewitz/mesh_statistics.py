@@ -0,0 +1,109 @@
+import argparse
+import io
+import json
+
+from . import (pdx_data, roundtrip, utils)
+
+EXTENSIONS = (".mesh",)
+
+#Vertices a Mesh can have with 16 Bit Indices
+DEFAULT_VERTEX_BUDGET = pdx_data.UINT16_MAX + 1
+
+def get_shape_statistics(shape):
+    """Returns the Statistics of every Mesh of the Shape.
+    Raises ValueError for Bone Indices outside of the Skeleton."""
+    statistics = []
+
+    joints = len(shape.skeleton.joints) if shape.skeleton is not None else 0
+
+    for index, mesh in enumerate(shape.meshes):
+        mesh_statistics = mesh.get_statistics()
+        mesh_statistics["shape"] = shape.name
+        mesh_statistics["mesh"] = index
+        statistics.append(mesh_statistics)
+
+        if mesh.skin is not None and mesh_statistics["max_bone_index"] >= joints:
+            raise ValueError("\"" + shape.name + "\" Mesh " + str(index) + " uses Bone " + str(mesh_statistics["max_bone_index"]) + ", but the Skeleton has " + str(joints) + " Joints")
+
+    return statistics
+
+def get_warnings(statistics, vertex_budget=DEFAULT_VERTEX_BUDGET):
+    """Returns Warnings for Meshes exceeding the Vertex Budget (0 disables it) or the 16 Bit Index Format"""
+    warnings = []
+
+    for mesh_statistics in statistics:
+        name = "\"" + mesh_statistics["shape"] + "\" Mesh " + str(mesh_statistics["mesh"])
+
+        if vertex_budget > 0 and mesh_statistics["vertices"] > vertex_budget:
+            warnings.append(name + " has " + str(mesh_statistics["vertices"]) + " Vertices, the Budget is " + str(vertex_budget))
+        elif mesh_statistics["index_bits"] > 16:
+            warnings.append(name + " needs 32 Bit Indices (" + str(mesh_statistics["vertices"]) + " Vertices)")
+
+    return warnings
+
+def get_file_statistics(filename, vertex_budget=DEFAULT_VERTEX_BUDGET):
+    """Returns a Result Dictionary with the Statistics and Warnings of every Mesh of the File"""
+    result = {
+        "file": filename,
+        "meshes": [],
+        "warnings": [],
+        "error": None,
+    }
+
+    try:
+        pdx_file = pdx_data.PdxFile(filename)
+        pdx_file.read()
+
+        for node in pdx_file.nodes:
+            if isinstance(node, pdx_data.PdxWorld):
+                for shape in node.objects:
+                    if isinstance(shape, pdx_data.PdxShape):
+                        result["meshes"].extend(get_shape_statistics(shape))
+
+        result["warnings"] = get_warnings(result["meshes"], vertex_budget)
+    except Exception as e:
+        result["error"] = type(e).__name__ + ": " + str(e)
+
+    return result
+
+def format_result(result):
+    lines = [result["file"]]
+
+    if result["error"] is not None:
+        lines.append("    ERROR " + result["error"])
+
+    for mesh in result["meshes"]:
+        line = "    {shape} [{mesh}]: {vertices} Vertices, {faces} Faces, max Index {max_index} ({index_bits} Bit)".format(**mesh)
+
+        if "bones_per_vertex" in mesh:
+            line += ", {bones_per_vertex} Bones per Vertex, {unique_bones} Bones used (max {max_bone_index})".format(**mesh)
+
+        lines.append(line)
+
+    for warning in result["warnings"]:
+        lines.append("    WARNING " + warning)
+
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="stats", description="Reports Vertex, Index and Bone Statistics of every Mesh and checks them against a Vertex Budget.")
+    parser.add_argument("paths", nargs="+", help="Files or Directories to check")
+    parser.add_argument("--vertex-budget", type=int, default=DEFAULT_VERTEX_BUDGET, help="Maximum Vertices per Mesh, 0 disables the Check")
+    parser.add_argument("--json", help="Writes all Results as JSON to the given File")
+    args = parser.parse_args(argv)
+
+    utils.Log.MIN_LOG_LEVEL = utils.LogLevel.CRITICAL
+
+    results = [get_file_statistics(filename, args.vertex_budget) for filename in roundtrip.find_files(args.paths, EXTENSIONS)]
+
+    for result in results:
+        print(format_result(result))
+
+    failed = sum(1 for result in results if result["error"] is not None or len(result["warnings"]) > 0)
+    print(str(len(results) - failed) + "/" + str(len(results)) + " Files fit the Budget")
+
+    if args.json:
+        with io.open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+    return 0 if failed == 0 else 1
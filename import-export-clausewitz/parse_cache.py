@@ -0,0 +1,277 @@
+import array
+import hashlib
+import io
+import itertools
+import mmap
+import os
+import pickle
+import struct
+import threading
+
+from . import (pdx_data, utils)
+
+#Increase whenever the Layout of an Entry or the pickled Pdx Classes change
+CACHE_VERSION = 6
+
+#Below the Temp Directory, see utils.get_private_directory
+DEFAULT_DIRECTORY_NAME = "clausewitz_parse_cache"
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+ENTRY_EXTENSION = ".pdxc"
+
+#Entry Layout:
+#   Header:     magic, version, segment count, pickle offset, pickle length
+#   Segments:   typecode, width, offset, length (one per flat Array or raw Byte Slice)
+#   Pickle:     Node Tree, geometry Lists replaced by persistent Segment References
+#   Data:       raw Array Data, every Segment aligned to 16 Bytes
+HEADER = struct.Struct("<4sIIQQ")
+SEGMENT = struct.Struct("<cB6xQQ")
+MAGIC = b"PDXC"
+ALIGNMENT = 16
+
+#Geometry Lists that are stored as flat raw Arrays instead of pickled Python Objects
+ARRAY_FIELDS = {
+    pdx_data.PdxMesh: ("verts", "faces", "normals", "tangents", "uv_coords"),
+    pdx_data.PdxSkin: ("indices", "weight"),
+    pdx_data.PdxAnimSamples: ("t", "q", "s"),
+}
+
+#Lists of geometry Lists, every contained List is stored as its own Segment
+NESTED_ARRAY_FIELDS = {
+    pdx_data.PdxMesh: ("extra_uv_coords",),
+}
+
+#The only Globals an Entry may reference, anything else is rejected instead of imported
+SAFE_GLOBALS = set((pdx_data.__name__, name) for name, value in vars(pdx_data).items() if name.startswith("Pdx") and isinstance(value, type))
+SAFE_GLOBALS.update(("builtins", name) for name in ("bytearray", "complex", "frozenset", "set"))
+
+def get_default_directory():
+    """Returns the Cache Directory of the current User, raises OSError if others could plant Entries (see utils.get_private_directory)"""
+    return utils.get_private_directory(DEFAULT_DIRECTORY_NAME)
+
+class _EntryPickler(pickle.Pickler):
+    """Pickler moving the geometry Lists of the Node Tree into flat Segments"""
+    def __init__(self, file):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.segments = []
+        self.externals = {}
+
+    def persistent_id(self, obj):
+        fields = ARRAY_FIELDS.get(type(obj))
+
+        if fields is not None:
+            #Register the Lists before the State of the Object gets pickled
+            for name in fields:
+                value = getattr(obj, name, None)
+                if type(value) is list and len(value) > 0:
+                    self.externals[id(value)] = value
+
+            for name in NESTED_ARRAY_FIELDS.get(type(obj), ()):
+                for value in getattr(obj, name, None) or ():
+                    if type(value) is list and len(value) > 0:
+                        self.externals[id(value)] = value
+        elif type(obj) is list and id(obj) in self.externals:
+            return ("array", self.add_segment(obj))
+        elif type(obj) is memoryview:
+            #Raw Bytes of unknown Properties and Objects, sliced from the parsed File
+            values = array.array("B")
+            values.frombytes(obj)
+            self.segments.append(("B", 0, values))
+            return ("raw", len(self.segments) - 1)
+
+        return None
+
+    def add_segment(self, values):
+        first = values[0]
+        width = 0
+
+        if isinstance(first, (tuple, list)):
+            width = len(first)
+            first = first[0]
+            values = itertools.chain.from_iterable(values)
+
+        typecode = "f" if isinstance(first, float) else "i"
+
+        self.segments.append((typecode, width, array.array(typecode, values)))
+
+        return len(self.segments) - 1
+
+class _EntryUnpickler(pickle.Unpickler):
+    """Unpickler resolving Segment References from the mapped Entry"""
+    def __init__(self, file, segments, data):
+        super().__init__(file)
+        self.segments = segments
+        self.data = data
+
+    def persistent_load(self, pid):
+        kind, index = pid
+
+        if kind not in ("array", "raw"):
+            raise pickle.UnpicklingError("Unknown persistent Reference: " + str(kind))
+
+        typecode, width, offset, length = self.segments[index]
+
+        if kind == "raw":
+            return memoryview(bytes(self.data[offset:offset + length]))
+
+        values = array.array(typecode)
+        with memoryview(self.data)[offset:offset + length] as view:
+            values.frombytes(view)
+
+        if width == 2:
+            return utils.TransposeCoordinateArray2D(values)
+        elif width == 3:
+            return utils.TransposeCoordinateArray3D(values)
+        elif width == 4:
+            return utils.TransposeCoordinateArray4D(values)
+
+        return values.tolist()
+
+    def find_class(self, module, name):
+        if (module, name) not in SAFE_GLOBALS:
+            raise pickle.UnpicklingError("Global \"" + module + "." + name + "\" is not allowed in a Cache Entry")
+
+        return super().find_class(module, name)
+
+class PdxParseCache():
+    """On-Disk LRU Cache of parsed Files, keyed by Path, Size, Modification Time and Content Hash"""
+    def __init__(self, directory=None, max_size=DEFAULT_MAX_SIZE):
+        """directory defaults to get_default_directory(), raises OSError if it can't be used"""
+        if directory is None:
+            directory = get_default_directory()
+        else:
+            os.makedirs(directory, exist_ok=True)
+
+        self.directory = directory
+        self.max_size = max_size
+        self.__lock__ = threading.Lock()
+
+    def get_key(self, filename, data):
+        """Returns the Key of a File given its raw Content"""
+        stat = os.stat(filename)
+
+        key = hashlib.sha1()
+        key.update(struct.pack("<IQQ", CACHE_VERSION, stat.st_size, stat.st_mtime_ns))
+        key.update(os.path.abspath(filename).encode("UTF-8"))
+        key.update(hashlib.sha1(data).digest())
+
+        return key.hexdigest()
+
+    def get_entry_path(self, key):
+        return os.path.join(self.directory, key + ENTRY_EXTENSION)
+
+    def load(self, key):
+        """Returns the cached Nodes for the Key or None if there is no valid Entry"""
+        path = self.get_entry_path(key)
+
+        try:
+            with io.open(path, "rb") as entry_file:
+                with mmap.mmap(entry_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    nodes = self.__read_entry__(data)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            utils.Log.warning("Discarding invalid Cache Entry \"" + path + "\": " + str(e))
+            self.__remove__(path)
+            return None
+
+        #Marks the Entry as recently used for the LRU Eviction
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        utils.Log.info("Loaded from Cache: " + key)
+
+        return nodes
+
+    def store(self, key, nodes):
+        """Writes the Nodes as a new Entry and evicts the least recently used Entries if needed"""
+        path = self.get_entry_path(key)
+        temp_path = path + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+
+        try:
+            with io.open(temp_path, "wb") as entry_file:
+                self.__write_entry__(entry_file, nodes)
+
+            os.replace(temp_path, path)
+        except Exception as e:
+            utils.Log.warning("Could not write Cache Entry \"" + path + "\": " + str(e))
+            self.__remove__(temp_path)
+            return
+
+        self.evict()
+
+    def evict(self):
+        """Removes the least recently used Entries until the Cache fits into max_size"""
+        with self.__lock__:
+            entries = []
+            total_size = 0
+
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(ENTRY_EXTENSION):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total_size += stat.st_size
+
+            entries.sort()
+
+            for mtime, size, path in entries:
+                if total_size <= self.max_size:
+                    break
+
+                self.__remove__(path)
+                total_size -= size
+
+    def clear(self):
+        """Removes all Entries"""
+        with self.__lock__:
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(ENTRY_EXTENSION):
+                    self.__remove__(entry.path)
+
+    def __write_entry__(self, entry_file, nodes):
+        pickle_data = io.BytesIO()
+        pickler = _EntryPickler(pickle_data)
+        pickler.dump(nodes)
+        pickle_data = pickle_data.getvalue()
+
+        pickle_offset = HEADER.size + SEGMENT.size * len(pickler.segments)
+        offset = self.__align__(pickle_offset + len(pickle_data))
+
+        segment_table = bytearray()
+        for typecode, width, values in pickler.segments:
+            length = len(values) * values.itemsize
+            segment_table.extend(SEGMENT.pack(typecode.encode("ASCII"), width, offset, length))
+            offset = self.__align__(offset + length)
+
+        entry_file.write(HEADER.pack(MAGIC, CACHE_VERSION, len(pickler.segments), pickle_offset, len(pickle_data)))
+        entry_file.write(segment_table)
+        entry_file.write(pickle_data)
+
+        for typecode, width, values in pickler.segments:
+            entry_file.write(b"\x00" * (self.__align__(entry_file.tell()) - entry_file.tell()))
+            values.tofile(entry_file)
+
+    def __read_entry__(self, data):
+        magic, version, segment_count, pickle_offset, pickle_length = HEADER.unpack_from(data, 0)
+
+        if magic != MAGIC or version != CACHE_VERSION:
+            raise ValueError("Entry has an incompatible Format")
+
+        segments = []
+        for i in range(segment_count):
+            typecode, width, offset, length = SEGMENT.unpack_from(data, HEADER.size + i * SEGMENT.size)
+            segments.append((typecode.decode("ASCII"), width, offset, length))
+
+        with memoryview(data)[pickle_offset:pickle_offset + pickle_length] as pickle_data:
+            return _EntryUnpickler(io.BytesIO(pickle_data), segments, data).load()
+
+    def __align__(self, offset):
+        return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+    def __remove__(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,196 @@
+import argparse
+import concurrent.futures
+import fnmatch
+import io
+import os
+import struct
+import threading
+import time
+
+from . import (roundtrip)
+
+FILE_HEADER = b"@@b@"
+
+EXTENSIONS = (".mesh",)
+
+class PdxStringSpan():
+    """Byte Range of a String Property, Offsets are relative to the raw File Data"""
+    __slots__ = ("object_name", "name", "value", "bounds")
+
+    def __init__(self, object_name: str, name: str, value: str, bounds: tuple):
+        self.object_name = object_name
+        self.name = name
+        self.value = value
+        self.bounds = bounds
+
+class PatchRule():
+    """Replaces the Value of matching String Properties. old_value may contain fnmatch Wildcards, None matches every Value."""
+    def __init__(self, name: str, old_value, new_value: str, object_name: str = "material"):
+        self.name = name
+        self.old_value = old_value
+        self.new_value = new_value
+        self.object_name = object_name
+
+    def matches(self, span: PdxStringSpan):
+        if span.name != self.name or span.object_name != self.object_name:
+            return False
+
+        return self.old_value is None or fnmatch.fnmatchcase(span.value, self.old_value)
+
+def iter_string_properties(data):
+    """Yields the Spans of all String Properties of the raw File Data (bytes), Numeric Payloads are skipped without decoding them"""
+    offset = len(FILE_HEADER) if data[:len(FILE_HEADER)] == FILE_HEADER else 0
+    size = len(data)
+    object_name = ""
+
+    while offset < size:
+        char = data[offset]
+
+        if char == 0x5B: # "["
+            end = data.index(b"\x00", offset)
+            object_name = data[offset:end].lstrip(b"[").decode("UTF-8")
+            offset = end + 1
+        elif char == 0x21: # "!"
+            start = offset
+            name_length = data[offset + 1]
+            name = data[offset + 2:offset + 2 + name_length].decode("UTF-8")
+            offset += 2 + name_length
+
+            value_type = data[offset]
+            count = struct.unpack_from("<I", data, offset + 1)[0]
+            offset += 5
+
+            if value_type == 0x73: # "s"
+                #Strings are stored with their Length including the Null Byte
+                for i in range(count):
+                    length = struct.unpack_from("<I", data, offset)[0]
+                    value = data[offset + 4:offset + 4 + length].rstrip(b"\x00").decode("UTF-8")
+                    offset += 4 + length
+
+                if count == 1:
+                    yield PdxStringSpan(object_name, name, value, (start, offset))
+            else:
+                offset += 4 * count
+        else:
+            raise ValueError("Unexpected Byte 0x{:02x} at Offset {}".format(char, offset))
+
+def get_string_property_data(name, value):
+    """Returns the Bytes of a String Property with a single Value"""
+    encoded_name = name.encode("UTF-8")
+    encoded_value = value.encode("UTF-8")
+
+    result = bytearray()
+    result.extend(struct.pack("<cb" + str(len(encoded_name)) + "sc", b'!', len(encoded_name), encoded_name, b's'))
+    result.extend(struct.pack("<II", 1, len(encoded_value) + 1))
+    result.extend(struct.pack("<" + str(len(encoded_value)) + "sb", encoded_value, 0))
+
+    return result
+
+def patch_data(data, rules):
+    """Returns the Chunks of the patched File Data and the Number of Replacements.
+    Unchanged Regions are memoryview Slices of data, only replaced Properties are encoded again."""
+    view = memoryview(data)
+    chunks = []
+    replacements = 0
+    position = 0
+
+    for span in iter_string_properties(data):
+        for rule in rules:
+            if rule.matches(span):
+                if rule.new_value != span.value:
+                    chunks.append(view[position:span.bounds[0]])
+                    chunks.append(get_string_property_data(span.name, rule.new_value))
+                    position = span.bounds[1]
+                    replacements += 1
+
+                break
+
+    if replacements > 0:
+        chunks.append(view[position:])
+
+    return chunks, replacements
+
+def patch_file(filename, rules, dry_run=False):
+    """Patches the File in place, the File is replaced atomically. Returns a Result Dictionary."""
+    result = {
+        "file": filename,
+        "replacements": 0,
+        "error": None,
+    }
+
+    try:
+        with io.open(filename, "rb") as f:
+            data = f.read()
+
+        chunks, result["replacements"] = patch_data(data, rules)
+
+        if result["replacements"] > 0 and not dry_run:
+            temp_path = filename + "." + str(os.getpid()) + "." + str(threading.get_ident()) + ".tmp"
+
+            try:
+                with io.open(temp_path, "wb") as f:
+                    for chunk in chunks:
+                        f.write(chunk)
+
+                os.replace(temp_path, filename)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+    except Exception as e:
+        result["error"] = type(e).__name__ + ": " + str(e)
+
+    return result
+
+def __patch_worker__(arguments):
+    filenames, rules, dry_run = arguments
+
+    return [patch_file(filename, rules, dry_run) for filename in filenames]
+
+def patch_files(filenames, rules, dry_run=False, workers=None, chunk_size=64):
+    """Patches all Files, using a Process Pool unless workers is 1. Results are in the Order of the Files."""
+    if workers == 1 or len(filenames) <= chunk_size:
+        return [patch_file(filename, rules, dry_run) for filename in filenames]
+
+    #The Rules are sent once per Chunk instead of once per File
+    chunks = [(filenames[i:i + chunk_size], rules, dry_run) for i in range(0, len(filenames), chunk_size)]
+
+    results = []
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        for chunk_results in executor.map(__patch_worker__, chunks):
+            results.extend(chunk_results)
+
+    return results
+
+def format_result(result):
+    if result["error"] is not None:
+        return result["file"] + ": ERROR " + result["error"]
+
+    return result["file"] + ": " + str(result["replacements"]) + " Replacements"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="patch", description="Replaces String Properties (Textures, Shaders) of .mesh Files in place without parsing the Geometry.")
+    parser.add_argument("paths", nargs="+", help="Files or Directories to patch")
+    parser.add_argument("--replace", nargs=3, action="append", required=True, metavar=("PROPERTY", "OLD", "NEW"),
+        help="Replaces the Value OLD (fnmatch Pattern, \"*\" for any) of PROPERTY (shader, diff, n, spec) with NEW, can be repeated")
+    parser.add_argument("--object", default="material", help="Name of the Objects containing the Properties")
+    parser.add_argument("--workers", type=int, default=None, help="Number of Worker Processes (1 disables the Pool)")
+    parser.add_argument("--dry-run", action="store_true", help="Only counts the Replacements")
+    args = parser.parse_args(argv)
+
+    rules = [PatchRule(name, old_value, new_value, args.object) for name, old_value, new_value in args.replace]
+
+    start = time.perf_counter()
+    results = patch_files(roundtrip.find_files(args.paths, EXTENSIONS), rules, args.dry_run, args.workers)
+    seconds = time.perf_counter() - start
+
+    for result in results:
+        if result["error"] is not None or result["replacements"] > 0:
+            print(format_result(result))
+
+    patched = sum(1 for result in results if result["replacements"] > 0)
+    errors = sum(1 for result in results if result["error"] is not None)
+    print("{}/{} Files {} in {:.2f}s, {} Errors".format(patched, len(results), "would be patched" if args.dry_run else "patched", seconds, errors))
+
+    return 0 if errors == 0 else 1
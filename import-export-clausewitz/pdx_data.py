@@ -1,6 +1,56 @@
+import hashlib
 import io
+import itertools
 import struct
-from . import (utils)
+from . import (profiler, utils)
+
+#Mesh Properties describing the Geometry, used for detecting identical Meshes
+GEOMETRY_PROPERTIES = ("p", "n", "ta", "u0", "u1", "u2", "u3", "tri")
+
+#UV Set Properties of a Mesh, u0 is the main Set
+UV_PROPERTIES = ("u0", "u1", "u2", "u3")
+
+def get_unknown_data(unknown, node_type):
+    """Returns the raw Bytes of all preserved unknown Nodes of the given Type.
+    The unknown Attribute of the Pdx Classes holds the PdxProperty and PdxObject Nodes the Parser didn't recognize (None if there are none).
+    get_binary_data writes them back as they were read, the Properties after the known ones and the Objects after the known Objects."""
+    result = bytearray()
+
+    if unknown is not None:
+        for node in unknown:
+            if isinstance(node, node_type):
+                result.extend(node.get_binary_data())
+
+    return result
+
+def get_array_data(typecode, values):
+    """Returns the packed Values of a flat or nested (Coordinate Tuples) Array"""
+    if len(values) > 0 and not isinstance(values[0], (int, float)):
+        values = list(itertools.chain.from_iterable(values))
+
+    return struct.pack("<" + str(len(values)) + typecode, *values)
+
+#Integer Properties are read as signed 32 Bit Values
+INT32_MIN = -2 ** 31
+INT32_MAX = 2 ** 31 - 1
+
+#Largest Vertex Index of the compact 16 Bit Index Format
+UINT16_MAX = 2 ** 16 - 1
+
+def get_index_array_data(name, values, minimum=0, maximum=INT32_MAX):
+    """Returns the packed signed 32 Bit Values of a flat or nested Index Array.
+    Raises ValueError if a Value is outside of [minimum, maximum], before anything is packed."""
+    if len(values) > 0 and not isinstance(values[0], int):
+        values = list(itertools.chain.from_iterable(values))
+
+    if len(values) > 0:
+        lowest = min(values)
+        highest = max(values)
+
+        if lowest < minimum or highest > maximum:
+            raise ValueError("Index Array \"" + name + "\" contains " + str(lowest if lowest < minimum else highest) + ", valid Range is " + str(minimum) + " to " + str(maximum))
+
+    return struct.pack("<" + str(len(values)) + "i", *values)
 
 class PdxFile():
     """Class representing a Paradox Clausewitz Engine .mesh File."""
@@ -10,12 +60,28 @@ class PdxFile():
         self.rawData = []
         self.nodes = []
 
-    def read(self):
-        """Read and Parse the specified File."""
-        self.__file_reference__ = io.open(self.filename, "rb")
-        self.rawData = self.__file_reference__.read()
+    def read(self, cache=None):
+        """Read and Parse the specified File. Parsing is skipped if the provided Cache already knows the File."""
+        with profiler.stage("file read"):
+            self.__file_reference__ = io.open(self.filename, "rb")
+            self.rawData = self.__file_reference__.read()
+
+        if cache is not None:
+            with profiler.stage("cache load"):
+                key = cache.get_key(self.filename, self.rawData)
+                nodes = cache.load(key)
+
+            if nodes is not None:
+                self.nodes = nodes
+                self.__file_reference__.close()
+                return
 
-        self.__parse__()
+        with profiler.stage("parse"):
+            self.__parse__()
+
+        if cache is not None:
+            with profiler.stage("cache store"):
+                cache.store(key, self.nodes)
 
     def __parse__(self):
         data = self.rawData.lstrip(b"@@b@")
@@ -34,6 +100,43 @@ class PdxFile():
 
         self.__file_reference__.close()
 
+    def scan(self):
+        """Returns the Spans of all Properties and Object Headers of the read File, Offsets are relative to the raw File Data"""
+        data = self.rawData.lstrip(b"@@b@")
+        header_length = len(self.rawData) - len(data)
+
+        buffer = utils.BufferReader(data)
+        object_names = []
+        spans = []
+
+        while not buffer.IsEOF():
+            start = buffer.GetCurrentOffset()
+            char = buffer.NextChar()
+
+            if char == "[":
+                depth = 0
+
+                while buffer.NextChar(True) == "[":
+                    buffer.NextChar()
+                    depth += 1
+
+                object_names = object_names[:depth]
+                object_names.extend([""] * (depth - len(object_names)))
+                object_names.append(utils.ReadNullByteString(buffer))
+
+                path = "/".join(object_names)
+            elif char == "!":
+                p = self.read_property(buffer)
+
+                path = "/".join(object_names + [p.name])
+            else:
+                path = "/".join(object_names + ["?"])
+
+            spans.append(PdxSpan(path, (header_length + start, header_length + buffer.GetCurrentOffset())))
+
+        return spans
+
+    @profiler.profiled("read_property")
     def read_property(self, buffer: utils.BufferReader):
         """Read a .mesh Property using the provided Buffer"""
         name = ""
@@ -53,20 +156,14 @@ class PdxFile():
         if char == "i":
             data_count = buffer.NextUInt32()
             #utils.Log.info("Count: " + str(data_count))
-            for i in range(data_count):
-                temp = buffer.NextInt32()
-                property_data.append(temp)
-                #utils.Log.info("Integer: " + str(temp))
+            property_data = buffer.NextInt32Array(data_count)
 
             if name == "pdxasset":
                 utils.Log.info("PDXAsset: " + str(property_data))
         elif char == "f":
             data_count = buffer.NextUInt32()
             #utils.Log.info("Count: " + str(data_count))
-            for i in range(data_count):
-                temp = buffer.NextFloat32()
-                property_data.append(temp)
-                #utils.Log.info("Float: " + str(temp))
+            property_data = buffer.NextFloat32Array(data_count)
         elif char == "s":
             value = ""
             stringType = buffer.NextUInt32()
@@ -88,14 +185,18 @@ class PdxFile():
         else:
             result = PdxProperty(name, (lower_bound, upper_bound))
             result.value = property_data
+            #Includes the leading "!", so the Property can be written back as it is
+            result.raw = memoryview(buffer.buffer)[lower_bound - 1:upper_bound]
 
         return result
 
+    @profiler.profiled("read_object")
     def read_object(self, buffer: utils.BufferReader, depth, prev_obj):
         """Reads object Data"""
         char = buffer.NextChar()
         object_properties = []
         sub_objects = []
+        unknown = []
 
         if char == "[":
             depth_temp = 0
@@ -106,6 +207,9 @@ class PdxFile():
 
             return self.read_object(buffer, depth_temp, prev_obj)
         else:
+            #Every Bracket of the Header belongs to the Object
+            header_start = buffer.GetCurrentOffset() - 1 - (depth + 1)
+
             object_name = char + utils.ReadNullByteString(buffer)
             utils.Log.info((" "*depth) + "Object Name: " + object_name)
 
@@ -143,11 +247,14 @@ class PdxFile():
                         result.objects.append(o)
                     else:
                         utils.Log.info("ERROR ::: World contains invalid Sub-Object: " + str(type(o)))
+                        unknown.append(o)
 
                 for p in object_properties:
                     utils.Log.info("ERROR ::: Invalid Property in World: \"" + p.name + "\"")
+                    unknown.append(p)
             elif object_name == "mesh":
                 result = PdxMesh()
+                geometry_hash = hashlib.sha1()
 
                 for o in sub_objects:
                     if isinstance(o, PdxMaterial):
@@ -158,8 +265,13 @@ class PdxFile():
                         result.skin = o
                     else:
                         utils.Log.info("ERROR ::: Mesh contains invalid Sub-Object: " + str(type(o)))
+                        unknown.append(o)
 
                 for p in object_properties:
+                    if p.name in GEOMETRY_PROPERTIES:
+                        #Hashing the raw Bytes, identical Geometry can be shared on import
+                        geometry_hash.update(memoryview(buffer.buffer)[p.bounds[0]:p.bounds[1]])
+
                     if p.name == "p":
                         utils.Log.info("Positions: " + str(len(p.value)) + " representing " + str(len(p.value) / 3) + " Vertices")
                         result.verts = utils.TransposeCoordinateArray3D(p.value)
@@ -168,20 +280,33 @@ class PdxFile():
                         result.normals = utils.TransposeCoordinateArray3D(p.value)
                     elif p.name == "ta":
                         utils.Log.info("Tangents: " + str(len(p.value)) + " representing " + str(len(p.value) / 4) + " Vertices")
-                        result.tangents = p.value
-                    elif p.name == "u0": # u1, u2, u3 still not implemented
+                        result.tangents = utils.TransposeCoordinateArray4D(p.value)
+                    elif p.name == "u0":
                         utils.Log.info("UV's: " + str(len(p.value)) + " representing " + str(len(p.value) / 2) + " Vertices")
                         result.uv_coords = utils.TransposeCoordinateArray2D(p.value)
+                    elif p.name in UV_PROPERTIES:
+                        utils.Log.info("UV's (" + p.name + "): " + str(len(p.value)) + " representing " + str(len(p.value) / 2) + " Vertices")
+                        uv_set = UV_PROPERTIES.index(p.name) - 1
+
+                        #Missing Sets in between are kept empty
+                        while len(result.extra_uv_coords) <= uv_set:
+                            result.extra_uv_coords.append([])
+
+                        result.extra_uv_coords[uv_set] = utils.TransposeCoordinateArray2D(p.value)
                     elif p.name == "tri":
                         utils.Log.info("Indices: " + str(len(p.value)) + " representing " + str(len(p.value) / 3) + " Triangles")
                         result.faces = utils.TransposeCoordinateArray3D(p.value)
                     else:
                         utils.Log.info("ERROR ::: Invalid Property in Mesh: \"" + p.name + "\"")
+                        unknown.append(p)
+
+                result.geometryHash = geometry_hash.hexdigest()
             elif object_name == "aabb":
                 result = PdxBounds(None, None)
 
                 for o in sub_objects:
                     utils.Log.info("ERROR ::: Bounds contains invalid Sub-Object: " + str(type(o)))
+                    unknown.append(o)
 
                 for p in object_properties:
                     if(p.name == "min"):
@@ -190,11 +315,13 @@ class PdxFile():
                         result.max = p.value
                     else:
                         utils.Log.info("ERROR ::: Invalid Property in Bounds: \"" + p.name + "\"")
+                        unknown.append(p)
             elif object_name == "skin":
                 result = PdxSkin()
 
                 for o in sub_objects:
                     utils.Log.info("ERROR ::: Skin contains invalid Sub-Object: " + str(type(o)))
+                    unknown.append(o)
 
                 for p in object_properties:
                     if p.name == "bones":
@@ -211,11 +338,13 @@ class PdxFile():
                         result.weight = p.value
                     else:
                         utils.Log.info("ERROR ::: Invalid Property in Skin: \"" + p.name + "\"")
+                        unknown.append(p)
             elif object_name == "material":
                 result = PdxMaterial()
 
                 for o in sub_objects:
                     utils.Log.info("ERROR ::: Material contains invalid Sub-Object: " + str(type(o)))
+                    unknown.append(o)
 
                 for p in object_properties:
                     if p.name == "shader":
@@ -228,6 +357,7 @@ class PdxFile():
                         result.spec = p.value
                     else:
                         utils.Log.info("ERROR ::: Invalid Property in Material: \"" + p.name + "\"")
+                        unknown.append(p)
             elif object_name == "skeleton":
                 result = PdxSkeleton()
 
@@ -236,9 +366,11 @@ class PdxFile():
                         result.joints.append(o)
                     else:
                         utils.Log.info("ERROR ::: Skeleton contains invalid Sub-Object: " + str(type(o)))
+                        unknown.append(o)
 
                 for p in object_properties:
                     utils.Log.info("ERROR ::: Invalid Property in Skeleton: \"" + p.name + "\"")
+                    unknown.append(p)
             elif object_name == "locator":
                 result = PdxLocators()
 
@@ -247,9 +379,11 @@ class PdxFile():
                         result.locators.append(o)
                     else:
                         utils.Log.info("ERROR ::: Locators contains invalid Sub-Object: " + str(type(o)))
+                        unknown.append(o)
 
                 for p in object_properties:
                     utils.Log.info("ERROR ::: Invalid Property in Locators: \"" + p.name + "\"")
+                    unknown.append(p)
             elif object_name == "info":
                 result = PdxAnimInfo()
 
@@ -258,6 +392,7 @@ class PdxFile():
                         result.animJoints.append(o)
                     else:
                         utils.Log.info("ERROR ::: AnimInfo contains invalid Sub-Object: " + str(type(o)))
+                        unknown.append(o)
 
                 for p in object_properties:
                     if p.name == "fps":
@@ -277,11 +412,13 @@ class PdxFile():
                             utils.Log.info("ERROR ::: joints has more than 1 Value")
                     else:
                         utils.Log.info("ERROR ::: Invalid Property in AnimInfo: \"" + p.name + "\"")
+                        unknown.append(p)
             elif object_name == "samples":
                 result = PdxAnimSamples()
 
                 for o in sub_objects:
                     utils.Log.info("ERROR ::: AnimSamples contains invalid Sub-Object: " + str(type(o)))
+                    unknown.append(o)
 
                 for p in object_properties:
                     if p.name == "t":
@@ -292,11 +429,13 @@ class PdxFile():
                         result.s = p.value
                     else:
                         utils.Log.info("ERROR ::: Invalid Property in AnimSamples: \"" + p.name + "\"")
+                        unknown.append(p)
             else:
                 if isinstance(prev_obj, PdxLocators):
                     result = PdxLocator(object_name, None)
                     for o in sub_objects:
                         utils.Log.info("ERROR ::: Locator \"" + object_name + "\" contains invalid Sub-Object: " + str(type(o)))
+                        unknown.append(o)
 
                     for p in object_properties:
                         if p.name == "p":
@@ -313,6 +452,7 @@ class PdxFile():
                             result.parent = p.value
                         else:
                             utils.Log.info("ERROR ::: Invalid Property in Locator: \"" + p.name + "\"")
+                            unknown.append(p)
                 elif isinstance(prev_obj, PdxWorld):
                     result = PdxShape(object_name)
 
@@ -323,14 +463,17 @@ class PdxFile():
                             result.meshes.append(o)
                         else:
                             utils.Log.info("ERROR ::: Shape \"" + object_name + "\" contains invalid Sub-Object: " + str(type(o)))
+                            unknown.append(o)
 
                     for p in object_properties:
                         utils.Log.info("ERROR ::: Invalid Property in Shape: \"" + p.name + "\"")
+                        unknown.append(p)
                 elif isinstance(prev_obj, PdxSkeleton):
                     result = PdxJoint(object_name)
 
                     for o in sub_objects:
                         utils.Log.info("ERROR ::: Joint \"" + object_name + "\" contains invalid Sub-Object: " + str(type(o)))
+                        unknown.append(o)
 
                     for p in object_properties:
                         if p.name == "ix":
@@ -348,16 +491,17 @@ class PdxFile():
                         elif p.name == "tx":
                             if len(p.value) == 12:
                                 result.transform = p.value
-                                print(p.value[9:12])
                             else:
                                 utils.Log.info("ERROR ::: Joint Transform not 12 Values")
                         else:
                             utils.Log.info("ERROR ::: Invalid Property in Joint: \"" + p.name + "\"")
+                            unknown.append(p)
                 elif isinstance(prev_obj, PdxAnimInfo):
                     result = PdxAnimJoint(object_name)
 
                     for o in sub_objects:
                         utils.Log.info("ERROR ::: AnimJoint \"" + object_name + "\" contains invalid Sub-Object: " + str(type(o)))
+                        unknown.append(o)
 
                     for p in object_properties:
                         if p.name == "sa":
@@ -379,36 +523,55 @@ class PdxFile():
                                 utils.Log.info("ERROR ::: AnimJoint Size has a length of " + str(len(p.value)))
                         else:
                             utils.Log.info("ERROR ::: Invalid Property in AnimJoint: \"" + p.name + "\"")
+                            unknown.append(p)
                 else:
                     result = PdxObject(object_name, object_properties, depth)
 
+            if isinstance(result, PdxObject):
+                #Unknown Objects are kept as they are, including all nested Data
+                result.raw = memoryview(buffer.buffer)[header_start:buffer.GetCurrentOffset()]
+            else:
+                #Unknown Properties and Sub-Objects get written back verbatim
+                unknown = [node for node in unknown if isinstance(node, (PdxProperty, PdxObject))]
+
+                if len(unknown) > 0:
+                    result.unknown = unknown
+
             return result
 
+class PdxSpan():
+    """Byte Range of a Property or Object Header inside a File, Path is built from the Object Names"""
+    __slots__ = ("path", "bounds")
+
+    def __init__(self, path: str, bounds: tuple):
+        self.path = path
+        self.bounds = bounds
+
 class PdxAsset():
     """Asset Object"""
     def __init__(self):
         self.bounds = (0, 0)
         self.name = "pdxasset"
-        self.version = (0, 0) # Version x.y formated like (x, y)
+        self.version = (1, 0) # Version x.y formated like (x, y)
 
     def get_binary_data(self):
         """Returns the Byte encoded Object Data"""
         result = bytearray()
 
         result.extend(struct.pack("<cb" + str(len(self.name)) + "s", b'!', len(self.name), self.name.encode('UTF-8')))
-        result.extend(struct.pack("<cb", b'i', 2))
-        result.extend(struct.pack(">iibbb", 1, 0, 0, 0, 0))
+        result.extend(struct.pack("<cIii", b'i', 2, self.version[0], self.version[1]))
 
         return result
 
     def get_gfx_data(self):
-        result = ""
+        result = []
 
         return result
 
 class PdxWorld():
     def __init__(self):
         self.objects = []
+        self.unknown = None
 
     def get_binary_data(self):
         """Returns the Byte encoded Object Data"""
@@ -416,13 +579,17 @@ class PdxWorld():
 
         result.extend(struct.pack("<7sb", b'[object', 0))
 
+        result.extend(get_unknown_data(self.unknown, PdxProperty))
+
         for o in self.objects:
             result.extend(o.get_binary_data())
-        
+
+        result.extend(get_unknown_data(self.unknown, PdxObject))
+
         return result
 
     def get_gfx_data(self):
-        result = ""
+        result = []
 
         for o in self.objects:
             result += o.get_gfx_data()
@@ -434,6 +601,7 @@ class PdxShape():
         self.name = name
         self.meshes = []
         self.skeleton = None
+        self.unknown = None
 
     def get_binary_data(self):
         result = bytearray()
@@ -441,6 +609,8 @@ class PdxShape():
         result.extend(struct.pack("<2s", b'[['))
         result.extend(struct.pack("<" + str(len(self.name)) + "sb", self.name.encode('UTF-8'), 0))
         
+        result.extend(get_unknown_data(self.unknown, PdxProperty))
+
         if self.meshes is not None:
             for mesh in self.meshes:
                 result.extend(mesh.get_binary_data())
@@ -450,11 +620,13 @@ class PdxShape():
         if not(self.skeleton is None):
             result.extend(self.skeleton.get_binary_data())
 
+        result.extend(get_unknown_data(self.unknown, PdxObject))
+
         return result
 
 
     def get_gfx_data(self):
-        result = ""
+        result = []
 
         if self.meshes is not None:
             for i in range(len(self.meshes)):
@@ -465,28 +637,36 @@ class PdxShape():
 class PdxSkeleton():
     def __init__(self):
         self.joints = []
+        self.unknown = None
 
     def get_binary_data(self):
         result = bytearray()
 
         result.extend(struct.pack("<11sb", b'[[[skeleton', 0))
 
+        result.extend(get_unknown_data(self.unknown, PdxProperty))
+
         for joint in self.joints:
             result.extend(joint.get_binary_data())
 
+        result.extend(get_unknown_data(self.unknown, PdxObject))
+
         return result
 
     def get_gfx_data(self):
-        result = ""
+        result = []
 
         return result
 
 class PdxJoint():
-    def __init__(self, name):
+    __slots__ = ("name", "index", "parent", "transform", "unknown")
+
+    def __init__(self, name: str, index: int = -1, parent: int = -1, transform: list = None):
         self.name = name
-        self.index = -1
-        self.parent = -1
-        self.transform = []
+        self.index = index
+        self.parent = parent
+        self.transform = transform if transform is not None else []
+        self.unknown = None
 
     def get_binary_data(self):
         result = bytearray()
@@ -504,10 +684,13 @@ class PdxJoint():
             for t in self.transform:
                 result.extend(struct.pack("<f",t))
 
+        result.extend(get_unknown_data(self.unknown, PdxProperty))
+        result.extend(get_unknown_data(self.unknown, PdxObject))
+
         return result
 
     def get_gfx_data(self):
-        result = ""
+        result = []
 
         return result
 
@@ -519,11 +702,18 @@ class PdxMesh():
         self.tangents = []
         self.normals = []
         self.uv_coords = []
+        #Additional UV Sets u1, u2 and u3, same Layout as uv_coords
+        self.extra_uv_coords = []
 
         self.meshBounds = None
         self.material = None
         self.skin = None
 
+        #Hash of the raw Geometry Data, only set for parsed Meshes
+        self.geometryHash = None
+
+        self.unknown = None
+
     def get_binary_data(self):
         """Returns the Byte encoded Object Data"""
         result = bytearray()
@@ -533,48 +723,47 @@ class PdxMesh():
         if len(self.verts) > 0:
             result.extend(struct.pack("<cb2sI", b'!', 1, b'pf', len(self.verts) * 3))
 
-            for i in range(len(self.verts)):
-                for j in range(3):
-                    result.extend(struct.pack("<f", self.verts[i][j]))
+            result.extend(get_array_data("f", self.verts))
         else:
             utils.Log.info("ERROR ::: No Vertices found!")
 
         if len(self.faces) > 0:
             result.extend(struct.pack("<cb4sI", b'!', 3, b'trii', len(self.faces) * 3))
 
-            for i in range(len(self.faces)):
-                for j in range(3):
-                    result.extend(struct.pack("<I", self.faces[i][j]))
+            result.extend(get_index_array_data("tri", self.faces))
         else:
             utils.Log.info("ERROR ::: No Faces found!")
 
         if len(self.normals) > 0:
             result.extend(struct.pack("<cb2sI", b'!', 1, b'nf', len(self.normals) * 3))
 
-            for i in range(len(self.normals)):
-                for j in range(3):
-                    result.extend(struct.pack("<f", self.normals[i][j]))
+            result.extend(get_array_data("f", self.normals))
         else:
             utils.Log.info("WARNING ::: No Normals found! (Ok for Collision Material)")
 
         if len(self.tangents) > 0:
             result.extend(struct.pack("<cb3sI", b'!', 2, b'taf', len(self.tangents) * 4))
 
-            for i in range(len(self.tangents)):
-                for j in range(4):
-                    result.extend(struct.pack("<f", self.tangents[i][j]))
+            result.extend(get_array_data("f", self.tangents))
         else:
             utils.Log.info("WARNING ::: No Tangents found! (Ok for Collision Material)")
 
         if len(self.uv_coords) > 0:
             result.extend(struct.pack("<cb3sI", b'!', 2, b'u0f', len(self.uv_coords) * 2))
 
-            for i in range(len(self.uv_coords)):
-                for j in range(2):
-                    result.extend(struct.pack("<f", self.uv_coords[i][j]))
+            result.extend(get_array_data("f", self.uv_coords))
         else:
             utils.Log.info("WARNING ::: No UV0 found! (Ok for Collision Material)")
 
+        for i in range(len(self.extra_uv_coords)):
+            if len(self.extra_uv_coords[i]) > 0:
+                name = UV_PROPERTIES[i + 1].encode("UTF-8")
+
+                result.extend(struct.pack("<cb3sI", b'!', 2, name + b'f', len(self.extra_uv_coords[i]) * 2))
+                result.extend(get_array_data("f", self.extra_uv_coords[i]))
+
+        result.extend(get_unknown_data(self.unknown, PdxProperty))
+
         if self.meshBounds is not None:
             result.extend(self.meshBounds.get_binary_data())
         else:
@@ -590,29 +779,47 @@ class PdxMesh():
         else:
             utils.Log.info("WARNING ::: No Skin found!")
 
+        result.extend(get_unknown_data(self.unknown, PdxObject))
+
         return result
 
-    def get_gfx_data(self, name, index):
-        result = "\n"
+    def get_statistics(self):
+        """Returns Counts and Index Ranges of the Mesh, used to check it against the Index Formats of the Engine"""
+        indices = list(itertools.chain.from_iterable(self.faces))
+        max_index = max(indices) if len(indices) > 0 else -1
 
-        result += "        meshsettings = {\n"
+        result = {
+            "vertices": len(self.verts),
+            "faces": len(self.faces),
+            "max_index": max_index,
+            "unused_vertices": len(self.verts) - len(set(indices)),
+            #Smallest Index Format every Index fits into
+            "index_bits": 16 if max_index <= UINT16_MAX else 32,
+        }
 
-        result += "            name = \"" + name + "\"\n"
-        result += "            index = " + str(index) + "\n"
+        if self.skin is not None:
+            result.update(self.skin.get_statistics())
 
-        result += self.material.get_gfx_data()
+        return result
 
-        result += "        }\n"
+    def get_gfx_data(self, name, index):
+        """Returns the meshsettings Entry of the .gfx File as (Key, Value) Pairs, see gfx.format_entries"""
+        result = [("name", name), ("index", index)]
 
-        return result
+        result += self.material.get_gfx_data()
+
+        return [("meshsettings", result)]
 
 class PdxMaterial():
-    def __init__(self):
-        #Initialized to Collision for ease of use in exporter
-        self.shader = "Collision"
-        self.diff = ""
-        self.normal = ""
-        self.spec = ""
+    __slots__ = ("shader", "diff", "normal", "spec", "unknown")
+
+    #Initialized to Collision for ease of use in exporter
+    def __init__(self, shader: str = "Collision", diff: str = "", normal: str = "", spec: str = ""):
+        self.shader = shader
+        self.diff = diff
+        self.normal = normal
+        self.spec = spec
+        self.unknown = None
 
     #Is implemented incomplete (Only 1 Texture)
     def get_binary_data(self):
@@ -639,22 +846,28 @@ class PdxMaterial():
             result.extend(struct.pack("<II", 1, len(self.spec) + 1))
             result.extend(struct.pack("<" + str(len(self.spec)) + "sb", self.spec.encode("UTF-8"), 0))
 
+        result.extend(get_unknown_data(self.unknown, PdxProperty))
+        result.extend(get_unknown_data(self.unknown, PdxObject))
+
         return result
 
     def get_gfx_data(self):
-        result = ""
-
-        result += "            texture_diffuse = \"" + self.diff + "\"\n"
-        result += "            texture_normal = \"" + self.normal + "\"\n"
-        result += "            texture_specular = \"" + self.spec + "\"\n"
-        result += "            shader = \"" + self.shader + "\"\n"
+        result = [
+            ("texture_diffuse", self.diff),
+            ("texture_normal", self.normal),
+            ("texture_specular", self.spec),
+            ("shader", self.shader),
+        ]
 
         return result
 
 class PdxBounds():
-    def __init__(self, min, max):
+    __slots__ = ("min", "max", "unknown")
+
+    def __init__(self, min: list, max: list):
         self.min = min
         self.max = max
+        self.unknown = None
 
     def get_binary_data(self):
         """Returns the Byte encoded Object Data"""
@@ -667,10 +880,13 @@ class PdxBounds():
         result.extend(struct.pack("<cb4s", b'!', 3, b'maxf'))
         result.extend(struct.pack("<Ifff", 3, self.max[0], self.max[1], self.max[2]))
 
+        result.extend(get_unknown_data(self.unknown, PdxProperty))
+        result.extend(get_unknown_data(self.unknown, PdxObject))
+
         return result
 
     def get_gfx_data(self):
-        result = ""
+        result = []
 
         return result
 
@@ -679,6 +895,7 @@ class PdxSkin():
         self.bonesPerVertice = 0
         self.indices = []
         self.weight = []
+        self.unknown = None
 
     def get_binary_data(self):
         result = bytearray()
@@ -686,17 +903,31 @@ class PdxSkin():
         result.extend(struct.pack("<8sb", b'[[[[skin', 0))
 
         result.extend(struct.pack("<cb6sII", b'!', 5, b'bonesi', 1, self.bonesPerVertice))
-        result.extend(struct.pack("<cb3s", b'!', 2, b'ixf'))
-        for i in range(len(self.indices)):
-            result.extend(struct.pack("<I", self.indices[i]))
-        result.extend(struct.pack("<cb2s", b'!', 1, b'wf'))
-        for i in range(len(self.weight)):
-            result.extend(struct.pack("<f", self.weight[i]))
+
+        #Unused Slots are padded with -1
+        result.extend(struct.pack("<cb3sI", b'!', 2, b'ixi', len(self.indices)))
+        result.extend(get_index_array_data("ix", self.indices, -1))
+
+        result.extend(struct.pack("<cb2sI", b'!', 1, b'wf', len(self.weight)))
+        result.extend(get_array_data("f", self.weight))
+
+        result.extend(get_unknown_data(self.unknown, PdxProperty))
+        result.extend(get_unknown_data(self.unknown, PdxObject))
 
         return result
 
+    def get_statistics(self):
+        bones = set(self.indices)
+        bones.discard(-1)
+
+        return {
+            "bones_per_vertex": self.bonesPerVertice,
+            "unique_bones": len(bones),
+            "max_bone_index": max(bones) if len(bones) > 0 else -1,
+        }
+
     def get_gfx_data(self):
-        result = ""
+        result = []
 
         return result
 
@@ -704,6 +935,7 @@ class PdxLocators():
     def __init__(self):
         self.bounds = (0, 0)
         self.locators = []
+        self.unknown = None
 
     def get_binary_data(self):
         """Returns the Byte encoded Object Data"""
@@ -711,23 +943,30 @@ class PdxLocators():
 
         result.extend(struct.pack("<8sb", b'[locator', 0))
 
+        result.extend(get_unknown_data(self.unknown, PdxProperty))
+
         for locator in self.locators:
             result.extend(locator.get_binary_data())
 
+        result.extend(get_unknown_data(self.unknown, PdxObject))
+
         return result
 
     def get_gfx_data(self):
-        result = ""
+        result = []
 
         return result
 
 class PdxLocator():
-    def __init__(self, name, pos):
+    __slots__ = ("bounds", "name", "pos", "quaternion", "parent", "unknown")
+
+    def __init__(self, name: str, pos: list, quaternion: tuple = (0, 0, 0, 0), parent: str = ""):
         self.bounds = (0, 0)
         self.name = name
         self.pos = pos
-        self.quaternion = (0, 0, 0, 0)
-        self.parent = ""
+        self.quaternion = quaternion
+        self.parent = parent
+        self.unknown = None
 
     def get_binary_data(self):
         """Returns the Byte encoded Object Data"""
@@ -739,14 +978,17 @@ class PdxLocator():
         result.extend(struct.pack("<cb2sifff", b'!', 1, b'pf', 3, self.pos[0], self.pos[1], self.pos[2]))
         result.extend(struct.pack("<cb2siffff", b'!', 1, b'qf', 4, self.quaternion[0], self.quaternion[1], self.quaternion[2], self.quaternion[3]))
         if self.parent != "":
-            result.extend(struct.pack("<cb5s", b'!', 2, b'pas'))
+            result.extend(struct.pack("<cb3s", b'!', 2, b'pas'))
             result.extend(struct.pack("<II", 1, len(self.parent) + 1))
             result.extend(struct.pack("<" + str(len(self.parent)) + "sb", self.parent.encode("UTF-8"), 0))
 
+        result.extend(get_unknown_data(self.unknown, PdxProperty))
+        result.extend(get_unknown_data(self.unknown, PdxObject))
+
         return result
 
     def get_gfx_data(self):
-        result = ""
+        result = []
 
         return result
 
@@ -758,6 +1000,7 @@ class PdxAnimInfo():
         self.jointCount = 0
 
         self.animJoints = []
+        self.unknown = None
 
     def get_binary_data(self):
         result = bytearray()
@@ -768,23 +1011,30 @@ class PdxAnimInfo():
         result.extend(struct.pack("<cb3siI", b'!', 2, b'sai', 1, self.samples))
         result.extend(struct.pack("<cb2siI", b'!', 1, b'ji', 1, self.jointCount))
 
+        result.extend(get_unknown_data(self.unknown, PdxProperty))
+
         for animJoint in self.animJoints:
             result.extend(animJoint.get_binary_data())
 
+        result.extend(get_unknown_data(self.unknown, PdxObject))
+
         return result
 
     def get_gfx_data(self):
-        result = ""
+        result = []
 
         return result
 
 class PdxAnimJoint():
-    def __init__(self, name):
+    __slots__ = ("name", "sampleMode", "translation", "quaternion", "size", "unknown")
+
+    def __init__(self, name: str, sampleMode: str = "", translation: list = None, quaternion: list = None, size: float = 1):
         self.name = name
-        self.sampleMode = ""
-        self.translation = []
-        self.quaternion = []
-        self.size = 1
+        self.sampleMode = sampleMode
+        self.translation = translation if translation is not None else []
+        self.quaternion = quaternion if quaternion is not None else []
+        self.size = size
+        self.unknown = None
 
     def get_binary_data(self):
         result = bytearray()
@@ -814,10 +1064,13 @@ class PdxAnimJoint():
 
         result.extend(struct.pack("<cb2sII", b'!', 1, b'si', 1, self.size))
 
+        result.extend(get_unknown_data(self.unknown, PdxProperty))
+        result.extend(get_unknown_data(self.unknown, PdxObject))
+
         return result
 
     def get_gfx_data(self):
-        result = ""
+        result = []
 
         return result
 
@@ -826,11 +1079,12 @@ class PdxAnimSamples:
         self.t = []
         self.q = []
         self.s = []
+        self.unknown = None
 
     def get_binary_data(self):
         result = bytearray()
 
-        result.extend(struct.pack("<5sb", b'[samples', 0))
+        result.extend(struct.pack("<8sb", b'[samples', 0))
 
         if len(self.t) % 3 == 0:
             result.extend(struct.pack("<cb2sI", b'!', 1, b'tf', len(self.t)))
@@ -841,7 +1095,7 @@ class PdxAnimSamples:
             utils.Log.info("ERROR ::: T-Samples are not multiples of 3")
 
         if len(self.q) % 4 == 0:
-            result.extend(struct.pack("<cb2sI", b'!', 1, b'tf', len(self.q)))
+            result.extend(struct.pack("<cb2sI", b'!', 1, b'qf', len(self.q)))
 
             for q in self.q:
                 result.extend(struct.pack("<f", q))
@@ -849,47 +1103,64 @@ class PdxAnimSamples:
             utils.Log.info("ERROR ::: Q-Samples are not multiples of 4")
 
         if len(self.s) % 1 == 0:
-            result.extend(struct.pack("<cb2sI", b'!', 1, b'tf', len(self.s)))
+            result.extend(struct.pack("<cb2sI", b'!', 1, b'sf', len(self.s)))
 
             for s in self.s:
                 result.extend(struct.pack("<f", s))
         else:
             utils.Log.info("ERROR ::: S-Samples are not multiples of 1")
 
+        result.extend(get_unknown_data(self.unknown, PdxProperty))
+        result.extend(get_unknown_data(self.unknown, PdxObject))
+
         return result
 
     def get_gfx_data(self):
-        result = ""
+        result = []
 
         return result
 
 # Temporary objects
 class PdxObject():
     """Temporary class to hold the Values of a parsed Object until it gets mapped to the object"""
-    def __init__(self, name, properties, depth):
+    __slots__ = ("name", "properties", "depth", "raw")
+
+    def __init__(self, name: str, properties: list, depth: int):
         self.name = name
         self.properties = properties
         self.depth = depth
+        #Bytes of the whole Object in the parsed File, None if not parsed
+        self.raw = None
 
     def get_binary_data(self):
+        if self.raw is not None:
+            return bytearray(self.raw)
+
         return bytearray()
 
     def get_gfx_data(self):
-        result = ""
+        result = []
 
         return result
 
 class PdxProperty():
     """Temporary class to hold the Values of a parsed Property until it gets mapped to the object"""
-    def __init__(self, name, bounds):
+    __slots__ = ("name", "bounds", "value", "raw")
+
+    def __init__(self, name: str, bounds: tuple, value=None):
         self.name = name
         self.bounds = bounds
-        self.value = []
+        self.value = value if value is not None else []
+        #Bytes of the whole Property in the parsed File, None if not parsed
+        self.raw = None
 
     def get_binary_data(self):
+        if self.raw is not None:
+            return bytearray(self.raw)
+
         return bytearray()
 
     def get_gfx_data(self):
-        result = ""
+        result = []
 
         return result
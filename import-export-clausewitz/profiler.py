@@ -0,0 +1,168 @@
+import functools
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+
+#Set to a non empty Value to profile every Import and Export
+ENVIRONMENT_VARIABLE = "CLAUSEWITZ_PROFILE"
+#Directory of the written Reports, defaults to DEFAULT_DIRECTORY
+DIRECTORY_VARIABLE = "CLAUSEWITZ_PROFILE_DIR"
+
+DEFAULT_DIRECTORY = os.path.join(tempfile.gettempdir(), "clausewitz_profile")
+
+#Profile of the current Thread, None if Profiling is disabled
+__state__ = threading.local()
+
+def is_enabled(option=False):
+    """Returns True if Profiling is enabled by the Operator Option or the Environment"""
+    return bool(option) or bool(os.environ.get(ENVIRONMENT_VARIABLE))
+
+def get_directory():
+    return os.environ.get(DIRECTORY_VARIABLE) or DEFAULT_DIRECTORY
+
+def get_current():
+    return getattr(__state__, "profile", None)
+
+class StageStatistics():
+    """Accumulated Measurements of one Stage"""
+    __slots__ = ("seconds", "calls", "live_block_delta", "active")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        #Net Change of sys.getallocatedblocks(), the live Blocks of the whole Process.
+        #Not a Count of Allocations: Blocks freed within the Stage don't show, other Threads change it too.
+        self.live_block_delta = 0
+        #Number of running Measurements, recursive Calls are only timed once
+        self.active = 0
+
+class Profile():
+    """Wall Time, Call Count and the Change of live Memory Blocks per Stage of one File. Stages can be recorded from several Threads."""
+    def __init__(self, filename, operation):
+        self.filename = filename
+        self.operation = operation
+        self.stages = {}
+        self.created = time.time()
+        self.__lock__ = threading.Lock()
+
+    def get_stage(self, name):
+        with self.__lock__:
+            stage = self.stages.get(name)
+
+            if stage is None:
+                stage = StageStatistics()
+                self.stages[name] = stage
+
+            return stage
+
+    def get_report(self):
+        """Returns the Report as a JSON serializable Dictionary"""
+        stages = {}
+
+        for name, stage in sorted(self.stages.items()):
+            stages[name] = {
+                "seconds": stage.seconds,
+                "calls": stage.calls,
+                "live_block_delta": stage.live_block_delta,
+            }
+
+        return {
+            "file": self.filename,
+            "operation": self.operation,
+            "created": self.created,
+            "python": sys.version,
+            #Times and Blocks of a Stage include all Stages running inside it, Blocks are counted for the whole Process (see StageStatistics)
+            "stages": stages,
+        }
+
+    def write(self, directory=None):
+        """Writes the Report as JSON and returns the Path"""
+        if directory is None:
+            directory = get_directory()
+
+        os.makedirs(directory, exist_ok=True)
+
+        name = re.sub(r"[^\w.-]", "_", os.path.basename(self.filename))
+        path = os.path.join(directory, name + "." + self.operation + "." + time.strftime("%Y%m%d-%H%M%S") + ".json")
+
+        with io.open(path, "w") as f:
+            json.dump(self.get_report(), f, indent=4, sort_keys=True)
+
+        return path
+
+class activate():
+    """Makes the Profile the current one of this Thread while the Block runs, None is allowed and does nothing"""
+    __slots__ = ("profile", "previous")
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = get_current()
+
+        if self.profile is not None:
+            __state__.profile = self.profile
+
+        return self.profile
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        __state__.profile = self.previous
+
+        return False
+
+class stage():
+    """Measures the Block as the named Stage of the current Profile, does nothing if there is none"""
+    __slots__ = ("name", "statistics", "start", "blocks")
+
+    def __init__(self, name):
+        self.name = name
+        self.statistics = None
+
+    def __enter__(self):
+        profile = get_current()
+
+        if profile is not None:
+            self.statistics = profile.get_stage(self.name)
+            self.statistics.calls += 1
+            self.statistics.active += 1
+
+            if self.statistics.active == 1:
+                self.blocks = sys.getallocatedblocks()
+                self.start = time.perf_counter()
+
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        statistics = self.statistics
+
+        if statistics is not None:
+            if statistics.active == 1:
+                statistics.seconds += time.perf_counter() - self.start
+                statistics.live_block_delta += sys.getallocatedblocks() - self.blocks
+
+            statistics.active -= 1
+            self.statistics = None
+
+        return False
+
+def profiled(name):
+    """Decorator measuring every Call of the Function as the named Stage"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            #Fast Path, Profiling is disabled nearly always
+            if getattr(__state__, "profile", None) is None:
+                return function(*args, **kwargs)
+
+            with stage(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
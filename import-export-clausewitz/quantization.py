@@ -0,0 +1,96 @@
+import numpy as np
+
+class QuantizationSettings():
+    """Precision of the exported Vertex Attributes, 0 disables the Quantization of an Attribute"""
+    def __init__(self, position_bits=0, normal_bits=0, uv_texture_size=0, weight_bits=0):
+        #Bits per Axis of the Grid spanning the Bounds of an Object
+        self.position_bits = position_bits
+        #Bits per Component of the octahedral Encoding
+        self.normal_bits = normal_bits
+        #UVs are snapped to the Texel Grid of a Texture with this Size
+        self.uv_texture_size = uv_texture_size
+        #Weights are stored in Steps of 1 / (2 ** weight_bits - 1)
+        self.weight_bits = weight_bits
+
+    def is_enabled(self):
+        return self.position_bits > 0 or self.normal_bits > 0 or self.uv_texture_size > 0 or self.weight_bits > 0
+
+    def get_key(self):
+        """Returns the Settings as a Tuple, used in Fingerprints"""
+        return (self.position_bits, self.normal_bits, self.uv_texture_size, self.weight_bits)
+
+def quantize_positions(positions, bits):
+    """Snaps the (n, 3) Positions to a Grid with 2 ** bits Steps per Axis between the Bounds of all Positions"""
+    if len(positions) == 0:
+        return positions
+
+    bounds_min = positions.min(axis=0).astype(np.float64)
+    extent = positions.max(axis=0).astype(np.float64) - bounds_min
+
+    #Flat Axes keep their only Value
+    step = np.where(extent > 0, extent / (2 ** bits - 1), 1.0)
+    snapped = bounds_min + np.round((positions - bounds_min) / step) * step
+
+    return snapped.astype(positions.dtype)
+
+def __fold_octahedron__(x, y):
+    """Mirrors the lower Hemisphere onto the outer Triangles of the Octahedron"""
+    sign_x = np.where(x >= 0, 1.0, -1.0)
+    sign_y = np.where(y >= 0, 1.0, -1.0)
+
+    return (1 - np.abs(y)) * sign_x, (1 - np.abs(x)) * sign_y
+
+def quantize_normals(normals, bits):
+    """Snaps the (n, 3) unit Normals to the Directions representable by an octahedral Encoding with bits per Component.
+    Components use 2 ** (bits - 1) - 1 Steps per Sign, so Axis aligned Normals stay exact."""
+    if len(normals) == 0:
+        return normals
+
+    normals = normals.astype(np.float64)
+    normals = normals / np.maximum(np.abs(normals).sum(axis=1), 1e-12)[:, np.newaxis]
+
+    x, y, z = normals[:, 0], normals[:, 1], normals[:, 2]
+    fold_x, fold_y = __fold_octahedron__(x, y)
+    x = np.where(z < 0, fold_x, x)
+    y = np.where(z < 0, fold_y, y)
+
+    #Symmetric signed Grid, so 0 and the Axes are exact
+    steps = max(2 ** (bits - 1) - 1, 1)
+    x = np.round(x * steps) / steps
+    y = np.round(y * steps) / steps
+
+    z = 1 - np.abs(x) - np.abs(y)
+    fold_x, fold_y = __fold_octahedron__(x, y)
+    x = np.where(z < 0, fold_x, x)
+    y = np.where(z < 0, fold_y, y)
+
+    result = np.stack((x, y, z), axis=1)
+    result /= np.sqrt((result * result).sum(axis=1))[:, np.newaxis]
+    #-0.0 would weld apart from 0.0, the Welding compares the raw Bytes
+    result += 0.0
+
+    return result.astype(np.float32)
+
+def quantize_uvs(uvs, texture_size):
+    """Snaps the UVs to the Texel Grid of a texture_size x texture_size Texture"""
+    return (np.round(uvs.astype(np.float64) * texture_size) / texture_size).astype(uvs.dtype)
+
+def quantize_weights(weights, bits):
+    """Normalizes the (Vertices, Bones) Weights of every Vertex to sum up to 1 and rounds them to Steps of 1 / (2 ** bits - 1).
+    Every Weight is rounded down first, the remaining Steps go to the Weights with the largest Remainders,
+    so the Steps of a Vertex always sum up to 2 ** bits - 1. Vertices without Weights stay unweighted."""
+    steps = 2 ** bits - 1
+
+    weights = np.maximum(weights.astype(np.float64), 0)
+    total = weights.sum(axis=1, keepdims=True)
+    scaled = weights / np.where(total > 0, total, 1.0) * steps
+
+    quantized = np.floor(scaled)
+    remaining = np.where(total[:, 0] > 0, steps - quantized.sum(axis=1), 0)
+
+    #Rank of every Remainder within its Vertex, the largest first
+    ranks = np.argsort(np.argsort(quantized - scaled, axis=1, kind="mergesort"), axis=1, kind="mergesort")
+
+    quantized += ranks < remaining[:, np.newaxis]
+
+    return (quantized / steps).astype(np.float32)
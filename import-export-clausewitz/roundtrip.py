@@ -0,0 +1,167 @@
+import argparse
+import bisect
+import concurrent.futures
+import io
+import json
+import os
+
+from . import (pdx_data, utils)
+
+EXTENSIONS = (".mesh", ".anim")
+
+#Size of the Blocks compared at once before searching the exact Offset
+BLOCK_SIZE = 64 * 1024
+
+def get_file_data(nodes):
+    """Returns the Bytes of a File containing the Nodes, same Layout as written by the Exporter"""
+    result = bytearray(b'@@b@')
+
+    for node in nodes:
+        result.extend(node.get_binary_data())
+
+    return bytes(result)
+
+def find_first_difference(original, written):
+    """Returns the first Offset at which both Byte Strings differ or None if they are equal"""
+    if original == written:
+        return None
+
+    a = memoryview(original)
+    b = memoryview(written)
+    length = min(len(a), len(b))
+
+    offset = 0
+    while offset < length and a[offset:offset + BLOCK_SIZE] == b[offset:offset + BLOCK_SIZE]:
+        offset += BLOCK_SIZE
+
+    end = min(offset + BLOCK_SIZE, length)
+    while offset < end and a[offset] == b[offset]:
+        offset += 1
+
+    return offset
+
+def find_path(spans, offset):
+    """Returns the Path of the Property or Object Header containing the Offset"""
+    if len(spans) == 0:
+        return ""
+
+    starts = [span.bounds[0] for span in spans]
+    index = bisect.bisect_right(starts, offset) - 1
+
+    if index < 0:
+        return "(file header)"
+
+    span = spans[index]
+
+    if offset >= span.bounds[1]:
+        return span.path + " (after)"
+
+    return span.path + " +" + str(offset - span.bounds[0])
+
+def verify_file(filename):
+    """Parses the File, serializes the Nodes again and compares the Result to the original Bytes"""
+    result = {
+        "file": filename,
+        "equal": False,
+        "size": 0,
+        "written_size": 0,
+        "offset": None,
+        "path": None,
+        "original": None,
+        "written": None,
+        "error": None,
+    }
+
+    try:
+        pdx_file = pdx_data.PdxFile(filename)
+        pdx_file.read()
+
+        original = bytes(pdx_file.rawData)
+        written = get_file_data(pdx_file.nodes)
+    except Exception as e:
+        result["error"] = type(e).__name__ + ": " + str(e)
+        return result
+
+    result["size"] = len(original)
+    result["written_size"] = len(written)
+
+    offset = find_first_difference(original, written)
+
+    if offset is None:
+        result["equal"] = True
+    else:
+        result["offset"] = offset
+        result["path"] = find_path(pdx_file.scan(), offset)
+        result["original"] = original[offset:offset + 16].hex()
+        result["written"] = written[offset:offset + 16].hex()
+
+    return result
+
+def __verify_worker__(arguments):
+    filename, log_level = arguments
+
+    #Worker Processes started with spawn don't inherit the Log Level
+    utils.Log.MIN_LOG_LEVEL = log_level
+
+    return verify_file(filename)
+
+def find_files(paths, extensions=EXTENSIONS):
+    """Returns all Files with a matching Extension, Directories are searched recursively"""
+    files = []
+
+    for path in paths:
+        if os.path.isdir(path):
+            for root, directories, filenames in os.walk(path):
+                directories.sort()
+
+                for filename in sorted(filenames):
+                    if filename.lower().endswith(extensions):
+                        files.append(os.path.join(root, filename))
+        else:
+            files.append(path)
+
+    return files
+
+def verify_files(filenames, workers=None):
+    """Verifies all Files, using a Process Pool unless workers is 1. Results are in the Order of the Files."""
+    if workers == 1 or len(filenames) <= 1:
+        return [verify_file(filename) for filename in filenames]
+
+    arguments = [(filename, utils.Log.MIN_LOG_LEVEL) for filename in filenames]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(__verify_worker__, arguments, chunksize=8))
+
+def format_result(result):
+    if result["error"] is not None:
+        return result["file"] + ": ERROR " + result["error"]
+    elif result["equal"]:
+        return result["file"] + ": OK"
+
+    return "{}: DIFFERS at 0x{:08x} in {} (original {}, written {}, sizes {}/{})".format(
+        result["file"], result["offset"], result["path"], result["original"], result["written"], result["size"], result["written_size"])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="roundtrip", description="Verifies that reading and writing .mesh/.anim Files is lossless.")
+    parser.add_argument("paths", nargs="+", help="Files or Directories to verify")
+    parser.add_argument("--workers", type=int, default=None, help="Number of Worker Processes (1 disables the Pool)")
+    parser.add_argument("--json", help="Writes all Results as JSON to the given File")
+    parser.add_argument("--all", action="store_true", help="Also lists the lossless Files")
+    args = parser.parse_args(argv)
+
+    utils.Log.MIN_LOG_LEVEL = utils.LogLevel.CRITICAL
+
+    results = verify_files(find_files(args.paths), args.workers)
+
+    for result in results:
+        if args.all or not result["equal"]:
+            print(format_result(result))
+
+    equal = sum(1 for result in results if result["equal"])
+    print(str(equal) + "/" + str(len(results)) + " Files are lossless")
+
+    if args.json:
+        with io.open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+
+    return 0 if equal == len(results) else 1
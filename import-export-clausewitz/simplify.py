@@ -0,0 +1,303 @@
+import heapq
+
+import numpy as np
+
+from . import (pdx_data, profiler)
+
+def get_face_quadrics(positions, faces):
+    """Returns the (Faces, 4, 4) Quadrics of the Face Planes, weighted by the Face Area"""
+    corners = positions[faces]
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+
+    #Length of the Cross Product is twice the Area
+    area = np.sqrt((normals * normals).sum(axis=1))
+    normals = normals / np.where(area > 0, area, 1.0)[:, np.newaxis]
+
+    planes = np.empty((len(faces), 4))
+    planes[:, 0:3] = normals
+    planes[:, 3] = -(normals * corners[:, 0]).sum(axis=1)
+
+    return planes[:, :, np.newaxis] * planes[:, np.newaxis, :] * (area * 0.5)[:, np.newaxis, np.newaxis]
+
+def get_boundary_vertices(vertex_count, faces):
+    """Returns a Mask of the Vertices on Edges used by only one Face"""
+    edges = np.concatenate((faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]))
+    edges.sort(axis=1)
+
+    keys = np.sort(edges[:, 0].astype(np.int64) * vertex_count + edges[:, 1])
+    #Keys occurring once, without np.unique's return_counts (not in older numpy)
+    single = np.ones(len(keys), dtype=np.bool_)
+    single[1:] &= keys[1:] != keys[:-1]
+    single[:-1] &= keys[:-1] != keys[1:]
+    boundary = keys[single]
+
+    result = np.zeros(vertex_count, dtype=np.bool_)
+    result[boundary // vertex_count] = True
+    result[boundary % vertex_count] = True
+
+    return result
+
+def weld_rows(rows):
+    """Returns the Index of the unique Row of every Row and the first Occurrence of every unique Row"""
+    rows = np.ascontiguousarray(rows)
+    keys = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).reshape(-1)
+
+    unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    return inverse.reshape(-1), first
+
+def get_edges(vertex_count, faces):
+    """Returns the unique Edges of the Faces as (Edges, 2) Array, the smaller Index first"""
+    edges = np.concatenate((faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]))
+    edges.sort(axis=1)
+
+    keys = np.unique(edges[:, 0].astype(np.int64) * vertex_count + edges[:, 1])
+
+    return np.stack((keys // vertex_count, keys % vertex_count), axis=1)
+
+def get_normal(a, b, c):
+    u = (b[0] - a[0], b[1] - a[1], b[2] - a[2])
+    v = (c[0] - a[0], c[1] - a[1], c[2] - a[2])
+
+    return (u[1] * v[2] - u[2] * v[1], u[2] * v[0] - u[0] * v[2], u[0] * v[1] - u[1] * v[0])
+
+@profiler.profiled("simplify")
+def simplify(positions, faces, target_faces, attributes=None, normals=None):
+    """Reduces the triangular Faces to target_faces by Quadric Error Edge Collapses.
+    Vertices are welded by Position first, so Normal and Tangent Splits don't stop Collapses.
+    Vertices with the same Position but different attributes (UVs, Skin) are Wedges of one Position, a Collapse moves
+    every Wedge onto a Wedge of the kept Position. So Collapses run along Attribute Seams but never across them,
+    and only open Borders and the Ends of Seams are fixed.
+    Every Corner of the Result uses one of the original Vertices with the Position and Wedge of that Corner,
+    the one whose Normal is closest to the new Face Normal if normals are given.
+    Returns the Indices of the used Vertices and the Faces indexing into them."""
+    positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+
+    if len(faces) <= target_faces or len(positions) == 0:
+        used = np.unique(faces)
+        return used, np.searchsorted(used, faces)
+
+    position_index, first = weld_rows(positions)
+    points = positions[first]
+
+    keys = position_index[:, np.newaxis].astype(np.float64)
+    if attributes is not None:
+        keys = np.concatenate((keys, np.asarray(attributes, dtype=np.float64).reshape(len(positions), -1)), axis=1)
+    wedge_index, wedge_first = weld_rows(keys)
+
+    position_faces = position_index[faces]
+    wedge_faces = wedge_index[faces]
+
+    #Faces collapsed by the Welding have no Area, they would only block the Link Condition
+    valid = (position_faces[:, 0] != position_faces[:, 1]) & (position_faces[:, 1] != position_faces[:, 2]) & (position_faces[:, 2] != position_faces[:, 0])
+    position_faces = position_faces[valid]
+    wedge_faces = wedge_faces[valid]
+
+    if normals is not None:
+        normals = np.asarray(normals, dtype=np.float64).reshape(-1, 3)
+
+        #The Exporter reverses the Winding, the Agreement of Face and Vertex Normals tells which Side is outside
+        corners = positions[faces]
+        if (np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0]) * normals[faces].sum(axis=1)).sum() < 0:
+            normals = -normals
+
+    position_faces, wedge_faces = __collapse__(points, position_faces, wedge_faces, target_faces)
+
+    result = get_wedge_vertices(positions, wedge_index, wedge_faces, points[position_faces], normals)
+    used = np.unique(result)
+
+    return used, np.searchsorted(used, result)
+
+def get_wedge_vertices(positions, wedge_index, wedge_faces, corners, normals):
+    """Returns the Faces with every Corner Wedge replaced by one original Vertex of that Wedge.
+    With Normals, the Vertex whose Normal is closest to the Face Normal (hard Edges and flat Shading), else the first."""
+    order = np.argsort(wedge_index, kind="mergesort")
+    starts = np.searchsorted(wedge_index[order], np.arange(wedge_index.max() + 1))
+    ends = np.append(starts[1:], len(order))
+
+    result = order[starts[wedge_faces]]
+
+    if normals is None:
+        return result
+
+    face_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+
+    #Only Wedges with several Vertices need a Choice
+    counts = (ends - starts)[wedge_faces]
+
+    for face, corner in zip(*np.nonzero(counts > 1)):
+        candidates = order[starts[wedge_faces[face, corner]]:ends[wedge_faces[face, corner]]]
+        result[face, corner] = candidates[np.argmax(normals[candidates].dot(face_normals[face]))]
+
+    return result
+
+def __collapse__(positions, faces, wedge_faces, target_faces):
+    vertex_count = len(positions)
+
+    #Error Quadric of every Vertex, the Sum of the Quadrics of its Faces
+    face_quadrics = get_face_quadrics(positions, faces)
+    quadrics = np.zeros((vertex_count, 4, 4))
+    for corner in range(3):
+        np.add.at(quadrics, faces[:, corner], face_quadrics)
+
+    locked = get_boundary_vertices(vertex_count, faces).tolist()
+
+    points = np.ones((vertex_count, 4))
+    points[:, 0:3] = positions
+
+    face_list = faces.tolist()
+    wedge_list = wedge_faces.tolist()
+    vertex_faces = [set() for i in range(vertex_count)]
+    for index, face in enumerate(face_list):
+        for vertex in face:
+            vertex_faces[vertex].add(index)
+
+    #Increased whenever a Vertex changes, Heap Entries with an old Version are outdated
+    version = [0] * vertex_count
+    heap = []
+
+    def get_cost(quadric, vertex):
+        return float(points[vertex].dot(quadric).dot(points[vertex]))
+
+    def push(a, b):
+        #Both Directions, Wedges may allow only one of them
+        quadric = quadrics[a] + quadrics[b]
+
+        if not locked[a]:
+            heapq.heappush(heap, (get_cost(quadric, b), a, b, version[a], version[b]))
+        if not locked[b]:
+            heapq.heappush(heap, (get_cost(quadric, a), b, a, version[b], version[a]))
+
+    #Initial Costs in Bulk
+    edges = get_edges(vertex_count, faces)
+    edge_quadrics = quadrics[edges[:, 0]] + quadrics[edges[:, 1]]
+    cost_to_a = np.einsum("ei,eij,ej->e", points[edges[:, 0]], edge_quadrics, points[edges[:, 0]])
+    cost_to_b = np.einsum("ei,eij,ej->e", points[edges[:, 1]], edge_quadrics, points[edges[:, 1]])
+
+    for (a, b), to_a, to_b in zip(edges.tolist(), cost_to_a.tolist(), cost_to_b.tolist()):
+        if not locked[a]:
+            heap.append((to_b, a, b, 0, 0))
+        if not locked[b]:
+            heap.append((to_a, b, a, 0, 0))
+
+    heapq.heapify(heap)
+
+    coordinates = positions.tolist()
+    face_count = len(face_list)
+
+    def get_neighbors(vertex):
+        return set(v for f in vertex_faces[vertex] for v in face_list[f]) - {vertex}
+
+    while face_count > target_faces and len(heap) > 0:
+        cost, removed, kept, removed_version, kept_version = heapq.heappop(heap)
+
+        if removed_version != version[removed] or kept_version != version[kept]:
+            continue
+
+        shared = vertex_faces[removed] & vertex_faces[kept]
+
+        if len(shared) == 0:
+            continue
+
+        #Wedges of removed continue in the Wedge of kept across the collapsed Faces, they must agree
+        wedges = {}
+        valid = True
+        for f in shared:
+            face = face_list[f]
+            wedge = wedge_list[f][face.index(kept)]
+
+            if wedges.setdefault(wedge_list[f][face.index(removed)], wedge) != wedge:
+                valid = False
+                break
+
+        others = vertex_faces[removed] - shared
+
+        #Wedges only on other Faces (Seam Ends, Seams crossing the Edge) would lose their Attributes
+        if not valid or any(wedge_list[f][face_list[f].index(removed)] not in wedges for f in others):
+            continue
+
+        #Link Condition, keeps the Mesh manifold
+        opposite = set(v for f in shared for v in face_list[f]) - {removed, kept}
+        if get_neighbors(removed) & get_neighbors(kept) != opposite:
+            continue
+
+        #Faces must not flip or collapse
+        for f in others:
+            corners = [coordinates[v] for v in face_list[f]]
+            before = get_normal(*corners)
+            corners = [coordinates[kept if v == removed else v] for v in face_list[f]]
+            after = get_normal(*corners)
+
+            if before[0] * after[0] + before[1] * after[1] + before[2] * after[2] <= 0:
+                valid = False
+                break
+
+        if not valid:
+            continue
+
+        for f in shared:
+            for v in face_list[f]:
+                vertex_faces[v].discard(f)
+            face_count -= 1
+
+        for f in others:
+            index = face_list[f].index(removed)
+            face_list[f][index] = kept
+            wedge_list[f][index] = wedges[wedge_list[f][index]]
+            vertex_faces[kept].add(f)
+
+        vertex_faces[removed] = set()
+        quadrics[kept] += quadrics[removed]
+        version[removed] += 1
+        version[kept] += 1
+
+        for neighbor in get_neighbors(kept):
+            push(kept, neighbor)
+
+    alive = sorted(set(f for faces_of_vertex in vertex_faces for f in faces_of_vertex))
+
+    return np.array([face_list[f] for f in alive], dtype=np.int64).reshape(-1, 3), np.array([wedge_list[f] for f in alive], dtype=np.int64).reshape(-1, 3)
+
+def simplify_mesh(mesh, ratio):
+    """Returns a new PdxMesh with about ratio Times the Faces of mesh, sharing its Material.
+    Vertex Attributes (Normals, Tangents, UVs, Skin) are copied from the remaining Vertices, UVs and Skin never get interpolated."""
+    attributes = [np.array(uvs, dtype=np.float64).reshape(len(mesh.verts), -1) for uvs in [mesh.uv_coords] + mesh.extra_uv_coords if len(uvs) > 0]
+
+    if mesh.skin is not None:
+        attributes.append(np.array(mesh.skin.indices, dtype=np.float64).reshape(len(mesh.verts), -1))
+        attributes.append(np.array(mesh.skin.weight, dtype=np.float64).reshape(len(mesh.verts), -1))
+
+    attributes = np.concatenate(attributes, axis=1) if len(attributes) > 0 else None
+    normals = mesh.normals if len(mesh.normals) > 0 else None
+
+    used, faces = simplify(mesh.verts, mesh.faces, int(len(mesh.faces) * ratio), attributes, normals)
+    indices = used.tolist()
+
+    def select(values):
+        return [values[i] for i in indices] if len(values) > 0 else []
+
+    result = pdx_data.PdxMesh()
+    result.verts = select(mesh.verts)
+    result.faces = [tuple(face) for face in faces.tolist()]
+    result.normals = select(mesh.normals)
+    result.tangents = select(mesh.tangents)
+    result.uv_coords = select(mesh.uv_coords)
+    result.extra_uv_coords = [select(uvs) for uvs in mesh.extra_uv_coords]
+    result.material = mesh.material
+
+    if len(result.verts) > 0:
+        positions = np.array(result.verts)
+        result.meshBounds = pdx_data.PdxBounds(positions.min(axis=0).tolist(), positions.max(axis=0).tolist())
+    else:
+        result.meshBounds = mesh.meshBounds
+
+    if mesh.skin is not None:
+        bones = mesh.skin.bonesPerVertice
+
+        result.skin = pdx_data.PdxSkin()
+        result.skin.bonesPerVertice = bones
+        result.skin.indices = [mesh.skin.indices[i * bones + j] for i in indices for j in range(bones)]
+        result.skin.weight = [mesh.skin.weight[i * bones + j] for i in indices for j in range(bones)]
+
+    return result
@@ -1,5 +1,12 @@
 import struct
 import datetime
+import os
+import stat
+import tempfile
+import threading
+import time
+
+from . import (profiler)
 
 class BufferReader:
     def __init__(self, buffer):
@@ -37,6 +44,16 @@ class BufferReader:
             self.__offset__ += 4
             return struct.unpack_from("f", self.buffer, self.__offset__ - 4)[0]
 
+    def NextInt32Array(self, count):
+        values = list(struct.unpack_from("<" + str(count) + "i", self.buffer, self.__offset__))
+        self.__offset__ += 4 * count
+        return values
+
+    def NextFloat32Array(self, count):
+        values = list(struct.unpack_from("<" + str(count) + "f", self.buffer, self.__offset__))
+        self.__offset__ += 4 * count
+        return values
+
     def NextChar(self, lookahead=False):
         if lookahead:
             return chr(self.buffer[self.__offset__])
@@ -85,43 +102,39 @@ def TranslatePropertyName(originalName: str):
         return "tangents"
     elif originalName == "u0":
         return "uv_map"
+    elif originalName in ("u1", "u2", "u3"):
+        return "uv_map_" + originalName[1]
     elif originalName == "tri":
         return "faces"
 
     return originalName
 
+@profiler.profiled("transpose")
 def TransposeCoordinateArray4D(data):
-    result = []
-
     if len(data) % 4 == 0:
-        for i in my_range(0, len(data) - 4, 4):
-            result.append((data[i], data[i + 1], data[i + 2], data[i + 3]))
+        values = iter(data)
 
-        return result
+        return list(zip(values, values, values, values))
     else:
-        return result
+        return []
 
+@profiler.profiled("transpose")
 def TransposeCoordinateArray3D(data):
-    result = []
-
     if len(data) % 3 == 0:
-        for i in my_range(0, len(data) - 3, 3):
-            result.append((data[i], data[i + 1], data[i + 2]))
+        values = iter(data)
 
-        return result
+        return list(zip(values, values, values))
     else:
-        return result
+        return []
 
+@profiler.profiled("transpose")
 def TransposeCoordinateArray2D(data):
-    result = []
-
     if len(data) % 2 == 0:
-        for i in my_range(0, len(data) - 2, 2):
-            result.append([data[i], data[i + 1]])
+        values = iter(data)
 
-        return result
+        return [[u, v] for u, v in zip(values, values)]
     else:
-        return result
+        return []
 
 class LogLevel:
     DEBUG = 1
@@ -194,3 +207,142 @@ class Log:
     def log(level, message):
         if level >= Log.MIN_LOG_LEVEL:
             print(str(datetime.datetime.now()).split('.')[0] + " - " + LogLevel.GetLogLevelString(level) + " ::: " + str(message))
+
+def get_private_directory(name):
+    """Returns the Directory name below the Temp Directory, only accessible by the current User.
+    Where there are User Ids it is suffixed with the Id and created with 0700 Permissions.
+    Raises OSError if it belongs to another User or others can write to it, they could plant Files."""
+    directory = os.path.join(tempfile.gettempdir(), name)
+
+    if not hasattr(os, "getuid"):
+        #The Temp Directory is per User on Windows
+        os.makedirs(directory, exist_ok=True)
+        return directory
+
+    directory += "_" + str(os.getuid())
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+
+    info = os.lstat(directory)
+
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077 != 0:
+        raise OSError("Directory \"" + directory + "\" is not private to the current User")
+
+    return directory
+
+class ProgressCancelled(Exception):
+    """Raised by Progress when the running Import or Export got cancelled"""
+    pass
+
+class ProgressStage:
+    __slots__ = ("name", "weight", "total", "done")
+
+    def __init__(self, name, weight, total):
+        self.name = name
+        self.weight = weight
+        self.total = total
+        self.done = 0
+
+class Progress:
+    """Progress over weighted Stages, reported at most once per Interval.
+    window_manager is optional (Blender's WindowManager or anything with progress_begin/progress_update/progress_end).
+    The current Stage is tracked per Thread, so parallel Workers can advance different Stages."""
+    #Resolution of the Value passed to progress_update
+    STEPS = 1000
+
+    def __init__(self, window_manager=None, interval=0.1):
+        self.window_manager = window_manager
+        self.interval = interval
+        self.stages = []
+        self.__current__ = threading.local()
+        self.fraction = 0.0
+        self.__last_report__ = 0.0
+        self.__cancelled__ = threading.Event()
+        self.__started__ = False
+
+    @property
+    def stage(self):
+        return getattr(self.__current__, "stage", None)
+
+    @stage.setter
+    def stage(self, stage):
+        self.__current__.stage = stage
+
+    def add_stage(self, name, weight=1.0, total=1):
+        """Adds a Stage, weight is its Share of the whole Progress (e.g. expected Work or File Size)"""
+        stage = ProgressStage(name, max(weight, 0.0), max(total, 1))
+        self.stages.append(stage)
+
+        return stage
+
+    def begin_stage(self, name, total=None):
+        """Makes the named Stage the current one, total replaces the Amount of Work it was added with"""
+        for stage in self.stages:
+            if stage.name == name:
+                break
+        else:
+            stage = self.add_stage(name)
+
+        if total is not None:
+            stage.total = max(total, 1)
+
+        self.stage = stage
+        self.update(0, True)
+
+    def end_stage(self):
+        """Completes the current Stage, doesn't check for Cancellation"""
+        if self.stage is not None:
+            self.stage.done = self.stage.total
+            self.stage = None
+            self.__report__(True)
+
+    def advance(self, count=1):
+        if self.stage is not None:
+            self.update(self.stage.done + count)
+
+    def update(self, done, force=False):
+        """Sets the Work done in the current Stage. Raises ProgressCancelled if cancel was called."""
+        if self.__cancelled__.is_set():
+            raise ProgressCancelled()
+
+        if self.stage is not None:
+            self.stage.done = min(done, self.stage.total)
+
+        self.__report__(force)
+
+    def get_fraction(self):
+        weight = sum(stage.weight for stage in self.stages)
+
+        if weight <= 0:
+            return 0.0
+
+        return sum(stage.weight * stage.done / stage.total for stage in self.stages) / weight
+
+    def __report__(self, force):
+        now = time.perf_counter()
+
+        if force or now - self.__last_report__ >= self.interval:
+            self.__last_report__ = now
+            self.fraction = self.get_fraction()
+            self.report()
+
+    def report(self):
+        if self.window_manager is None:
+            return
+
+        if not self.__started__:
+            self.window_manager.progress_begin(0, self.STEPS)
+            self.__started__ = True
+
+        self.window_manager.progress_update(int(self.fraction * self.STEPS))
+
+    def end(self):
+        if self.__started__:
+            self.window_manager.progress_end()
+            self.__started__ = False
+
+    def cancel(self):
+        """Requests Cancellation, the next Update raises ProgressCancelled. Safe to call from other Threads."""
+        self.__cancelled__.set()
+
+    def is_cancelled(self):
+        return self.__cancelled__.is_set()
@@ -0,0 +1,43 @@
+"""Command Line Tools for Clausewitz Files, usable without Blender.
+
+Usage: python tools/pdxtool.py <command> [arguments]
+"""
+import importlib
+import os
+import sys
+import types
+
+ADDON_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "import-export-clausewitz")
+PACKAGE_NAME = "clausewitz"
+
+#The __init__ of the Addon imports bpy, so the bpy free Modules are loaded through a Stub Package instead.
+#Runs on Import as well, Worker Processes started with spawn need the Package too.
+if PACKAGE_NAME not in sys.modules:
+    package = types.ModuleType(PACKAGE_NAME)
+    package.__path__ = [ADDON_DIRECTORY]
+    sys.modules[PACKAGE_NAME] = package
+
+#Command -> Module implementing main(argv)
+COMMANDS = {
+    "bench": "benchmark",
+    "index": "asset_index",
+    "patch": "patcher",
+    "roundtrip": "roundtrip",
+    "stats": "mesh_statistics",
+}
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+
+    if len(argv) == 0 or argv[0] not in COMMANDS:
+        print(__doc__.strip())
+        print("\nCommands: " + ", ".join(sorted(COMMANDS)))
+        return 2
+
+    module = importlib.import_module(PACKAGE_NAME + "." + COMMANDS[argv[0]])
+
+    return module.main(argv[1:])
+
+if __name__ == "__main__":
+    sys.exit(main())